@@ -0,0 +1,55 @@
+"""Microbenchmark of the Telegram formatters against a naive f-string HTML formatter and logging.Formatter.
+
+Run from the repository root with ``python -m benchmarks.bench_formatters``.
+"""
+
+import logging
+import timeit
+
+from python_telegram_logging.formatters import HTMLFormatter, TemplateFormatter
+
+
+class NaiveHTMLFormatter(logging.Formatter):
+    """The formatter most users write: f-strings and no escaping."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the record as HTML."""
+        level_emojis = {"DEBUG": "⚪️", "INFO": "🔵", "WARNING": "🟡", "ERROR": "🔴", "CRITICAL": "⛔️"}
+        level_emoji = level_emojis.get(record.levelname, "⚪️")
+        timestamp = self.formatTime(record, self.datefmt)
+        message = super().format(record)
+        return (
+            f"{level_emoji} <b>{record.levelname}</b> " f"[{timestamp}]\n" f"<code>{record.name}</code>\n" f"{message}"
+        )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    record = logging.LogRecord(
+        name="app.db.queries",
+        level=logging.WARNING,
+        pathname="app.py",
+        lineno=1,
+        msg="Slow query <%s> took %d ms for user %s",
+        args=("SELECT * FROM users WHERE id > 10 AND name <> 'x'", 1234, "alice@example.com"),
+        exc_info=None,
+    )
+    record.user_id = 42
+    record.request_id = "c0ffee"
+    formatters = (
+        ("naive f-string", NaiveHTMLFormatter()),
+        ("HTMLFormatter", HTMLFormatter()),
+        (
+            "logging.Formatter",
+            logging.Formatter("%(levelname)s [%(asctime)s] %(name)s\n%(message)s\nuser_id: %(user_id)s"),
+        ),
+        ("TemplateFormatter", TemplateFormatter("{levelname:bold} [{asctime}] {name:code}\n{message}\n{user_id:code}")),
+    )
+    number = 100_000
+    for name, formatter in formatters:
+        seconds = min(timeit.repeat(lambda: formatter.format(record), number=number, repeat=5))
+        print(f"{name:>18}: {seconds / number * 1e6:.2f} µs/record")
+
+
+if __name__ == "__main__":
+    main()
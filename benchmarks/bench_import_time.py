@@ -0,0 +1,54 @@
+"""Benchmark of the package's import time, measured with ``python -X importtime``.
+
+Each statement is imported in a fresh interpreter. Importing the package alone must stay
+cheap: ``requests`` and ``aiohttp`` are only loaded with the handler that needs them.
+
+Run from the repository root with ``python -m benchmarks.bench_import_time``.
+"""
+
+import subprocess
+import sys
+from typing import Dict, List
+
+STATEMENTS = (
+    "import python_telegram_logging",
+    "from python_telegram_logging import SyncTelegramHandler",
+    "from python_telegram_logging import AsyncTelegramHandler",
+)
+PACKAGE = "python_telegram_logging"
+REPEAT = 5
+
+
+def import_times(statement: str) -> Dict[str, int]:
+    """Return the cumulative import time of each top-level import in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        # Nested imports are indented and already included in their parent's cumulative time.
+        if not module.startswith("  "):
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+def loaded_modules(statement: str) -> List[str]:
+    """Return the names of the modules loaded by the statement."""
+    code = f"{statement}\nimport sys\nprint('\\n'.join(sys.modules))"
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+
+
+def main() -> None:
+    """Run the benchmark."""
+    for statement in STATEMENTS:
+        runs = [import_times(statement) for _ in range(REPEAT)]
+        best = min(sum(time for module, time in times.items() if module.startswith(PACKAGE)) for times in runs)
+        loaded = [name for name in ("requests", "aiohttp") if name in loaded_modules(statement)]
+        print(f"{statement:>58}: {best / 1000:7.1f} ms, loads {', '.join(loaded) or 'no HTTP client'}")
+
+
+if __name__ == "__main__":
+    main()
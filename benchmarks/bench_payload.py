@@ -0,0 +1,34 @@
+"""Microbenchmark of request body encoding: a dict passed to json.dumps against the cached payload template.
+
+Run from the repository root with ``python -m benchmarks.bench_payload``. The template uses
+``orjson`` when installed (``pip install python-telegram-logging[fast]``).
+"""
+
+import json
+import timeit
+
+from python_telegram_logging.encoding import orjson
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+
+
+def main() -> None:
+    """Run the benchmark."""
+    handler = SyncTelegramHandler(token="token", chat_id=-1001234567890)
+    texts = {
+        "short": "🔴 <b>ERROR</b> [2024-01-01 12:00:00,000]\n<code>app.db</code>\nSlow query took 1234 ms",
+        "4096 chars": "Traceback (most recent call last):\n" + '  File "app.py", line 1, in <module>\n' * 110,
+    }
+    number = 100_000
+    print(f"json backend: {'orjson' if orjson is not None else 'json'}")
+    for label, text in texts.items():
+        cases = (
+            ("dict + json.dumps", lambda: json.dumps(handler.prepare_payload(text)).encode()),
+            ("encode_payload", lambda: handler.encode_payload(text)),
+        )
+        for name, encode in cases:
+            seconds = min(timeit.repeat(encode, number=number, repeat=5))
+            print(f"{label:>10} {name:>17}: {seconds / number * 1e6:.2f} µs/message")
+
+
+if __name__ == "__main__":
+    main()
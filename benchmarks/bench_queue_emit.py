@@ -0,0 +1,63 @@
+"""Benchmark of contended ``emit()`` throughput with queue.Queue and RingBufferQueue.
+
+Many threads log through one ``QueuedTelegramHandler`` whose underlying handler does
+nothing, so only the producer side of the queue is measured.
+
+Run from the repository root with ``python -m benchmarks.bench_queue_emit``.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+from python_telegram_logging.handlers.queue import QueuedTelegramHandler
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+from python_telegram_logging.queues import RingBufferQueue
+
+THREADS = 64
+RECORDS_PER_THREAD = 5_000
+
+
+class NullTelegramHandler(SyncTelegramHandler):
+    """Telegram handler that drops every record."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Drop the record."""
+
+
+def run(queue_class) -> float:
+    """Return the number of records emitted per second."""
+    handler = QueuedTelegramHandler(
+        NullTelegramHandler(token="token", chat_id="chat"),
+        queue_size=THREADS * RECORDS_PER_THREAD,
+        queue_class=queue_class,
+    )
+    record = logging.LogRecord("bench", logging.INFO, "bench.py", 1, "message", (), None)
+    barrier = threading.Barrier(THREADS + 1)
+
+    def produce() -> None:
+        barrier.wait()
+        for _ in range(RECORDS_PER_THREAD):
+            handler.handle(record)
+
+    threads = [threading.Thread(target=produce) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    handler.close()
+    return THREADS * RECORDS_PER_THREAD / elapsed
+
+
+def main() -> None:
+    """Run the benchmark."""
+    for name, queue_class in (("queue.Queue", queue.Queue), ("RingBufferQueue", RingBufferQueue)):
+        print(f"{name:>16}: {run(queue_class):,.0f} emits/s with {THREADS} threads")
+
+
+if __name__ == "__main__":
+    main()
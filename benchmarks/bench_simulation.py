@@ -0,0 +1,29 @@
+"""Run the rate limiters and the async queue consumer through large simulated workloads.
+
+Run from the repository root with ``python -m benchmarks.bench_simulation``. Each line reports
+the achieved throughput in simulated time, its share of the sustained rate the limits allow,
+and the number of sends Telegram would have rejected with 429.
+"""
+
+from python_telegram_logging.rate_limiting import AdaptiveRateControl, LimitProfile
+from python_telegram_logging.simulation import simulate_async_handler, simulate_async_limiter, simulate_sync_limiter
+
+
+def main() -> None:
+    """Run the simulations."""
+    scenarios = (
+        ("SyncRateLimiter, groups", lambda: simulate_sync_limiter(1_000_000, chats=100)),
+        (
+            "SyncRateLimiter, private chats",
+            lambda: simulate_sync_limiter(1_000_000, chats=100, profile=LimitProfile(max_per_window=60)),
+        ),
+        ("SyncRateLimiter, AIMD", lambda: simulate_sync_limiter(100_000, chats=10, adaptive=AdaptiveRateControl())),
+        ("AsyncRateLimiter, groups", lambda: simulate_async_limiter(200_000, chats=100)),
+        ("AsyncTelegramHandler, 200ms latency", lambda: simulate_async_handler(20_000, chats=50, latency=0.2)),
+    )
+    for name, simulate in scenarios:
+        print(f"{name}: {simulate().summary()}")
+
+
+if __name__ == "__main__":
+    main()
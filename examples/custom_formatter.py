@@ -1,8 +1,13 @@
-"""An example of a custom formatter that formats log messages with HTML parse mode and with custom emojis."""
+"""An example of a custom formatter that formats log messages with HTML parse mode and with custom emojis.
+
+For most cases the bundled ``HTMLFormatter`` renders the same layout; a custom formatter must escape
+every dynamic part itself, otherwise a single ``<`` in a log line makes Telegram reject the message.
+"""
 
 import logging
 
 from python_telegram_logging import ParseMode, QueuedTelegramHandler, SyncTelegramHandler
+from python_telegram_logging.formatters import escape, escape_code
 
 
 class TelegramHTMLFormatter(logging.Formatter):
@@ -19,17 +24,20 @@ class TelegramHTMLFormatter(logging.Formatter):
         # Format timestamp.
         timestamp = self.formatTime(record, self.datefmt)
 
-        # Format the basic message.
-        message = super().format(record)
+        # Format and escape the basic message.
+        message = escape(record.getMessage(), ParseMode.HTML)
 
         # Create HTML-formatted message.
         html_message = (
-            f"{level_emoji} <b>{record.levelname}</b> " f"[{timestamp}]\n" f"<code>{record.name}</code>\n" f"{message}"
+            f"{level_emoji} <b>{record.levelname}</b> "
+            f"[{timestamp}]\n"
+            f"<code>{escape_code(record.name, ParseMode.HTML)}</code>\n"
+            f"{message}"
         )
 
         # Add exception info if present.
         if record.exc_info:
-            html_message += f"\n\n<pre>{self.formatException(record.exc_info)}</pre>"
+            html_message += f"\n\n<pre>{escape_code(self.formatException(record.exc_info), ParseMode.HTML)}</pre>"
 
         return html_message
 
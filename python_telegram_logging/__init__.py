@@ -1,24 +1,91 @@
-"""Python Telegram Logging."""
-from importlib.metadata import version
-
-from .handlers.async_ import AsyncTelegramHandler
-from .handlers.base_telegram import BaseTelegramHandler
-from .handlers.queue import QueuedTelegramHandler
-from .handlers.sync import SyncTelegramHandler
-from .schemes import ParseMode, RetryStrategy
-
-__all__ = [
-    "AsyncTelegramHandler",
-    "BaseTelegramHandler",
-    "QueuedTelegramHandler",
-    "SyncTelegramHandler",
-    "ParseMode",
-    "RetryStrategy",
-]
-
-# Get version from package metadata (which gets it from git tags via hatch-vcs)
-try:
-    __version__ = version("python-telegram-logging")
-except Exception:  # pragma: no cover
-    # package is not installed
-    __version__ = "unknown"
+"""Python Telegram Logging.
+
+Public names are imported lazily on first access, so that importing the package does not
+load ``requests`` and ``aiohttp``: only the HTTP stack of the handler actually used is loaded.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .formatters import HTMLFormatter, MarkdownFormatter, MarkdownV2Formatter, TelegramFormatter, TemplateFormatter
+    from .handlers.async_ import AsyncTelegramHandler
+    from .handlers.base_telegram import BaseTelegramHandler
+    from .handlers.context import ContextBufferingHandler
+    from .handlers.digest import DigestTelegramHandler
+    from .handlers.queue import QueuedTelegramHandler
+    from .handlers.sync import SyncTelegramHandler
+    from .pipeline import (
+        AggregateStage,
+        DedupStage,
+        EnrichStage,
+        Envelope,
+        FilterStage,
+        RenderStage,
+        ScheduleStage,
+        SplitStage,
+        Stage,
+    )
+    from .rate_limiting import AdaptiveRateControl
+    from .schemes import ChatType, CircuitOpenPolicy, ParseMode, RetryStrategy, ShardStrategy, WouldBlockPolicy
+
+# Public name -> module defining it, relative to this package
+_LAZY_IMPORTS: Dict[str, str] = {
+    "AsyncTelegramHandler": ".handlers.async_",
+    "BaseTelegramHandler": ".handlers.base_telegram",
+    "ContextBufferingHandler": ".handlers.context",
+    "DigestTelegramHandler": ".handlers.digest",
+    "QueuedTelegramHandler": ".handlers.queue",
+    "SyncTelegramHandler": ".handlers.sync",
+    "TelegramFormatter": ".formatters",
+    "HTMLFormatter": ".formatters",
+    "MarkdownFormatter": ".formatters",
+    "MarkdownV2Formatter": ".formatters",
+    "TemplateFormatter": ".formatters",
+    "Envelope": ".pipeline",
+    "Stage": ".pipeline",
+    "FilterStage": ".pipeline",
+    "EnrichStage": ".pipeline",
+    "DedupStage": ".pipeline",
+    "RenderStage": ".pipeline",
+    "AggregateStage": ".pipeline",
+    "SplitStage": ".pipeline",
+    "ScheduleStage": ".pipeline",
+    "AdaptiveRateControl": ".rate_limiting",
+    "ChatType": ".schemes",
+    "CircuitOpenPolicy": ".schemes",
+    "ParseMode": ".schemes",
+    "RetryStrategy": ".schemes",
+    "ShardStrategy": ".schemes",
+    "WouldBlockPolicy": ".schemes",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def _get_version() -> str:
+    """Get the version from package metadata (which gets it from git tags via hatch-vcs)."""
+    try:
+        from importlib.metadata import version
+
+        return version("python-telegram-logging")
+    except Exception:  # pragma: no cover
+        # package is not installed
+        return "unknown"
+
+
+def __getattr__(name: str) -> Any:
+    """Import public names on first access."""
+    if name == "__version__":
+        value: Any = _get_version()
+    elif name in _LAZY_IMPORTS:
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache the value so that __getattr__ is only called once per name.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    """List the module attributes, including the lazily imported ones."""
+    return sorted(set(globals()) | set(__all__) | {"__version__"})
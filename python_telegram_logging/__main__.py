@@ -0,0 +1,87 @@
+"""Command-line interface: ``python -m python_telegram_logging replay FILE --chat-id CHAT``."""
+
+import argparse
+import os
+import sys
+from typing import Optional, Sequence
+
+from .formatters import TelegramFormatter
+from .replay import ReplayHandler, ReplayReport, replay
+from .schemes import ParseMode
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the parser of the command-line arguments."""
+    parser = argparse.ArgumentParser(prog="python -m python_telegram_logging")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_replay = commands.add_parser("replay", help="send the records of a JSON-lines file to Telegram")
+    parser_replay.add_argument("path", help='JSON-lines file with one record per line, or "-" for stdin')
+    parser_replay.add_argument(
+        "--token", default=os.environ.get("TELEGRAM_BOT_TOKEN"), help="bot token (default: $TELEGRAM_BOT_TOKEN)"
+    )
+    parser_replay.add_argument(
+        "--chat-id", default=os.environ.get("TELEGRAM_CHAT_ID"), help="default chat (default: $TELEGRAM_CHAT_ID)"
+    )
+    parser_replay.add_argument(
+        "--shard-token", action="append", default=[], help="additional bot token sharing the traffic (repeatable)"
+    )
+    parser_replay.add_argument("--checkpoint", help="file to resume from and to record the progress in")
+    parser_replay.add_argument(
+        "--chunk-size", type=int, default=1000, help="records sent between two checkpoints (default: 1000)"
+    )
+    parser_replay.add_argument(
+        "--batch-size", type=int, default=50, help="records of a chat merged into messages at once (default: 50)"
+    )
+    parser_replay.add_argument(
+        "--parse-mode",
+        choices=[mode.value for mode in ParseMode],
+        default=ParseMode.HTML.value,
+        help="parse mode of the messages (default: HTML)",
+    )
+    parser_replay.add_argument("--quiet", action="store_true", help="do not report the progress after each chunk")
+    return parser
+
+
+def run_replay(args: argparse.Namespace) -> int:
+    """Run the replay command and return the exit status."""
+    parse_mode = ParseMode(args.parse_mode)
+    handler = ReplayHandler(
+        args.token,
+        args.chat_id,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        parse_mode=parse_mode,
+        shard_tokens=args.shard_token,
+    )
+    handler.setFormatter(TelegramFormatter(parse_mode=parse_mode))
+
+    def progress(report: ReplayReport) -> None:
+        print(report.summary(), file=sys.stderr)
+
+    try:
+        report = replay(args.path, handler, checkpoint=args.checkpoint, progress=None if args.quiet else progress)
+    except (OSError, ValueError) as e:
+        print(f"replay: {e}", file=sys.stderr)
+        return 2
+    finally:
+        handler.close()
+
+    print(report.summary())
+    if not report.completed:
+        print("replay: the Telegram API is unreachable; run the command again to resume", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the command line and return the exit status."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.token or not args.chat_id:
+        parser.error("a bot token and a chat ID are required (--token and --chat-id)")
+    return run_replay(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
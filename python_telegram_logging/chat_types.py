@@ -0,0 +1,83 @@
+"""Cache of destination chat types, looked up with the Bot API's getChat method.
+
+Telegram's per-minute limit only applies to groups and channels, so knowing the type of a
+destination chat lets the rate limiter use the right limit profile (see
+``rate_limiting.CHAT_TYPE_LIMITS``). Types are cached with a TTL and can be persisted to a
+JSON file, so that restarts do not repeat the lookups.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from .forking import register_for_fork
+from .schemes import ChatType
+
+
+class ChatTypeCache:
+    """Thread-safe cache of chat types with a TTL and optional JSON persistence."""
+
+    def __init__(
+        self,
+        ttl: float = 86400.0,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize the cache, loading the persisted entries if the file exists.
+
+        Args:
+            ttl: Seconds a looked up chat type stays valid (default: one day)
+            path: Optional JSON file the cache is persisted to
+            clock: Wall clock, since expiry times are persisted
+        """
+        self.ttl = ttl
+        self.path = path
+        self._clock = clock
+        self._entries: Dict[str, Tuple[ChatType, float]] = {}
+        self._lock = threading.Lock()
+        if path is not None:
+            self._load()
+        register_for_fork(self)
+
+    def _after_fork_in_child(self) -> None:
+        """Replace the lock, which a parent thread may have held while forking."""
+        self._lock = threading.Lock()
+
+    def get(self, chat_id: Union[str, int]) -> Optional[ChatType]:
+        """Return the cached type of the chat, or None if it is unknown or expired."""
+        entry = self._entries.get(str(chat_id))
+        if entry is None or entry[1] <= self._clock():
+            return None
+        return entry[0]
+
+    def set(self, chat_id: Union[str, int], chat_type: ChatType) -> None:
+        """Cache the type of the chat for ``ttl`` seconds, persisting the cache if a path is set."""
+        with self._lock:
+            self._entries[str(chat_id)] = (chat_type, self._clock() + self.ttl)
+            if self.path is not None:
+                self._save()
+
+    def _load(self) -> None:
+        """Load the unexpired entries of the cache file; a missing or corrupt file is ignored."""
+        try:
+            with open(self.path, encoding="utf-8") as file:  # type: ignore[arg-type]
+                data = json.load(file)
+            now = self._clock()
+            for chat_id, (chat_type, expires_at) in data.items():
+                if expires_at > now:
+                    self._entries[chat_id] = (ChatType(chat_type), expires_at)
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def _save(self) -> None:
+        """Write the cache file atomically. Must be called with the lock held."""
+        data = {chat_id: [chat_type.value, expires_at] for chat_id, (chat_type, expires_at) in self._entries.items()}
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(temp_path, self.path)  # type: ignore[arg-type]
+        except OSError:
+            pass
@@ -0,0 +1,128 @@
+"""Circuit breaker for the Telegram Bot API.
+
+When the API host is unreachable, every request would wait for its timeout. The circuit
+breaker opens after ``failure_threshold`` consecutive failures; while it is open, handlers
+do not attempt any request. After ``reset_timeout`` seconds it becomes half-open and lets
+a single probe request through, which either closes the circuit again or re-opens it.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from .forking import register_for_fork
+from .schemes import CircuitState
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker with closed, open and half-open states."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures after which the circuit opens
+            reset_timeout: Seconds the circuit stays open before a probe request is allowed
+            clock: Monotonic clock
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+        self._lock = threading.Lock()
+        register_for_fork(self)
+
+    def _after_fork_in_child(self) -> None:
+        """Replace the lock, which a parent thread may have held while forking."""
+        self._lock = threading.Lock()
+        self._probe_started_at = None
+
+    @property
+    def state(self) -> CircuitState:
+        """Return the current state, taking the reset timeout into account."""
+        if self._state == CircuitState.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return whether a request may be attempted now.
+
+        In the half-open state, only one probe request is allowed at a time. A probe that
+        never reports its outcome is replaced after ``reset_timeout`` seconds.
+        """
+        if self._state == CircuitState.CLOSED:
+            return True
+
+        with self._lock:
+            now = self._clock()
+            if self._state == CircuitState.OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = CircuitState.HALF_OPEN
+            elif self._probe_started_at is not None and now - self._probe_started_at < self.reset_timeout:
+                return False
+            self._probe_started_at = now
+            return True
+
+    def record_success(self) -> None:
+        """Record a successful request, closing the circuit."""
+        if self._state == CircuitState.CLOSED and self._failures == 0:
+            return
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit if needed."""
+        with self._lock:
+            self._failures += 1
+            if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = CircuitState.OPEN
+                self._opened_at = self._clock()
+                self._probe_started_at = None
+
+
+_breakers: Dict[Tuple[str, int, float], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def _reinit_registry_lock() -> None:
+    global _breakers_lock
+    _breakers_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_registry_lock)
+
+
+def get_circuit_breaker(host: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+    """Return the process-wide circuit breaker of an API host and settings, creating it if needed.
+
+    Handlers with the same settings share one breaker per host, so that they all stop
+    sending when the host is unreachable. Handlers with other settings get their own
+    breaker, which counts their failures only.
+
+    Args:
+        host: API host, e.g. "api.telegram.org"
+        failure_threshold: Consecutive failures after which the circuit opens
+        reset_timeout: Seconds the circuit stays open before a probe request is allowed
+
+    Returns:
+        The circuit breaker of the host and settings
+    """
+    key = (host, failure_threshold, reset_timeout)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(failure_threshold, reset_timeout)
+        return breaker
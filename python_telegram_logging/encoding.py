@@ -0,0 +1,77 @@
+"""JSON encoding of Bot API request bodies.
+
+Request bodies are encoded to bytes by the handlers and sent as is, instead of passing a
+dict to the HTTP client for encoding. Most of a ``sendMessage`` body is the same for
+every message to a destination, so ``PayloadTemplate`` encodes it once and only splices
+the JSON-encoded text in per message. ``orjson`` is used when installed
+(``pip install python-telegram-logging[fast]``), the standard library otherwise.
+"""
+
+import json
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore[assignment]
+
+# Headers of requests with an encoded JSON body
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a JSON-serializable object to compact UTF-8 JSON."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:  # e.g. lone surrogates in strings, which only json can escape
+            pass
+    try:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    except UnicodeEncodeError:
+        return json.dumps(obj, separators=(",", ":")).encode("ascii")
+
+
+def message_fields(
+    chat_id: Union[str, int],
+    parse_mode: Optional[str],
+    disable_web_page_preview: bool,
+    disable_notification: bool,
+) -> Dict[str, Any]:
+    """Return the ``sendMessage`` fields besides the text.
+
+    Args:
+        chat_id: Destination chat
+        parse_mode: Parse mode value, e.g. "HTML"
+        disable_web_page_preview: Whether to disable link previews
+        disable_notification: Whether to send the message silently
+
+    Returns:
+        The fields, in the order used by all encoders
+    """
+    return {
+        "chat_id": chat_id,
+        "parse_mode": parse_mode,
+        "disable_web_page_preview": disable_web_page_preview,
+        "disable_notification": disable_notification,
+    }
+
+
+class PayloadTemplate:
+    """Request body with constant fields encoded once and the text spliced in per message."""
+
+    __slots__ = ("_prefix",)
+
+    def __init__(self, fields: Dict[str, Any]) -> None:
+        """Encode the constant fields.
+
+        Args:
+            fields: Fields of every request body built from the template
+        """
+        # '{"a":1,"b":2}' -> '{"a":1,"b":2,"text":' so that only the text and "}" are appended.
+        encoded = dumps(fields)
+        self._prefix = (encoded[:-1] + b"," if fields else b"{") + b'"text":'
+
+    def encode(self, text: str) -> bytes:
+        """Return the request body for the text."""
+        return b"".join((self._prefix, dumps(text), b"}"))
@@ -22,3 +22,21 @@ class TelegramAPIError(TelegramLogError):
         self.status_code = status_code
         self.response_text = response_text
         super().__init__(f"Telegram API error {status_code}: {response_text}")
+
+
+class CircuitOpenError(TelegramLogError):
+    """Raised when a record is shed because the Telegram API is unreachable."""
+
+    def __init__(self, host: str):
+        """Initialize the CircuitOpenError exception."""
+        self.host = host
+        super().__init__(f"Circuit breaker for {host} is open, record dropped")
+
+
+class WouldBlockError(TelegramLogError):
+    """Raised when a non-blocking send would have to wait for the rate limits, or the record is shed for it."""
+
+    def __init__(self, wait_time: float):
+        """Initialize the WouldBlockError exception."""
+        self.wait_time = wait_time
+        super().__init__(f"Sending would block for {wait_time:.2f} seconds")
@@ -0,0 +1,52 @@
+"""Guard against feedback loops between the handlers and the loggers of their own I/O.
+
+Sending a record logs records of its own: the HTTP clients log their connections and
+retries, and an ``error_callback`` may log the failure. If those records propagate to a
+Telegram handler, every failed send creates more records to send, which turns an outage
+into a log storm.
+
+Two mechanisms keep the handlers' own records out:
+
+- ``send_path_flag`` is a per-thread flag set while a thread runs a send path (the body of
+  ``SyncTelegramHandler.emit``, the event loop thread of ``AsyncTelegramHandler``, the
+  chat type lookups). Handlers drop every record emitted while it is set, at the cost of
+  one attribute check per record.
+- ``LoggerExclusionFilter``, installed on every handler, drops the records of the HTTP
+  clients' loggers (``TRANSPORT_LOGGERS``), including those logged by other threads, e.g.
+  for another request to the same connection pool.
+"""
+
+import logging
+import threading
+from typing import Sequence
+
+# Loggers of the HTTP clients used by the handlers. The aiohttp server loggers of an
+# application are not excluded.
+TRANSPORT_LOGGERS = ("urllib3", "requests", "charset_normalizer", "aiohttp.client", "aiohttp.internal")
+
+
+class _SendPathFlag(threading.local):
+    """Thread-local flag set while the thread runs a handler's send path."""
+
+    active = False
+
+
+send_path_flag = _SendPathFlag()
+
+
+class LoggerExclusionFilter(logging.Filter):
+    """Filter dropping the records of the given loggers and their children."""
+
+    def __init__(self, names: Sequence[str]) -> None:
+        """Initialize the filter.
+
+        Args:
+            names: Names of the excluded loggers
+        """
+        super().__init__()
+        self.names = frozenset(names)
+        self._prefixes = tuple(f"{name}." for name in self.names)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return whether the record's logger is not excluded."""
+        return not (record.name in self.names or record.name.startswith(self._prefixes))
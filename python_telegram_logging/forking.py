@@ -0,0 +1,36 @@
+"""Fork safety for handlers used by preload-and-fork servers.
+
+A child process created with ``os.fork`` (gunicorn ``--preload``, ``multiprocessing``
+with the fork start method) only inherits the thread that forked: background workers,
+event loops and connection pools of the parent do not exist in the child, and locks held
+by other parent threads stay locked forever.
+
+Objects owning such resources register themselves here and implement
+``_after_fork_in_child()``, which is called in every child right after the fork. It must
+only reset state (replace locks, drop inherited queues and sessions); threads and event
+loops are restarted lazily, when the child first uses the object.
+"""
+
+import os
+import weakref
+from typing import Any
+
+_instances: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+def register_for_fork(instance: Any) -> None:
+    """Call ``instance._after_fork_in_child()`` in child processes after a fork."""
+    _instances.add(instance)
+
+
+def _after_fork_in_child() -> None:
+    """Reset the state of all registered instances in the child process."""
+    for instance in list(_instances):
+        try:
+            instance._after_fork_in_child()
+        except Exception:
+            pass
+
+
+if hasattr(os, "register_at_fork"):  # Not available on Windows, which cannot fork
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,448 @@
+"""Telegram-safe formatters and escaping helpers.
+
+Telegram rejects messages whose markup is malformed, so any dynamic text (log messages,
+logger names, tracebacks) must be escaped for the chosen parse mode. Escapers are compiled
+once per parse mode into a sequence of ``str.replace`` calls, each a fast C-level scan that
+is skipped when the character is absent. This is considerably faster than ``str.translate``,
+which takes a slow path for multi-character replacements.
+"""
+
+import logging
+import string
+import time
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+from .schemes import ParseMode
+from .tracebacks import OptExcInfo, TracebackRenderer
+
+# Name of the record attribute marking a message that is already escaped for the parse mode.
+ESCAPED_ATTR = "telegram_escaped"
+
+
+class Escaper:
+    """Precompiled escaper replacing special characters with their escaped form."""
+
+    __slots__ = ("_replacements",)
+
+    def __init__(self, replacements: Sequence[Tuple[str, str]]) -> None:
+        """Initialize the escaper.
+
+        Args:
+            replacements: (character, replacement) pairs, applied in order
+        """
+        self._replacements = tuple(replacements)
+
+    def __call__(self, text: str) -> str:
+        """Escape the text."""
+        for char, replacement in self._replacements:
+            if char in text:
+                text = text.replace(char, replacement)
+        return text
+
+
+def _backslash_escaper(chars: str) -> Escaper:
+    # The backslash itself must be escaped first so that inserted escapes are not doubled.
+    return Escaper([(char, "\\" + char) for char in sorted(chars, key=lambda char: char != "\\")])
+
+
+_TEXT_ESCAPERS: Dict[ParseMode, Escaper] = {
+    ParseMode.HTML: Escaper([("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")]),
+    ParseMode.MARKDOWN: _backslash_escaper("_*`["),
+    ParseMode.MARKDOWN_V2: _backslash_escaper("\\_*[]()~`>#+-=|{}.!"),
+}
+_CODE_ESCAPERS: Dict[ParseMode, Escaper] = {
+    ParseMode.HTML: _TEXT_ESCAPERS[ParseMode.HTML],
+    # Legacy Markdown has no escaping inside code entities, so backticks are replaced instead.
+    ParseMode.MARKDOWN: Escaper([("`", "'")]),
+    ParseMode.MARKDOWN_V2: _backslash_escaper("\\`"),
+}
+
+
+def escape(text: str, parse_mode: ParseMode) -> str:
+    """Escape text so that Telegram displays it literally.
+
+    Args:
+        text: The text to escape
+        parse_mode: The parse mode the message is sent with
+
+    Returns:
+        The escaped text
+    """
+    return _TEXT_ESCAPERS[parse_mode](text)
+
+
+def escape_code(text: str, parse_mode: ParseMode) -> str:
+    """Escape text placed inside a code or pre block.
+
+    Args:
+        text: The text to escape
+        parse_mode: The parse mode the message is sent with
+
+    Returns:
+        The escaped text
+    """
+    return _CODE_ESCAPERS[parse_mode](text)
+
+
+class Markup(NamedTuple):
+    """Opening and closing tags of the entities used by the formatters."""
+
+    bold_open: str
+    bold_close: str
+    code_open: str
+    code_close: str
+    pre_open: str
+    pre_close: str
+
+
+MARKUP: Dict[ParseMode, Markup] = {
+    ParseMode.HTML: Markup("<b>", "</b>", "<code>", "</code>", "<pre>", "</pre>"),
+    ParseMode.MARKDOWN: Markup("*", "*", "`", "`", "```\n", "\n```"),
+    ParseMode.MARKDOWN_V2: Markup("*", "*", "`", "`", "```\n", "\n```"),
+}
+
+DEFAULT_LEVEL_EMOJIS: Dict[int, str] = {
+    logging.DEBUG: "⚪️",
+    logging.INFO: "🔵",
+    logging.WARNING: "🟡",
+    logging.ERROR: "🔴",
+    logging.CRITICAL: "⛔️",
+}
+
+
+class TelegramFormatter(logging.Formatter):
+    """Formatter that renders records as Telegram messages with all dynamic parts escaped.
+
+    The output looks like (HTML parse mode)::
+
+        🔵 <b>INFO</b> [2024-01-01 12:00:00,000]
+        <code>app.module</code>
+        The log message
+
+        <pre>Traceback ...</pre>
+
+    Tracebacks are compacted by a TracebackRenderer so that they fit into one message.
+    The static parts of the header (emoji, level and logger name) are rendered once per
+    logger and level, and the message is assembled with a single join. Messages of records
+    with a true ``telegram_escaped`` attribute are considered already escaped.
+    """
+
+    parse_mode: ParseMode = ParseMode.HTML
+
+    def __init__(
+        self,
+        parse_mode: Optional[ParseMode] = None,
+        datefmt: Optional[str] = None,
+        level_emojis: Optional[Dict[int, str]] = None,
+        traceback_renderer: Optional[TracebackRenderer] = None,
+    ) -> None:
+        """Initialize the formatter.
+
+        Args:
+            parse_mode: Parse mode to render for (default: the class's parse mode, HTML)
+            datefmt: Date format for the timestamp, as in logging.Formatter
+            level_emojis: Emoji per level number (default: DEFAULT_LEVEL_EMOJIS)
+            traceback_renderer: Renderer for exceptions (default: a compacting TracebackRenderer)
+        """
+        super().__init__(datefmt=datefmt)
+        if parse_mode is not None:
+            self.parse_mode = parse_mode
+        self.level_emojis = dict(DEFAULT_LEVEL_EMOJIS if level_emojis is None else level_emojis)
+        self.traceback_renderer = traceback_renderer or TracebackRenderer()
+
+        self._markup = MARKUP[self.parse_mode]
+        self._escape = _TEXT_ESCAPERS[self.parse_mode]
+        self._escape_code = _CODE_ESCAPERS[self.parse_mode]
+        self._headers: Dict[Tuple[str, int], Tuple[str, str]] = {}
+        self._time_cache: Tuple[int, str] = (-1, "")
+
+    def _get_header(self, record: logging.LogRecord) -> Tuple[str, str]:
+        """Return the cached parts of the header around the timestamp."""
+        key = (record.name, record.levelno)
+        header = self._headers.get(key)
+        if header is None:
+            markup = self._markup
+            emoji = self.level_emojis.get(record.levelno, DEFAULT_LEVEL_EMOJIS[logging.DEBUG])
+            level = self._escape(record.levelname)
+            name = self._escape_code(record.name)
+            header = self._headers[key] = (
+                f"{emoji} {markup.bold_open}{level}{markup.bold_close} {self._escape('[')}",
+                f"{self._escape(']')}\n{markup.code_open}{name}{markup.code_close}\n",
+            )
+        return header
+
+    def format_timestamp(self, record: logging.LogRecord) -> str:
+        """Return the escaped timestamp of the record.
+
+        The date part is cached per second, since strftime has no sub-second resolution.
+        """
+        second = int(record.created)
+        cached_second, date = self._time_cache
+        if second != cached_second:
+            date = time.strftime(self.datefmt or self.default_time_format, self.converter(record.created))
+            date = self._escape(date)
+            self._time_cache = (second, date)
+        if self.datefmt is None and self.default_msec_format:
+            return self.default_msec_format % (date, record.msecs)
+        return date
+
+    def formatException(self, ei: OptExcInfo) -> str:  # noqa: N802
+        """Render the exception compactly with the traceback renderer."""
+        exc_type, exc, tb = ei
+        if exc_type is None or exc is None:
+            return ""
+        return self.traceback_renderer.render((exc_type, exc, tb))
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the record as a Telegram message.
+
+        Unlike logging.Formatter, the compacted traceback is not stored in ``record.exc_text``,
+        so other handlers still get the full traceback.
+        """
+        prefix, name_line = self._get_header(record)
+        parts = [prefix, self.format_timestamp(record), name_line, self.format_message(record)]
+        self._add_traces(record, parts)
+        return "".join(parts)
+
+    def format_message(self, record: logging.LogRecord) -> str:
+        """Return the escaped message of the record."""
+        message = record.getMessage()
+        if not getattr(record, ESCAPED_ATTR, False):
+            message = self._escape(message)
+        return message
+
+    def _add_traces(self, record: logging.LogRecord, parts: List[str]) -> None:
+        """Append the traceback and stack info of the record as pre blocks."""
+        markup = self._markup
+        exc_text = self.formatException(record.exc_info) if record.exc_info else record.exc_text
+        if exc_text:
+            parts += ("\n\n", markup.pre_open, self._escape_code(exc_text), markup.pre_close)
+        if record.stack_info:
+            stack = self.formatStack(record.stack_info)
+            parts += ("\n\n", markup.pre_open, self._escape_code(stack), markup.pre_close)
+
+
+class HTMLFormatter(TelegramFormatter):
+    """Telegram formatter for ParseMode.HTML."""
+
+    parse_mode = ParseMode.HTML
+
+
+class MarkdownFormatter(TelegramFormatter):
+    """Telegram formatter for the legacy ParseMode.MARKDOWN."""
+
+    parse_mode = ParseMode.MARKDOWN
+
+
+class MarkdownV2Formatter(TelegramFormatter):
+    """Telegram formatter for ParseMode.MARKDOWN_V2."""
+
+    parse_mode = ParseMode.MARKDOWN_V2
+
+
+# Attributes every LogRecord has, i.e. not passed through ``extra=``.
+_RECORD_ATTRS: FrozenSet[str] = frozenset(
+    vars(logging.LogRecord("", logging.NOTSET, "", 0, "", (), None)).keys() | {"message", "asctime", "taskName"}
+)
+# Fields that only depend on the logger and level, rendered once per (logger, level).
+_HEADER_FIELDS: FrozenSet[str] = frozenset({"emoji", "levelname", "levelno", "name"})
+_TEMPLATE_STYLES = ("", "bold", "code", "pre")
+
+Accessor = Callable[[logging.LogRecord], str]
+
+
+class TemplateFormatter(TelegramFormatter):
+    """Telegram formatter rendering records with a compiled message template.
+
+    The template uses ``str.format`` syntax with record attributes and ``extra=`` fields as
+    field names, plus these special fields:
+
+    - ``message``: the escaped log message
+    - ``asctime``: the timestamp, formatted with ``datefmt``
+    - ``emoji``: the emoji of the record's level
+    - ``extras``: a key/value block of the ``extra=`` fields, preceded by a blank line
+      (empty if the record has none)
+
+    The format spec of a field selects its entity: ``bold``, ``code`` or ``pre``. Literal
+    text and field values are escaped for the parse mode, so templates are independent of
+    it. Tracebacks and stack info are appended like in TelegramFormatter.
+
+    The template is compiled once into alternating literals and field accessors. Literals
+    and fields that only depend on the logger and level are merged into static strings per
+    (logger, level), so a record is rendered with one accessor call per dynamic field and a
+    single join.
+    """
+
+    default_template = "{emoji} {levelname:bold} [{asctime}]\n{name:code}\n{message}{extras}"
+
+    def __init__(
+        self,
+        template: Optional[str] = None,
+        parse_mode: Optional[ParseMode] = None,
+        datefmt: Optional[str] = None,
+        level_emojis: Optional[Dict[int, str]] = None,
+        traceback_renderer: Optional[TracebackRenderer] = None,
+        extra_fields: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Initialize the formatter.
+
+        Args:
+            template: Message template (default: ``default_template``, like TelegramFormatter's layout)
+            parse_mode: Parse mode to render for (default: the class's parse mode, HTML)
+            datefmt: Date format for the timestamp, as in logging.Formatter
+            level_emojis: Emoji per level number (default: DEFAULT_LEVEL_EMOJIS)
+            traceback_renderer: Renderer for exceptions (default: a compacting TracebackRenderer)
+            extra_fields: Fields rendered by ``{extras}``, in order (default: all ``extra=`` fields)
+
+        Raises:
+            ValueError: If the template is malformed or uses an unknown format spec or a conversion
+        """
+        super().__init__(
+            parse_mode=parse_mode, datefmt=datefmt, level_emojis=level_emojis, traceback_renderer=traceback_renderer
+        )
+        self.template = self.default_template if template is None else template
+        self.extra_fields = None if extra_fields is None else tuple(extra_fields)
+        # (literal, field name, style) triples, the literal preceding the field
+        self._segments = self._compile(self.template)
+        self._plans: Dict[Tuple[str, int], Tuple[str, Tuple[Tuple[Accessor, str], ...]]] = {}
+
+    @staticmethod
+    def _compile(template: str) -> List[Tuple[str, Optional[str], str]]:
+        """Split the template into literals and fields."""
+        segments: List[Tuple[str, Optional[str], str]] = []
+        try:
+            parsed = list(string.Formatter().parse(template))
+        except ValueError as e:
+            raise ValueError(f"[TemplateFormatter] Malformed template {template!r}: {e}") from None
+        for literal, field, spec, conversion in parsed:
+            if field is None:
+                segments.append((literal, None, ""))
+                continue
+            if conversion:
+                raise ValueError(f"[TemplateFormatter] Conversions are not supported: {{{field}!{conversion}}}")
+            if spec not in _TEMPLATE_STYLES:
+                raise ValueError(
+                    f"[TemplateFormatter] Unknown format spec {spec!r}, expected one of {_TEMPLATE_STYLES}"
+                )
+            if field == "":
+                raise ValueError("[TemplateFormatter] Positional fields are not supported")
+            segments.append((literal, field, spec))
+        return segments
+
+    def _entity(self, style: str) -> Tuple[str, str]:
+        """Return the opening and closing tags of the style's entity."""
+        markup = self._markup
+        if style == "bold":
+            return markup.bold_open, markup.bold_close
+        if style == "code":
+            return markup.code_open, markup.code_close
+        if style == "pre":
+            return markup.pre_open, markup.pre_close
+        return "", ""
+
+    def _escape_for(self, style: str) -> Callable[[str], str]:
+        """Return the escaper for text rendered in the style's entity."""
+        return self._escape_code if style in ("code", "pre") else self._escape
+
+    def _header_value(self, field: str, record: logging.LogRecord) -> str:
+        """Return the unescaped value of a field depending only on the logger and level."""
+        if field == "emoji":
+            return self.level_emojis.get(record.levelno, DEFAULT_LEVEL_EMOJIS[logging.DEBUG])
+        return str(getattr(record, field))
+
+    def _accessor(self, field: str, style: str) -> Accessor:
+        """Build the accessor rendering a dynamic field."""
+        escape = self._escape_for(style)
+        opening, closing = self._entity(style)
+
+        if field == "message":
+            if style:
+
+                def render(record: logging.LogRecord) -> str:
+                    message = record.getMessage()
+                    if not getattr(record, ESCAPED_ATTR, False):
+                        message = escape(message)
+                    return f"{opening}{message}{closing}"
+
+                return render
+            return self.format_message
+        if field == "asctime":
+            if style in ("code", "pre"):
+                return lambda record: f"{opening}{escape(self.formatTime(record, self.datefmt))}{closing}"
+            if style:
+                return lambda record: f"{opening}{self.format_timestamp(record)}{closing}"
+            return self.format_timestamp
+        if field == "extras":
+            return self.format_extras
+
+        def render_attribute(record: logging.LogRecord) -> str:
+            value = getattr(record, field, None)
+            return "" if value is None else f"{opening}{escape(str(value))}{closing}"
+
+        return render_attribute
+
+    def _get_plan(self, record: logging.LogRecord) -> Tuple[str, Tuple[Tuple[Accessor, str], ...]]:
+        """Return the compiled (prefix, ((accessor, literal), ...)) plan for the record's logger and level."""
+        key = (record.name, record.levelno)
+        plan = self._plans.get(key)
+        if plan is None:
+            static: List[str] = []
+            pairs: List[Tuple[Accessor, str]] = []
+            prefix: Optional[str] = None
+            accessor: Optional[Accessor] = None
+            for literal, field, style in self._segments:
+                static.append(self._escape(literal))
+                if field is None:
+                    continue
+                if field in _HEADER_FIELDS:
+                    opening, closing = self._entity(style)
+                    static.append(f"{opening}{self._escape_for(style)(self._header_value(field, record))}{closing}")
+                    continue
+                text = "".join(static)
+                static = []
+                if accessor is None:
+                    prefix = text
+                else:
+                    pairs.append((accessor, text))
+                accessor = self._accessor(field, style)
+            text = "".join(static)
+            if accessor is None:
+                prefix = text
+            else:
+                pairs.append((accessor, text))
+            plan = self._plans[key] = (prefix or "", tuple(pairs))
+        return plan
+
+    def get_extras(self, record: logging.LogRecord) -> List[Tuple[str, Any]]:
+        """Return the (name, value) pairs of the record's ``extra=`` fields."""
+        if self.extra_fields is not None:
+            return [(name, getattr(record, name)) for name in self.extra_fields if hasattr(record, name)]
+        return [
+            (name, value)
+            for name, value in vars(record).items()
+            if name not in _RECORD_ATTRS and not name.startswith("telegram_")
+        ]
+
+    def format_extras(self, record: logging.LogRecord) -> str:
+        """Render the ``extra=`` fields as a key/value block preceded by a blank line."""
+        extras = self.get_extras(record)
+        if not extras:
+            return ""
+        markup = self._markup
+        lines = [
+            f"{self._escape(name)}: {markup.code_open}{self._escape_code(str(value))}{markup.code_close}"
+            for name, value in extras
+        ]
+        return "\n\n" + "\n".join(lines)
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the record with the compiled template."""
+        prefix, pairs = self._get_plan(record)
+        parts = [prefix]
+        append = parts.append
+        for accessor, literal in pairs:
+            append(accessor(record))
+            append(literal)
+        if record.exc_info or record.exc_text or record.stack_info:
+            self._add_traces(record, parts)
+        return "".join(parts)
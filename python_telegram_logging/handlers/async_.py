@@ -1,33 +1,47 @@
 """Asynchronous Telegram logging handler implementation."""
 
 import asyncio
+import json
 import logging
 import threading
 import time
-from typing import Any, Optional, Union
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Set, Union
 
 import aiohttp
 
+from ..encoding import JSON_HEADERS, dumps
 from ..exceptions import RateLimitError, TelegramAPIError
-from ..rate_limiting import BaseRateLimiter, TimeProvider
+from ..feedback import LoggerExclusionFilter, send_path_flag
+from ..pipeline import Envelope
+from ..rate_limiting import AdaptiveRateControl, BaseRateLimiter, MonotonicTimeProvider, TimeProvider
 from .base_queue import BaseQueueHandler
 from .base_telegram import BaseTelegramHandler
 
 
-class AsyncTimeProvider(TimeProvider):
-    """Asynchronous time provider using event loop time."""
+class AsyncTimeProvider(MonotonicTimeProvider):
+    """Asynchronous time provider using the event loop's clock.
 
-    def get_time(self) -> float:
-        """Get current time in seconds."""
-        return asyncio.get_event_loop().time()
+    The default event loop clock is time.monotonic(), which is used directly so that
+    the time can also be read from threads without an event loop.
+    """
 
 
 class AsyncRateLimiter(BaseRateLimiter):
     """Rate limiter for asynchronous operations."""
 
-    def __init__(self) -> None:
-        """Initialize the rate limiter."""
-        super().__init__(AsyncTimeProvider())
+    def __init__(
+        self, adaptive: Optional[AdaptiveRateControl] = None, time_provider: Optional[TimeProvider] = None
+    ) -> None:
+        """Initialize the rate limiter.
+
+        Args:
+            adaptive: Optional AIMD control of each chat's rate (default: static limits)
+            time_provider: Object that provides current time, which must follow the clock of the
+                event loop (default: AsyncTimeProvider)
+        """
+        super().__init__(time_provider or AsyncTimeProvider(), adaptive)
         self._lock = asyncio.Lock()
 
     def _acquire_lock(self) -> asyncio.Lock:
@@ -39,37 +53,45 @@ class AsyncRateLimiter(BaseRateLimiter):
     async def _sleep(self, seconds: float) -> None:
         await asyncio.sleep(seconds)
 
-    async def _check_limits(self, chat_id: Union[str, int]) -> None:
-        """Check and enforce rate limits for a chat.
+    def try_acquire(self, chat_id: Union[str, int]) -> float:
+        """Acquire permission to send a message if the limits allow it now, without waiting.
 
-        Args:
-            chat_id: The chat ID to check
-
-        Raises:
-            RateLimitError: If rate limits would be exceeded
+        Must be called from the event loop's thread, where reservations are atomic.
         """
-        current_time = self._time_provider.get_time()
-        state = self._chat_states[chat_id]
+        return self._reserve(chat_id)
+
+    async def acquire(self, chat_id: Union[str, int], slot: Optional[asyncio.Semaphore] = None) -> None:
+        """Acquire permission to send a message.
 
-        # Clean up old messages
-        state.clean_old_messages(current_time)
+        This is an async version of the base class's acquire method. Reservations are
+        synchronous and therefore atomic within the event loop, so no lock is held while
+        waiting and other chats are not blocked by a chat waiting out its rate limit.
 
-        # Check if we would exceed limits
-        would_exceed, wait_time = state.would_exceed_rate_limit(current_time)
-        if would_exceed:
+        Args:
+            chat_id: The target chat ID
+            slot: Optional semaphore limiting concurrent requests, held on return. The message is
+                only reserved once a slot is taken: waiting for a slot after reserving would delay
+                the request past its reservation, so that it could reach the API too soon after
+                the next one. The slot is released while waiting for the rate limit.
+        """
+        while True:
+            if slot is not None:
+                await slot.acquire()
+            wait_time = self._reserve(chat_id)
+            if wait_time <= 0:
+                return
+            if slot is not None:
+                slot.release()
             await self._sleep(wait_time)
-            current_time = self._time_provider.get_time()
 
-        # Record the message
-        state.record_message(current_time)
 
-    async def acquire(self, chat_id: Union[str, int]) -> None:
-        """Acquire permission to send a message.
+@dataclass
+class _Sender:
+    """Records of one destination taken from the queue, and the task sending them."""
 
-        This is an async version of the base class's acquire method.
-        """
-        async with self._lock:
-            await self._check_limits(chat_id)
+    records: Deque[logging.LogRecord] = field(default_factory=deque)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional["asyncio.Future[None]"] = None
 
 
 class AsyncTelegramHandler(BaseTelegramHandler, BaseQueueHandler):
@@ -78,31 +100,127 @@ class AsyncTelegramHandler(BaseTelegramHandler, BaseQueueHandler):
     This handler uses a queue to buffer messages and processes them
     asynchronously in a background task. This ensures compatibility with
     the synchronous logging framework while still allowing async HTTP calls.
+
+    A dispatcher task routes queued records to one sender task per destination chat.
+    Records of the same chat are sent in order, while different chats (and a chat waiting
+    out its rate limit) do not block each other. At most ``max_concurrent_requests`` HTTP
+    requests are in flight at the same time. With a ``batch_size`` above one, each sender
+    runs the records waiting for its destination through the pipeline as one batch.
+
+    Records stay in the queue until a sender can take them: each sender holds at most
+    ``batch_size`` records besides the batch it is sending, so the queue's order (e.g. a
+    ``FairQueue``'s) and the coalescing of status updates apply at send time. Only to reach
+    the records of another chat whose sender is waiting for records does the dispatcher
+    take more records of a busy chat, up to ``max_concurrent_requests * batch_size``.
+    Records of a chat that has no sender yet wait in the queue while every sender is busy.
+    Senders that had no records for ``sender_idle_timeout`` seconds are stopped.
     """
 
-    def __init__(self, *args, queue_size: int = 1000, **kwargs):
-        """Initialize the handler."""
+    def __init__(
+        self,
+        *args: Any,
+        queue_size: int = 1000,
+        queue_class: Optional[Callable[..., Any]] = None,
+        saturation_callback: Optional[Callable[[bool, float], None]] = None,
+        saturation_high: float = 0.8,
+        saturation_low: float = 0.5,
+        max_concurrent_requests: int = 8,
+        batch_size: int = 1,
+        sender_idle_timeout: float = 60.0,
+        **kwargs: Any,
+    ):
+        """Initialize the handler.
+
+        Args:
+            queue_size: Maximum number of records in the queue
+            queue_class: Queue implementation, called with ``maxsize`` (default: queue.Queue)
+            saturation_callback: Optional callback called with (saturated, saturation level) on threshold crossings
+            saturation_high: Saturation level at which the queue is considered saturated
+            saturation_low: Saturation level at which the queue is no longer considered saturated
+            max_concurrent_requests: Maximum number of concurrent HTTP requests (default: 8)
+            batch_size: Maximum number of queued records of a destination run through the pipeline
+                together (default: 1)
+            sender_idle_timeout: Seconds without records after which the sender task of a destination
+                is stopped (default: 60s)
+            *args: Positional arguments of BaseTelegramHandler
+            **kwargs: Keyword arguments of BaseTelegramHandler
+        """
         BaseTelegramHandler.__init__(self, *args, **kwargs)
-        BaseQueueHandler.__init__(self, queue_size=queue_size, level=kwargs.get("level", logging.NOTSET))
+        BaseQueueHandler.__init__(
+            self,
+            queue_size=queue_size,
+            level=kwargs.get("level", logging.NOTSET),
+            queue_class=queue_class,
+            saturation_callback=saturation_callback,
+            saturation_high=saturation_high,
+            saturation_low=saturation_low,
+        )
+        # logging.Handler.__init__ ran again and reset the filters.
+        if self.exclude_loggers:
+            self.addFilter(LoggerExclusionFilter(self.exclude_loggers))
+        self.max_concurrent_requests = max_concurrent_requests
+        self.batch_size = batch_size
+        self.sender_idle_timeout = sender_idle_timeout
         self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._senders: Dict[Union[str, int], _Sender] = {}
+        self._dispatcher_wakeup: Optional[asyncio.Event] = None
+        self._overflow = 0  # Records held by senders beyond their batch_size lookahead
+        self._maintenance_task: Optional["asyncio.Future[None]"] = None
+        self._lookup_tasks: Set["asyncio.Future[None]"] = set()
+        self._dispatched = 0  # Records taken from the queue but not processed yet
         self._task: Optional[asyncio.Task] = None
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._thread: Optional[threading.Thread] = None
 
         # Start the background processing
-        self._start_background_processing()
+        self._start_processing()
 
     def _create_rate_limiter(self) -> Any:
-        return AsyncRateLimiter()
+        return AsyncRateLimiter(self.adaptive_rate_control)
+
+    def handle(self, record: logging.LogRecord) -> Union[bool, logging.LogRecord]:  # type: ignore[override]
+        """Filter the record and put it into the queue without taking the handler lock."""
+        return BaseQueueHandler.handle(self, record)
 
     def emit(self, record: logging.LogRecord) -> None:
         """Emit a record."""
         return BaseQueueHandler.emit(self, record)
 
-    def _start_background_processing(self) -> None:
+    def _get_telegram_handler(self) -> BaseTelegramHandler:
+        return self
+
+    _sends_chats_concurrently = True
+
+    def _dispatched_count(self) -> int:
+        return self._dispatched
+
+    def _after_fork_in_child(self) -> None:
+        """Reset the state inherited from the parent process after a fork.
+
+        The event loop, its thread and the aiohttp session only exist in the parent. They are
+        dropped without being closed, and a new loop is started on the first record.
+        """
+        BaseTelegramHandler._after_fork_in_child(self)
+        BaseQueueHandler._after_fork_in_child(self)
+        self._session = None
+        self._semaphore = None
+        self._senders = {}
+        self._dispatcher_wakeup = None
+        self._overflow = 0
+        self._maintenance_task = None
+        self._lookup_tasks = set()
+        self._dispatched = 0
+        self._task = None
+        self._loop = None
+        self._thread = None
+
+    def _start_processing(self) -> None:
         """Start the background processing thread and async task."""
 
         def run_event_loop():
+            # Everything the loop thread does is part of the send path.
+            send_path_flag.active = True
             try:
                 self._loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(self._loop)
@@ -126,8 +244,20 @@ class AsyncTelegramHandler(BaseTelegramHandler, BaseQueueHandler):
         self._thread.start()
 
     async def _process_queue(self) -> None:
-        """Process records from the queue."""
+        """Dispatch records from the queue to the sender task of their destination, as senders need them."""
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        self._dispatcher_wakeup = asyncio.Event()
+        if self.prewarm_connections or self.keepalive_interval:
+            self._maintenance_task = asyncio.ensure_future(self._maintain_connections())
         while not self._shutdown.is_set() or not self.queue.empty():
+            if not self._may_dispatch():
+                self._dispatcher_wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._dispatcher_wakeup.wait(), 0.1)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
             try:
                 record = self.queue.get_nowait()
             except:  # Queue.Empty and others  # noqa: E722
@@ -136,46 +266,312 @@ class AsyncTelegramHandler(BaseTelegramHandler, BaseQueueHandler):
                 await asyncio.sleep(0.1)
                 continue
 
+            chat_id = self.get_chat_id(record)
+            sender = self._senders.get(chat_id)
+            if sender is None:
+                sender = self._senders[chat_id] = _Sender()
+                sender.task = asyncio.ensure_future(self._send_records(chat_id, sender))
+            if len(sender.records) >= self.batch_size:
+                self._overflow += 1
+            sender.records.append(record)
+            self._dispatched += 1
+            sender.wakeup.set()
+
+    def _may_dispatch(self) -> bool:
+        """Return whether a sender may need the next record of the queue.
+
+        Records are taken while every sender has room for them. Once a busy sender holds
+        more than ``batch_size`` records, more are only taken while another sender is
+        waiting for records, up to ``max_concurrent_requests * batch_size`` extra records.
+        """
+        if self._overflow == 0:
+            return True
+        if self._overflow >= self.max_concurrent_requests * self.batch_size:
+            return False
+        return any(not sender.records for sender in self._senders.values())
+
+    async def _take_batch(self, chat_id: Union[str, int], sender: _Sender) -> Optional[List[logging.LogRecord]]:
+        """Wait for records of the destination and take up to ``batch_size`` of them.
+
+        Status updates superseded by a newer update are skipped here, right before sending.
+
+        Returns:
+            The records to send, or None if the sender was idle for ``sender_idle_timeout`` and stopped
+        """
+        records = sender.records
+        while not records:
+            sender.wakeup.clear()
             try:
-                await self._async_emit(record)
+                await asyncio.wait_for(sender.wakeup.wait(), self.sender_idle_timeout)
+            except asyncio.TimeoutError:
+                if not records:
+                    del self._senders[chat_id]
+                    return None
+
+        count = min(len(records), self.batch_size)
+        self._overflow -= max(len(records) - self.batch_size, 0) - max(len(records) - count - self.batch_size, 0)
+        batch = []
+        for _ in range(count):
+            record = records.popleft()
+            if self._is_superseded(record):
+                self._record_done(record)
+            else:
+                batch.append(record)
+        self._dispatcher_wakeup.set()  # type: ignore[union-attr]
+        return batch
+
+    async def _send_records(self, chat_id: Union[str, int], sender: _Sender) -> None:
+        """Send the records of a single destination in order, up to ``batch_size`` at a time."""
+        while True:
+            batch = await self._take_batch(chat_id, sender)
+            if batch is None:
+                return
+            if not batch:
+                continue
+            try:
+                if not self._circuit_breaker.allow_request():
+                    for record in batch:
+                        self.park_record(record)
+                    continue
+                if await self._async_emit_batch(batch) and self._parked:
+                    # The API is reachable again: queue the parked records behind the current ones.
+                    for parked_record in self.take_parked_records():
+                        self._enqueue(parked_record)
             except Exception:
-                self.handleError(record)  # type: ignore
+                self.handleError(batch[0])  # type: ignore
             finally:
-                self.queue.task_done()
-
-    async def _async_emit(self, record: logging.LogRecord) -> None:
-        """Actually emit the record asynchronously."""
-        if self._session is None:
-            self._session = aiohttp.ClientSession()
+                for record in batch:
+                    self._record_done(record)
+
+    def _record_done(self, record: logging.LogRecord) -> None:
+        """Mark a record taken from the queue as processed."""
+        self._dispatched -= 1
+        self._untrack_record(record)
+        self.queue.task_done()
+        if self.saturation_callback is not None:
+            self._check_saturation()
+
+    async def _async_post(
+        self,
+        method: str,
+        payload: Union[Dict[str, Any], bytes],
+        read_result: bool = False,
+        token: Optional[str] = None,
+        chat_id: Optional[Union[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """Send one API request, respecting rate limits.
+
+        When sharding across several bot tokens, a request rejected with 429 takes its
+        token out of rotation and is retried once with another available token.
 
-        messages = self.format_message(record)
-        for message in messages:
-            payload = self.prepare_payload(message)
+        Args:
+            method: API method name, e.g. "sendMessage"
+            payload: Request payload, or its encoded JSON body (see ``encode_payload``)
+            read_result: Whether to decode and return the ``result`` of the response
+            token: Bot token to use (default: chosen by the token pool)
+            chat_id: Destination chat, required if the payload is already encoded
+
+        Returns:
+            The ``result`` object of the response if read_result is set, else an empty dict
+        """
+        if isinstance(payload, bytes):
+            if chat_id is None:
+                raise ValueError("[AsyncTelegramHandler] chat_id is required with an encoded payload.")
+            body = payload
+        else:
+            body = dumps(payload)
+            chat_id = payload["chat_id"]
+        retried = False
+        while True:
+            current_token = token or self.choose_token(chat_id)
+            blocked_for = self._token_pool.blocked_for(current_token)
+            if blocked_for > 0:
+                await asyncio.sleep(blocked_for)
+            limiter_key = self.limiter_key(current_token, chat_id)
+            self.attach_bot_limit(limiter_key, current_token)
+            semaphore = self._ensure_semaphore()
+            await self._rate_limiter.acquire(limiter_key, semaphore)
 
-            await self._rate_limiter.acquire(self.chat_id)
             try:
-                async with self._session.post(self._base_url, json=payload) as response:
-                    if response.status == 429:  # Too Many Requests
-                        error_data = await response.json()
-                        retry_after = error_data.get("retry_after", 1)
-                        raise RateLimitError(retry_after)
-
-                    if not response.ok:
-                        error_text = await response.text()
-                        raise TelegramAPIError(status_code=response.status, response_text=error_text)
-            except Exception as e:
-                if not isinstance(e, asyncio.CancelledError):
+                self.note_request()
+                async with self._ensure_session().post(
+                    self.method_url(current_token, method), data=body, headers=JSON_HEADERS
+                ) as response:
+                    self.record_response_status(response.status)
+                    if response.ok and not read_result:
+                        self._rate_limiter.record_success(limiter_key)
+                        return {}
+
+                    text = await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self._circuit_breaker.record_failure()
+                raise
+            finally:
+                semaphore.release()
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = None
+            try:
+                result = self.check_response(response.status, data, text)
+            except RateLimitError as e:
+                self._rate_limiter.record_rate_limited(limiter_key, e.retry_after)
+                self._token_pool.penalize(current_token, e.retry_after)
+                if token is not None or retried or not self._token_pool.available():
+                    raise
+                retried = True
+                continue
+            self._rate_limiter.record_success(limiter_key)
+            return result
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        """Return the aiohttp session, creating it on first use."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            )
+        return self._session
+
+    def _ensure_semaphore(self) -> asyncio.Semaphore:
+        """Return the semaphore limiting concurrent requests, creating it on first use."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        return self._semaphore
+
+    async def _async_ping(self, token: str) -> None:
+        """Send a getMe request, which opens or keeps alive a connection and verifies the token."""
+        self.note_request()
+        async with self._ensure_semaphore(), self._ensure_session().post(self.method_url(token, "getMe")) as response:
+            text = await response.text()
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        self.check_response(response.status, data, text)
+
+    async def _maintain_connections(self) -> None:
+        """Pre-warm the connections, then send keep-alive requests while idle.
+
+        Pre-warming failures are reported to the error callback. Keep-alive failures are
+        ignored: a connection dropped by the server is reopened by the next request.
+        """
+        if self.prewarm_connections:
+            for token in self._token_pool.tokens:
+                try:
+                    await self._async_ping(token)
+                except asyncio.CancelledError:
                     raise
+                except Exception as e:
+                    self.handle_error(e)
+
+        while self.keepalive_interval and not self._shutdown.is_set():
+            delay = self.keepalive_delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            try:
+                await self._async_ping(self.token)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+
+    async def _async_lookup_chat_type(self, chat_id: Union[str, int]) -> None:
+        """Look up the type of the chat with getChat, concurrently with the sends."""
+        result = None
+        try:
+            async with self._ensure_semaphore(), self._ensure_session().post(
+                self.method_url(self.token, "getChat"), data=dumps({"chat_id": chat_id}), headers=JSON_HEADERS
+            ) as response:
+                text = await response.text()
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = None
+            result = self.check_response(response.status, data, text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.handle_error(e)
+        finally:
+            self.finish_chat_type_lookup(chat_id, result)
+
+    async def _async_send_status(self, status_key: Hashable, message: str, chat_id: Union[str, int]) -> None:
+        """Edit the message sent for the status key, or send a new one."""
+        status_message = self.get_status_message(status_key, chat_id)
+        if status_message is not None:
+            message_id, token = status_message
+            try:
+                await self._async_post(
+                    "editMessageText", self.prepare_edit_payload(message, message_id, chat_id), token=token
+                )
+                return
+            except TelegramAPIError as e:
+                if self.is_not_modified_error(e):
+                    return
+                # The message was most likely deleted: fall back to sending a new one.
+                self.remember_status_message(status_key, None, chat_id)
+
+        # Edits must be made by the bot that sent the message, so the token is fixed here.
+        token = self.choose_token(chat_id)
+        result = await self._async_post(
+            "sendMessage", self.prepare_payload(message, chat_id), read_result=True, token=token
+        )
+        sent_id = result.get("message_id")
+        if sent_id is not None:
+            self.remember_status_message(status_key, (sent_id, token), chat_id)
+
+    async def _async_send_envelope(self, envelope: Envelope) -> None:
+        """Send the message of an envelope, or edit the status message of its status key."""
+        chat_id, text = envelope.chat_id, envelope.text or ""
+        if self.needs_chat_type_lookup(chat_id):
+            lookup = asyncio.ensure_future(self._async_lookup_chat_type(chat_id))
+            self._lookup_tasks.add(lookup)
+            lookup.add_done_callback(self._lookup_tasks.discard)
+
+        if envelope.status_key is not None:
+            await self._async_send_status(envelope.status_key, text, chat_id)
+            return
+        await self._async_post("sendMessage", self.encode_payload(text, chat_id), chat_id=chat_id)
+
+    async def _async_emit_batch(self, records: List[logging.LogRecord]) -> bool:
+        """Run the records through the pipeline and send the messages, parking them if the API is unreachable.
+
+        Parts of a message that were already sent are not parked. After any other error,
+        the remaining parts of the failed message are skipped.
+
+        Returns:
+            False if records were parked because of a connection failure or timeout
+        """
+        self._ensure_session()
+        envelopes = self.pipeline.run(records, self)
+        failed: Set[int] = set()
+        sent: Set[int] = set()
+        for index, envelope in enumerate(envelopes):
+            if not envelope.text or id(envelope.record) in failed:
+                continue
+            try:
+                await self._async_send_envelope(envelope)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.park_unsent([unsent for unsent in envelopes[index:] if unsent.text], sent)
+                self.handle_error(e)
+                return False
+            except Exception:
+                failed.add(id(envelope.record))
+                self.handleError(envelope.record)
+            else:
+                sent.add(id(envelope.record))
+        return True
 
     def close(self) -> None:
         """Close the handler and clean up resources synchronously."""
         if not self._shutdown.is_set():
             self._shutdown.set()
 
-            # Wait for the queue to be empty
+            # Wait for the queue and the senders to be empty
             timeout = 5  # seconds
-            start_time = time.time()
-            while not self.queue.empty() and time.time() - start_time < timeout:
+            start_time = time.monotonic()
+            while self.queue_depth() > 0 and time.monotonic() - start_time < timeout:
                 time.sleep(0.1)
 
             if self._loop is not None:
@@ -4,6 +4,10 @@ import logging
 import queue
 import threading
 from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+
+from ..feedback import send_path_flag
+from ..forking import register_for_fork
 
 
 class BaseQueueHandler(logging.Handler, ABC):
@@ -11,37 +15,255 @@ class BaseQueueHandler(logging.Handler, ABC):
 
     This class provides the core queue functionality that can be used by both
     sync and async implementations.
+
+    Status updates (see ``BaseTelegramHandler.enable_status_updates``) are coalesced:
+    if several updates for the same status key are queued, only the latest one is sent.
+
+    Applications can watch the backpressure of the pipeline through ``queue_depth``,
+    ``saturation`` and ``estimated_drain_time``, or get notified through
+    ``saturation_callback`` when the queue becomes saturated and when it recovers. Records
+    the consumer has taken from the queue but not sent yet (``_dispatched_count``) count
+    against ``queue_size`` like queued ones, and the drain time is estimated per destination.
+
+    The handlers are fork-safe: in a child process, the queue and locks inherited from the
+    parent are replaced, and the background processing is restarted on the first record.
     """
 
     def __init__(
         self,
         queue_size: int = 1000,
         level: int = logging.NOTSET,
+        queue_class: Optional[Callable[..., Any]] = None,
+        saturation_callback: Optional[Callable[[bool, float], None]] = None,
+        saturation_high: float = 0.8,
+        saturation_low: float = 0.5,
     ) -> None:
         """Initialize the handler.
 
         Args:
             queue_size: Maximum number of records in the queue
             level: Minimum logging level
+            queue_class: Queue implementation, called with ``maxsize`` (default: queue.Queue).
+                Use ``queues.RingBufferQueue`` to reduce contention between many logging threads.
+            saturation_callback: Optional callback called with (saturated, saturation level) when the
+                saturation rises to saturation_high or falls back to saturation_low
+            saturation_high: Saturation level at which the queue is considered saturated
+            saturation_low: Saturation level at which the queue is no longer considered saturated
         """
         super().__init__(level)
-        self.queue = queue.Queue(maxsize=queue_size)
+        self._queue_factory = queue_class or queue.Queue
+        self.queue = self._queue_factory(maxsize=queue_size)
+        self.queue_size = queue_size
+        self.saturation_callback = saturation_callback
+        self.saturation_high = saturation_high
+        self.saturation_low = saturation_low
+        self._saturated = False
+        self._saturation_lock = threading.Lock()
         self._shutdown = threading.Event()
+        self._pending_status: Dict[Hashable, int] = {}
+        self._pending_status_lock = threading.Lock()
+        # Destination chat -> number of records waiting for it, queued or dispatched
+        self._pending_chats: Dict[Union[str, int], int] = {}
+        self._pending_chats_lock = threading.Lock()
+        self._restart_needed = False
+        self._restart_lock = threading.Lock()
+        register_for_fork(self)
+
+    # Like logging.Handler.handle since Python 3.12, the record returned by a filter is passed on.
+    def handle(self, record: logging.LogRecord) -> Union[bool, logging.LogRecord]:  # type: ignore[override]
+        """Filter the record and put it into the queue.
+
+        Unlike logging.Handler.handle, the handler lock is not taken: the queue is
+        thread-safe by itself, so producers only contend on the queue.
+        """
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
 
     def emit(self, record: logging.LogRecord) -> None:
         """Put the record into the queue.
 
         If the queue is full, the record will be dropped and handleError will be called.
-        If the handler is shutting down, the record will be dropped silently.
+        If the handler is shutting down, or the record was logged by a handler's send path,
+        the record will be dropped silently.
         """
+        if send_path_flag.active:
+            return
+        self._enqueue(record)
+
+    def _enqueue(self, record: logging.LogRecord) -> None:
+        """Put the record into the queue, also from a send path (e.g. to re-queue parked records)."""
         if self._shutdown.is_set():
             return
+        if self._restart_needed:
+            self._restart_processing()
+
+        if 0 < self.queue_size <= self.queue_depth():
+            # Records taken from the queue but not sent yet still take their place.
+            self.handleError(record)
+            return
+
+        status_key = self._coalesce_key(record)
+        if status_key is not None:
+            self._update_pending_status(status_key, 1)
+        chat_id = self._get_telegram_handler().get_chat_id(record)
+        self._update_pending_chat(chat_id, 1)
 
         try:
             self.queue.put_nowait(record)
         except queue.Full:
+            if status_key is not None:
+                self._update_pending_status(status_key, -1)
+            self._update_pending_chat(chat_id, -1)
             self.handleError(record)
 
+        if self.saturation_callback is not None:
+            self._check_saturation()
+
+    def queue_depth(self) -> int:
+        """Return the number of records waiting to be sent, in the queue or dispatched by the consumer."""
+        return self.queue.qsize() + self._dispatched_count()
+
+    def saturation(self) -> float:
+        """Return the queue fill level, from 0.0 (empty) to 1.0 (full)."""
+        if self.queue_size <= 0:
+            return 0.0
+        return min(self.queue_depth() / self.queue_size, 1.0)
+
+    def _dispatched_count(self) -> int:
+        """Return the number of records taken from the queue by the consumer but not sent yet."""
+        return 0
+
+    def is_saturated(self) -> bool:
+        """Return whether the queue is saturated, with hysteresis between the two thresholds."""
+        return self._saturated
+
+    @abstractmethod
+    def _get_telegram_handler(self) -> Any:
+        """Return the BaseTelegramHandler that sends the queued records."""
+
+    def estimated_drain_time(self) -> float:
+        """Estimate the seconds needed to send all waiting records.
+
+        The estimate assumes one message per record and uses the rate limiter's state of
+        each destination chat. Handlers that send to several chats concurrently
+        (``_sends_chats_concurrently``) take the longest of the chats' drain times, others
+        their sum.
+        """
+        handler = self._get_telegram_handler()
+        with self._pending_chats_lock:
+            pending = list(self._pending_chats.items())
+        times: List[float] = [handler.estimate_drain_time(count, chat_id) for chat_id, count in pending]
+        if self._sends_chats_concurrently:
+            return max(times, default=0.0)
+        return sum(times)
+
+    # Whether the records of different chats are sent concurrently
+    _sends_chats_concurrently = False
+
+    def _update_pending_chat(self, chat_id: Union[str, int], delta: int) -> None:
+        """Adjust the number of records waiting for the chat.
+
+        Records put into the queue directly were never counted, so counts do not go below zero.
+        """
+        with self._pending_chats_lock:
+            count = self._pending_chats.get(chat_id, 0) + delta
+            if count > 0:
+                self._pending_chats[chat_id] = count
+            else:
+                self._pending_chats.pop(chat_id, None)
+
+    def _untrack_record(self, record: logging.LogRecord) -> None:
+        """Stop counting a record in the drain time estimate, once it is no longer waiting."""
+        self._update_pending_chat(self._get_telegram_handler().get_chat_id(record), -1)
+
+    def _check_saturation(self) -> None:
+        """Call the saturation callback if the saturation crossed a threshold."""
+        level = self.saturation()
+        if self._saturated:
+            if level > self.saturation_low:
+                return
+        elif level < self.saturation_high:
+            return
+
+        with self._saturation_lock:
+            # Re-check under the lock, so that each crossing is reported exactly once.
+            if self._saturated == (level >= self.saturation_high):
+                return
+            self._saturated = not self._saturated
+            saturated = self._saturated
+
+        try:
+            self.saturation_callback(saturated, level)  # type: ignore[misc]
+        except Exception:
+            pass
+
+    def _coalesce_key(self, record: logging.LogRecord) -> Optional[Hashable]:
+        """Return the (chat, status key) under which queued updates are coalesced, or None for regular records.
+
+        Status messages are per chat, so the same status key in two chats is two statuses.
+        """
+        handler = self._get_telegram_handler()
+        status_key = handler.get_status_key(record)
+        if status_key is None:
+            return None
+        return (handler.get_chat_id(record), status_key)
+
+    def _update_pending_status(self, status_key: Hashable, delta: int) -> int:
+        """Adjust the number of queued updates for the (chat, status key) and return the new count."""
+        with self._pending_status_lock:
+            count = self._pending_status.get(status_key, 0) + delta
+            if count > 0:
+                self._pending_status[status_key] = count
+            else:
+                self._pending_status.pop(status_key, None)
+        return count
+
+    def _is_superseded(self, record: logging.LogRecord) -> bool:
+        """Return whether a newer update for the same status key and chat is queued behind the record.
+
+        Must be called exactly once for every record taken from the queue.
+        """
+        status_key = self._coalesce_key(record)
+        if status_key is None:
+            return False
+        return self._update_pending_status(status_key, -1) > 0
+
+    def _after_fork_in_child(self) -> None:
+        """Reset the queue state inherited from the parent process after a fork.
+
+        Queued records belong to the parent, which sends them. The background processing
+        does not exist in the child and is restarted on the first record.
+        """
+        self.createLock()
+        self.queue = self._queue_factory(maxsize=self.queue_size)
+        self._saturated = False
+        self._saturation_lock = threading.Lock()
+        self._pending_status = {}
+        self._pending_status_lock = threading.Lock()
+        self._pending_chats = {}
+        self._pending_chats_lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        shutdown = self._shutdown.is_set()
+        self._shutdown = threading.Event()
+        if shutdown:
+            self._shutdown.set()
+        self._restart_needed = not shutdown
+
+    def _restart_processing(self) -> None:
+        """Start the background processing in a forked child, once."""
+        with self._restart_lock:
+            if self._restart_needed:
+                self._start_processing()
+                self._restart_needed = False
+
+    @abstractmethod
+    def _start_processing(self) -> None:
+        """Start the background processing of the queue."""
+
     @abstractmethod
     def _process_queue(self) -> None:
         """Process records from the queue.
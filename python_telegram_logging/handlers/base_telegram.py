@@ -1,12 +1,41 @@
 """Base classes and interfaces for Telegram logging handlers."""
 
+import copy
 import logging
+import math
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict, List, Optional, Union
+from collections import OrderedDict, deque
+from typing import Any, Callable, Collection, Dict, Hashable, List, Optional, Sequence, Tuple, Union, cast
 
-from ..schemes import ParseMode, RetryStrategy
+from ..chat_types import ChatTypeCache
+from ..circuit_breaker import get_circuit_breaker
+from ..encoding import PayloadTemplate, message_fields
+from ..exceptions import CircuitOpenError, RateLimitError, TelegramAPIError
+from ..feedback import TRANSPORT_LOGGERS, LoggerExclusionFilter
+from ..forking import register_for_fork
+from ..formatters import ESCAPED_ATTR
+from ..pipeline import UNSENT_TEXT_ATTR, Envelope, Pipeline, Stage
+from ..rate_limiting import BOT_RATE_LIMIT, CHAT_TYPE_LIMITS, AdaptiveRateControl, BotRateLimit, get_bot_rate_limit
+from ..schemes import TELEGRAM_MESSAGE_LIMIT, ChatType, CircuitOpenPolicy, ParseMode, RetryStrategy, ShardStrategy
+from ..sharding import TokenPool
+from ..truncation import bound_record, bound_values, truncate_markup
 
-TELEGRAM_MESSAGE_LIMIT = 4096
+TELEGRAM_API_HOST = "api.telegram.org"
+# Maximum number of destinations whose encoded payload templates are kept
+PAYLOAD_TEMPLATE_CACHE_SIZE = 256
+# Seconds before a failed getChat lookup of a chat is retried
+CHAT_TYPE_RETRY_INTERVAL = 300.0
+
+# Name of the record attribute (set via ``extra=``) that marks a record as a status update.
+STATUS_KEY_ATTR = "telegram_status_key"
+# Name of the record attribute (set via ``extra=``) that overrides the destination chat.
+CHAT_ID_ATTR = "telegram_chat_id"
+
+StatusCacheKey = Tuple[Union[str, int], Hashable]
+# (message ID, token of the bot that sent the message)
+StatusMessage = Tuple[int, str]
 
 
 class BaseTelegramHandler(logging.Handler, ABC):
@@ -22,6 +51,53 @@ class BaseTelegramHandler(logging.Handler, ABC):
 
     For group chats, messages are limited to 20 per minute across all bots
     in the group. The handler will automatically wait if this limit is reached.
+    Since the chat type is unknown by default, the group limits apply to every chat. With
+    ``detect_chat_types``, each destination's type is looked up once with ``getChat`` in the
+    background and the limit profile of its type is used (see ``CHAT_TYPE_LIMITS``).
+
+    Records logged with ``extra={"telegram_chat_id": chat_id}`` are sent to that chat
+    instead of the handler's ``chat_id``.
+
+    With ``enable_status_updates``, records logged with ``extra={"telegram_status_key": key}``
+    edit the message previously sent for the same key (via ``editMessageText``) instead of
+    posting a new one. Message IDs are kept in a bounded LRU cache of ``status_cache_size`` keys.
+
+    With ``shard_tokens``, messages are spread across several bots (``token`` plus the shard
+    tokens) to multiply the throughput to a destination. Each (token, chat) pair has its own
+    rate limiting state, and a token that receives a 429 response is taken out of rotation
+    until its ``retry_after`` has passed. Messages keep their order, since each destination
+    is still sent to sequentially.
+
+    Besides the per-chat limits, each bot may send ``bot_rate_limit`` messages per second
+    across all its chats. This global limit is shared by every handler of the bot in the
+    process, and is checked together with the chat's limits when a message is reserved.
+
+    Requests time out after ``connect_timeout``/``read_timeout`` seconds. Connection failures
+    and 5xx responses are counted by a circuit breaker shared by all handlers of the API
+    host with the same ``circuit_failure_threshold`` and ``circuit_reset_timeout``; handlers
+    with other settings get their own breaker. While the circuit is open, no request is
+    attempted: records are parked in a bounded buffer (``CircuitOpenPolicy.PARK``) and sent
+    once a probe request succeeds, or dropped (``CircuitOpenPolicy.SHED``).
+
+    Records logged by the handlers' own I/O are dropped instead of being sent, so that a
+    failing send cannot feed itself (see the ``feedback`` module).
+
+    Records are turned into messages by the handler's ``pipeline`` of stages (see the
+    ``pipeline`` module); by default, they are formatted and split at the length limit.
+
+    Connections to the API are kept open between requests. With ``prewarm_connections``, they
+    are opened (and every bot token verified with ``getMe``) in the background when the
+    handler starts, so that the first record does not pay for DNS, TCP and TLS setup. With
+    ``keepalive_interval``, a ``getMe`` request is sent whenever no request was made for that
+    many seconds, so that idle connections are not closed by the server; connections that
+    were closed anyway are reopened by the next request.
+
+    With ``max_message_length`` and ``max_message_parts``, a record is rendered into at most
+    that many characters and sent in at most that many messages, so that one giant log call
+    cannot hold up the other records for hours. Longer texts keep their beginning and end around a marker such as
+    ``… 49M characters omitted …`` (see the ``truncation`` module). The message, its
+    string arguments and the traceback are truncated before they are escaped, so that the
+    markup of the message stays valid.
     """
 
     def __init__(
@@ -34,6 +110,26 @@ class BaseTelegramHandler(logging.Handler, ABC):
         retry_strategy: RetryStrategy = RetryStrategy.EXPONENTIAL_BACKOFF,
         error_callback: Optional[Callable[[Exception], None]] = None,
         level: int = logging.NOTSET,
+        enable_status_updates: bool = False,
+        status_cache_size: int = 128,
+        shard_tokens: Optional[Sequence[str]] = None,
+        shard_strategy: ShardStrategy = ShardStrategy.ROUND_ROBIN,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 10.0,
+        circuit_failure_threshold: int = 5,
+        circuit_reset_timeout: float = 30.0,
+        circuit_open_policy: CircuitOpenPolicy = CircuitOpenPolicy.PARK,
+        max_parked_records: int = 1000,
+        adaptive_rate_control: Optional[AdaptiveRateControl] = None,
+        detect_chat_types: bool = False,
+        chat_type_cache: Optional[ChatTypeCache] = None,
+        exclude_loggers: Optional[Sequence[str]] = TRANSPORT_LOGGERS,
+        pipeline: Optional[Sequence[Stage]] = None,
+        prewarm_connections: bool = False,
+        keepalive_interval: Optional[float] = None,
+        bot_rate_limit: Optional[float] = BOT_RATE_LIMIT,
+        max_message_length: Optional[int] = None,
+        max_message_parts: Optional[int] = None,
     ) -> None:
         """Initialize the handler.
 
@@ -46,6 +142,33 @@ class BaseTelegramHandler(logging.Handler, ABC):
             retry_strategy: Strategy for handling rate limits (default: EXPONENTIAL_BACKOFF)
             error_callback: Optional callback for handling errors
             level: Minimum logging level (default: NOTSET)
+            enable_status_updates: Whether records with a status key edit their previous message (default: False)
+            status_cache_size: Maximum number of status keys whose message IDs are remembered (default: 128)
+            shard_tokens: Additional bot tokens sharing the traffic with token (default: None)
+            shard_strategy: How to pick the token of each request when sharding (default: ROUND_ROBIN)
+            connect_timeout: Seconds to wait for a connection to the API (default: 5s)
+            read_timeout: Seconds to wait for the API's response (default: 10s)
+            circuit_failure_threshold: Consecutive failures after which the circuit opens (default: 5)
+            circuit_reset_timeout: Seconds before a probe request is sent to an open circuit (default: 30s)
+            circuit_open_policy: What to do with records while the circuit is open (default: PARK)
+            max_parked_records: Maximum number of parked records; the oldest are dropped first (default: 1000)
+            adaptive_rate_control: Adapt each chat's rate to the API's 429 responses (default: static limits)
+            detect_chat_types: Look up each destination's chat type with getChat in the background and use
+                its limit profile (default: False, group limits for every chat)
+            chat_type_cache: Cache of looked up chat types, e.g. shared or persisted (default: in-memory, 1 day TTL)
+            exclude_loggers: Loggers whose records are never sent, with their children
+                (default: the HTTP clients' loggers, ``feedback.TRANSPORT_LOGGERS``)
+            pipeline: Stages turning records into messages (default: ``pipeline.default_stages()``)
+            prewarm_connections: Open the connections and verify the tokens with getMe in the background
+                when the handler starts (default: False)
+            keepalive_interval: Seconds without requests after which a getMe request keeps the
+                connections warm (default: None, no keep-alive requests)
+            bot_rate_limit: Messages per second of each bot across all chats, shared by all handlers of the
+                bot in the process at the lowest rate they ask for (default: 30, ``rate_limiting.BOT_RATE_LIMIT``;
+                None disables the limit)
+            max_message_length: Maximum length of a rendered record; longer ones lose their middle
+                (default: None, no limit)
+            max_message_parts: Maximum number of messages a record is split into (default: None, no limit)
 
         TODO: add implementation for retry_strategy.
         """
@@ -57,16 +180,72 @@ class BaseTelegramHandler(logging.Handler, ABC):
         self.disable_notification = disable_notification
         self.retry_strategy = retry_strategy
         self.error_callback = error_callback
+        self.enable_status_updates = enable_status_updates
+        self.status_cache_size = status_cache_size
+
+        self._token_pool = TokenPool([token, *(shard_tokens or ())], strategy=shard_strategy)
+        self._api_urls = {shard: f"https://api.telegram.org/bot{shard}" for shard in self._token_pool.tokens}
+        self.bot_rate_limit = bot_rate_limit
+        self._bot_limits: Dict[str, BotRateLimit] = (
+            {shard: get_bot_rate_limit(shard, bot_rate_limit) for shard in self._token_pool.tokens}
+            if bot_rate_limit
+            else {}
+        )
+        self._api_url = self._api_urls[token]
+        self._base_url = f"{self._api_url}/sendMessage"
+        self._edit_url = f"{self._api_url}/editMessageText"
+        self.adaptive_rate_control = adaptive_rate_control
+        self._rate_limiter = self._create_rate_limiter()
+        self._status_messages: "OrderedDict[StatusCacheKey, StatusMessage]" = OrderedDict()
+        # (chat ID, parse mode, preview and notification flags) -> template, so that changing the
+        # public attributes after construction takes effect
+        self._payload_templates: Dict[Tuple[Union[str, int], ParseMode, bool, bool], PayloadTemplate] = {}
+
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.circuit_open_policy = circuit_open_policy
+        self._circuit_breaker = get_circuit_breaker(
+            TELEGRAM_API_HOST, failure_threshold=circuit_failure_threshold, reset_timeout=circuit_reset_timeout
+        )
+        self._parked: "deque[logging.LogRecord]" = deque(maxlen=max_parked_records)
+
+        self.detect_chat_types = detect_chat_types
+        self._chat_type_cache = chat_type_cache or ChatTypeCache()
+        self._applied_chat_types: Dict[Union[str, int], ChatType] = {}
+        # Chat ID -> time before which no new lookup is started (inf while one is running)
+        self._chat_type_lookups: Dict[Union[str, int], float] = {}
+        self._chat_type_lock = threading.Lock()
 
-        self._base_url = f"https://api.telegram.org/bot{token}/sendMessage"
+        self.pipeline = Pipeline.from_stages(pipeline)
+        self.prewarm_connections = prewarm_connections
+        self.keepalive_interval = keepalive_interval
+        self._last_request_time = float("-inf")
+        self.max_message_length = max_message_length
+        self.max_message_parts = max_message_parts
+        self.exclude_loggers = tuple(exclude_loggers or ())
+        if self.exclude_loggers:
+            self.addFilter(LoggerExclusionFilter(self.exclude_loggers))
+        register_for_fork(self)
+
+    def _after_fork_in_child(self) -> None:
+        """Reset the state inherited from the parent process after a fork.
+
+        The rate limiter and locks are replaced, since parent threads may have held them
+        while forking. Parked records and running chat type lookups belong to the parent.
+        """
+        self.createLock()
         self._rate_limiter = self._create_rate_limiter()
+        self._parked.clear()
+        self._applied_chat_types = {}
+        self._chat_type_lookups = {}
+        self._chat_type_lock = threading.Lock()
 
     @abstractmethod
     def _create_rate_limiter(self) -> Any:
         """Create and return a rate limiter instance.
 
         This method should be implemented by subclasses to return either
-        a SyncRateLimiter or AsyncRateLimiter instance.
+        a SyncRateLimiter or AsyncRateLimiter instance, using ``adaptive_rate_control``.
         """
 
     @abstractmethod
@@ -83,11 +262,75 @@ class BaseTelegramHandler(logging.Handler, ABC):
         Subclasses must implement this method.
         """
 
+    def handle_batch(self, records: Sequence[logging.LogRecord]) -> None:
+        """Handle several records; handlers that send synchronously run them through the pipeline as one batch."""
+        for record in records:
+            self.handle(record)
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the record, truncating it to ``max_message_length`` characters.
+
+        The message, or its string arguments, are first truncated to half of the limit, which
+        leaves the other half to the header and traceback; an already escaped message is
+        not. If the result is still too long, e.g. because of an argument of another type or
+        a giant traceback, the rendered message, traceback and stack are truncated as raw
+        text and formatted again, so that the markup stays intact. The formatted text itself
+        is only cut if that is not enough, at a point that keeps its markup valid (see
+        ``truncation.truncate_markup``).
+        """
+        limit = self.max_message_length
+        if limit is None:
+            return super().format(record)
+
+        if not getattr(record, ESCAPED_ATTR, False):
+            record = bound_record(record, limit // 2)
+        text = super().format(record)
+        if len(text) > limit:
+            text = self._format_bounded(record)
+        return truncate_markup(text, limit, self.parse_mode)
+
+    def _format_bounded(self, record: logging.LogRecord) -> str:
+        """Format a copy of the record whose raw message and traces are truncated before escaping.
+
+        The parts share the room left by the header fairly. Escaping makes the formatted
+        parts longer than the raw ones, so their budget is scaled down by the measured
+        ratio, up to three times. An already escaped message is left as is.
+        """
+        limit = cast(int, self.max_message_length)
+        bounded = copy.copy(record)
+        names = []
+        if not getattr(record, ESCAPED_ATTR, False):
+            bounded.msg, bounded.args = record.getMessage(), None
+            names.append("msg")
+        if record.exc_info:
+            bounded.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            bounded.exc_info = None
+        if bounded.exc_text:
+            names.append("exc_text")
+        if bounded.stack_info:
+            names.append("stack_info")
+
+        raw = [getattr(bounded, name) for name in names]
+        for name in names:
+            setattr(bounded, name, "")
+        overhead = len(super().format(bounded))
+        budget = available = limit - overhead
+        text = ""
+        for _ in range(3):
+            values = bound_values(raw, max(budget, 0)) or raw
+            for name, value in zip(names, values):
+                setattr(bounded, name, value)
+            text = super().format(bounded)
+            if len(text) <= limit or budget <= 0:
+                break
+            budget = budget * available // (len(text) - overhead)
+        return text
+
     def format_message(self, record: logging.LogRecord) -> List[str]:
         """Format the log record into a list of Telegram messages.
 
         If the message is longer than Telegram's limit (TELEGRAM_MESSAGE_LIMIT characters),
-        it will be split into multiple messages.
+        it will be split into at most ``max_message_parts`` messages.
 
         Args:
             record: The log record to format
@@ -96,24 +339,300 @@ class BaseTelegramHandler(logging.Handler, ABC):
             List of message strings, each under TELEGRAM_MESSAGE_LIMIT characters
         """
         message = self.format(record)
+        if self.max_message_parts is not None:
+            message = truncate_markup(message, self.max_message_parts * TELEGRAM_MESSAGE_LIMIT, self.parse_mode)
         return [message[i : i + TELEGRAM_MESSAGE_LIMIT] for i in range(0, len(message), TELEGRAM_MESSAGE_LIMIT)]
 
-    def prepare_payload(self, message: str) -> Dict[str, Any]:
+    def method_url(self, token: str, method: str) -> str:
+        """Return the URL of a Bot API method for the token."""
+        return f"{self._api_urls[token]}/{method}"
+
+    def note_request(self) -> None:
+        """Record that a request to the API is being made, for the keep-alive schedule."""
+        self._last_request_time = time.monotonic()
+
+    def keepalive_delay(self) -> float:
+        """Return the seconds until a keep-alive request is due (0 if it is due, inf if disabled)."""
+        if not self.keepalive_interval:
+            return math.inf
+        return max(self._last_request_time + self.keepalive_interval - time.monotonic(), 0.0)
+
+    def limiter_key(self, token: str, chat_id: Union[str, int]) -> Hashable:
+        """Return the rate limiter key of a (token, chat) pair.
+
+        Without sharding, the key is the chat ID itself.
+        """
+        if len(self._token_pool) == 1:
+            return chat_id
+        return (token, chat_id)
+
+    def attach_bot_limit(self, limiter_key: Hashable, token: str) -> None:
+        """Make the messages of a (token, chat) limiter key count against the bot's global limit."""
+        bot_limit = self._bot_limits.get(token)
+        if bot_limit is not None:
+            self._rate_limiter.set_bot_limit(limiter_key, bot_limit)
+
+    def choose_token(self, chat_id: Union[str, int]) -> str:
+        """Pick the bot token for the next request to the chat."""
+        return self._token_pool.choose(
+            lambda token: self._rate_limiter.estimate_drain_time(self.limiter_key(token, chat_id), 1)
+        )
+
+    def estimate_drain_time(self, count: int, chat_id: Optional[Union[str, int]] = None) -> float:
+        """Estimate how long sending ``count`` more messages to the chat takes.
+
+        With sharding, the messages are assumed to be spread evenly across the tokens.
+        """
+        chat_id = self.chat_id if chat_id is None else chat_id
+        per_token = math.ceil(count / len(self._token_pool))
+        drain_times: List[float] = [
+            self._token_pool.blocked_for(token)
+            + self._rate_limiter.estimate_drain_time(self.limiter_key(token, chat_id), per_token)
+            for token in self._token_pool.tokens
+        ]
+        return max(drain_times)
+
+    def needs_chat_type_lookup(self, chat_id: Union[str, int]) -> bool:
+        """Apply the cached type of the chat, and return whether a getChat lookup should be started.
+
+        Returns True at most once per chat until the lookup finishes, so callers start exactly
+        one lookup. Never blocks on the network.
+        """
+        if not self.detect_chat_types:
+            return False
+        chat_type = self._chat_type_cache.get(chat_id)
+        if chat_type is not None:
+            if self._applied_chat_types.get(chat_id) != chat_type:
+                self.apply_chat_type(chat_id, chat_type)
+            return False
+
+        with self._chat_type_lock:
+            if self._chat_type_lookups.get(chat_id, 0.0) > time.monotonic():
+                return False
+            self._chat_type_lookups[chat_id] = math.inf
+        return True
+
+    def apply_chat_type(self, chat_id: Union[str, int], chat_type: ChatType) -> None:
+        """Use the limit profile of the chat type for every (token, chat) pair of the chat."""
+        profile = CHAT_TYPE_LIMITS[chat_type]
+        for token in self._token_pool.tokens:
+            self._rate_limiter.set_limits(self.limiter_key(token, chat_id), profile)
+        self._applied_chat_types[chat_id] = chat_type
+
+    def finish_chat_type_lookup(self, chat_id: Union[str, int], result: Optional[Dict[str, Any]]) -> None:
+        """Cache and apply the chat type of a getChat result, or schedule a retry if the lookup failed.
+
+        Args:
+            chat_id: The looked up chat ID
+            result: The ``result`` of the getChat response, or None if the lookup failed
+        """
+        try:
+            chat_type = ChatType(result["type"]) if result is not None else None
+        except (KeyError, ValueError):
+            chat_type = None
+
+        with self._chat_type_lock:
+            if chat_type is None:
+                self._chat_type_lookups[chat_id] = time.monotonic() + CHAT_TYPE_RETRY_INTERVAL
+                return
+            self._chat_type_lookups.pop(chat_id, None)
+        self._chat_type_cache.set(chat_id, chat_type)
+        self.apply_chat_type(chat_id, chat_type)
+
+    def get_chat_id(self, record: logging.LogRecord) -> Union[str, int]:
+        """Return the destination chat of the record."""
+        return getattr(record, CHAT_ID_ATTR, self.chat_id)
+
+    def prepare_payload(self, message: str, chat_id: Optional[Union[str, int]] = None) -> Dict[str, Any]:
         """Prepare the payload for the Telegram API request.
 
         Args:
             message: The message text to send
+            chat_id: Destination chat (default: the handler's chat)
 
         Returns:
             Dictionary containing the API request payload
         """
-        return {
-            "chat_id": self.chat_id,
-            "text": message,
-            "parse_mode": self.parse_mode.value,
-            "disable_web_page_preview": self.disable_web_page_preview,
-            "disable_notification": self.disable_notification,
-        }
+        payload = message_fields(
+            self.chat_id if chat_id is None else chat_id,
+            self.parse_mode.value,
+            self.disable_web_page_preview,
+            self.disable_notification,
+        )
+        payload["text"] = message
+        return payload
+
+    def encode_payload(self, message: str, chat_id: Optional[Union[str, int]] = None) -> bytes:
+        """Return the encoded ``sendMessage`` request body, equivalent to ``prepare_payload``.
+
+        The fields other than the text are encoded once per destination and combination of
+        ``parse_mode``, ``disable_web_page_preview`` and ``disable_notification``.
+
+        Args:
+            message: The message text to send
+            chat_id: Destination chat (default: the handler's chat)
+
+        Returns:
+            The JSON request body
+        """
+        chat_id = self.chat_id if chat_id is None else chat_id
+        key = (chat_id, self.parse_mode, self.disable_web_page_preview, self.disable_notification)
+        template = self._payload_templates.get(key)
+        if template is None:
+            if len(self._payload_templates) >= PAYLOAD_TEMPLATE_CACHE_SIZE:
+                self._payload_templates.clear()
+            template = self._payload_templates[key] = PayloadTemplate(
+                message_fields(chat_id, self.parse_mode.value, self.disable_web_page_preview, self.disable_notification)
+            )
+        return template.encode(message)
+
+    def prepare_edit_payload(
+        self, message: str, message_id: int, chat_id: Optional[Union[str, int]] = None
+    ) -> Dict[str, Any]:
+        """Prepare the payload for an ``editMessageText`` request.
+
+        Args:
+            message: The new message text
+            message_id: ID of the message to edit
+            chat_id: Chat of the message (default: the handler's chat)
+
+        Returns:
+            Dictionary containing the API request payload
+        """
+        payload = self.prepare_payload(message, chat_id)
+        payload["message_id"] = message_id
+        del payload["disable_notification"]
+        return payload
+
+    def get_status_key(self, record: logging.LogRecord) -> Optional[Hashable]:
+        """Return the status key of the record, or None if it is a regular record."""
+        if not self.enable_status_updates:
+            return None
+        return getattr(record, STATUS_KEY_ATTR, None)
+
+    def get_status_message(
+        self, status_key: Hashable, chat_id: Optional[Union[str, int]] = None
+    ) -> Optional[StatusMessage]:
+        """Return the (message ID, bot token) last sent for the status key, if it is still cached."""
+        cache_key = (self.chat_id if chat_id is None else chat_id, status_key)
+        message = self._status_messages.get(cache_key)
+        if message is not None:
+            self._status_messages.move_to_end(cache_key)
+        return message
+
+    def remember_status_message(
+        self,
+        status_key: Hashable,
+        message: Optional[StatusMessage],
+        chat_id: Optional[Union[str, int]] = None,
+    ) -> None:
+        """Remember (or forget, if message is None) the (message ID, bot token) sent for the status key."""
+        cache_key = (self.chat_id if chat_id is None else chat_id, status_key)
+        if message is None or message[0] is None:
+            self._status_messages.pop(cache_key, None)
+            return
+        self._status_messages[cache_key] = message
+        self._status_messages.move_to_end(cache_key)
+        while len(self._status_messages) > self.status_cache_size:
+            self._status_messages.popitem(last=False)
+
+    @staticmethod
+    def check_response(status: int, data: Any, text: str) -> Dict[str, Any]:
+        """Check a Telegram API response and return its ``result`` field.
+
+        Args:
+            status: HTTP status code
+            data: Decoded JSON body, or None if the body is not JSON
+            text: Raw response body
+
+        Returns:
+            The ``result`` object of a successful response (empty if absent)
+
+        Raises:
+            RateLimitError: If Telegram responded with 429 Too Many Requests
+            TelegramAPIError: If Telegram responded with any other error
+        """
+        if status == 429:
+            retry_after = 1
+            if isinstance(data, dict):
+                retry_after = data.get("parameters", {}).get("retry_after", data.get("retry_after", 1))
+            raise RateLimitError(retry_after)
+
+        if status >= 400:
+            raise TelegramAPIError(status_code=status, response_text=text)
+
+        if isinstance(data, dict) and isinstance(data.get("result"), dict):
+            result: Dict[str, Any] = data["result"]
+            return result
+        return {}
+
+    @staticmethod
+    def is_not_modified_error(error: Exception) -> bool:
+        """Return whether the error means an edit did not change the message."""
+        return isinstance(error, TelegramAPIError) and "message is not modified" in error.response_text
+
+    def park_record(self, record: logging.LogRecord) -> None:
+        """Keep a record that could not be sent because the API is unreachable.
+
+        With CircuitOpenPolicy.SHED, the record is dropped and reported to the error callback.
+        """
+        if self.circuit_open_policy == CircuitOpenPolicy.PARK:
+            self._parked.append(record)
+        else:
+            self.handle_error(CircuitOpenError(TELEGRAM_API_HOST))
+
+    def park_unsent(
+        self,
+        envelopes: Sequence[Envelope],
+        sent: Collection[int] = (),
+        parked: Optional[Dict[int, logging.LogRecord]] = None,
+    ) -> None:
+        """Park the records of messages that could not be sent, each record once.
+
+        A record some of whose parts were already sent is parked as a copy holding only the
+        text of its unsent parts (see ``pipeline.UNSENT_TEXT_ATTR``), so that no part is sent
+        twice when it is replayed.
+
+        Args:
+            envelopes: Unsent envelopes, in order
+            sent: Ids of the records with parts already sent
+            parked: Records parked so far by their ids, to park the later parts of a message
+                in another call (default: a new dict)
+        """
+        if parked is None:
+            parked = {}
+        for envelope in envelopes:
+            key = id(envelope.record)
+            if key not in sent:
+                for record in envelope.records:
+                    if id(record) not in parked:
+                        parked[id(record)] = record
+                        self.park_record(record)
+                continue
+
+            remainder = parked.get(key)
+            if remainder is None:
+                remainder = parked[key] = copy.copy(envelope.record)
+                setattr(remainder, UNSENT_TEXT_ATTR, "")
+                self.park_record(remainder)
+            setattr(remainder, UNSENT_TEXT_ATTR, getattr(remainder, UNSENT_TEXT_ATTR) + (envelope.text or ""))
+
+    def take_parked_records(self) -> List[logging.LogRecord]:
+        """Remove and return the parked records, oldest first."""
+        records = []
+        while self._parked:
+            try:
+                records.append(self._parked.popleft())
+            except IndexError:
+                break
+        return records
+
+    def record_response_status(self, status: int) -> None:
+        """Report the HTTP status of a response to the circuit breaker."""
+        if status >= 500:
+            self._circuit_breaker.record_failure()
+        else:
+            self._circuit_breaker.record_success()
 
     def handle_error(self, error: Exception) -> None:
         """Handle any errors that occur while sending messages.
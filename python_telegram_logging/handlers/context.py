@@ -0,0 +1,213 @@
+"""Context buffering handler that only sends the context of failing requests."""
+
+import contextlib
+import copy
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Deque, Hashable, Iterator, List, Optional, Union
+
+from ..feedback import LoggerExclusionFilter, send_path_flag
+from ..forking import register_for_fork
+from ..formatters import ESCAPED_ATTR, escape
+from .base_telegram import TELEGRAM_MESSAGE_LIMIT, BaseTelegramHandler
+
+# Default context variable holding the key of the current request or task (None outside of one).
+log_context: ContextVar[Optional[Hashable]] = ContextVar("telegram_log_context", default=None)
+
+# Format of the buffered records in the sent message
+DEFAULT_CONTEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class ContextBufferingHandler(logging.Handler):
+    """A handler that buffers the records of each request and sends them only if it fails.
+
+    Records below ``flush_level`` logged within a context (a request or task, identified by
+    the value of ``context_var``) are kept in a ring buffer of the last ``capacity``
+    records of that context. When a record at ``flush_level`` or above is logged, it is
+    sent through the wrapped handler as one message, followed by the buffered records of
+    its context, which are then discarded. When the context ends without such a record,
+    its buffer is discarded without sending anything.
+
+    Like ``logging.handlers.MemoryHandler``, but with one buffer per context and a global
+    cap of ``max_records`` buffered records: beyond it, the oldest records of the least
+    recently active context are dropped first.
+
+    Outside of any context, records at ``flush_level`` or above are sent on their own and
+    the others are dropped.
+
+    Example::
+
+        handler = ContextBufferingHandler(SyncTelegramHandler(token, chat_id), capacity=50)
+
+        def handle_request(request):
+            with handler.context(request.id):
+                logger.info("Handling %s", request.path)  # Buffered
+                ...
+                logger.error("Payment failed")  # Sent with the buffered records
+    """
+
+    def __init__(
+        self,
+        handler: BaseTelegramHandler,
+        capacity: int = 50,
+        max_records: int = 10000,
+        flush_level: int = logging.ERROR,
+        context_var: "ContextVar[Optional[Hashable]]" = log_context,
+        level: int = logging.NOTSET,
+    ) -> None:
+        """Initialize the handler.
+
+        Args:
+            handler: The underlying Telegram handler used to send the messages
+            capacity: Maximum number of buffered records per context
+            max_records: Maximum number of buffered records across all contexts
+            flush_level: Level of the records that send their context (default: ERROR)
+            context_var: Context variable holding the current context key (default: ``log_context``)
+            level: Minimum logging level of the buffered records
+        """
+        super().__init__(level)
+        self.handler = handler
+        self.capacity = capacity
+        self.max_records = max_records
+        self.flush_level = flush_level
+        self.context_var = context_var
+        self.setFormatter(logging.Formatter(DEFAULT_CONTEXT_FORMAT))
+        exclude_loggers = getattr(handler, "exclude_loggers", ())
+        if exclude_loggers:
+            self.addFilter(LoggerExclusionFilter(exclude_loggers))
+
+        # Context key -> buffered records, least recently active first
+        self._buffers: "OrderedDict[Hashable, Deque[logging.LogRecord]]" = OrderedDict()
+        self._buffered = 0
+        self._buffer_lock = threading.Lock()
+        register_for_fork(self)
+
+    def _after_fork_in_child(self) -> None:
+        """Drop the buffers of the parent's requests and replace the locks after a fork."""
+        self.createLock()
+        self._buffers = OrderedDict()
+        self._buffered = 0
+        self._buffer_lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def context(self, key: Hashable) -> Iterator[None]:
+        """Run the block in the context with the given key, then discard its buffered records."""
+        token = self.context_var.set(key)
+        try:
+            yield
+        finally:
+            self.context_var.reset(token)
+            self.end_context(key)
+
+    def end_context(self, key: Hashable) -> None:
+        """Discard the buffered records of a context that ended without an error."""
+        with self._buffer_lock:
+            self._discard(key)
+
+    def buffered_records(self) -> int:
+        """Return the number of buffered records across all contexts."""
+        return self._buffered
+
+    def handle(self, record: logging.LogRecord) -> Union[bool, logging.LogRecord]:  # type: ignore[override]
+        """Filter and emit the record without taking the handler lock.
+
+        Buffers have their own lock, which is not held while an error is sent.
+        """
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Buffer the record, or send it with its context if it is at ``flush_level`` or above."""
+        if send_path_flag.active:
+            return
+        try:
+            key = self.context_var.get()
+            if record.levelno < self.flush_level:
+                if key is not None:
+                    self._buffer(key, record)
+                return
+
+            context: List[logging.LogRecord] = []
+            if key is not None:
+                with self._buffer_lock:
+                    context = list(self._discard(key))
+            self.handler.handle(self.combine(record, context) if context else record)
+        except Exception:
+            self.handleError(record)
+
+    def _buffer(self, key: Hashable, record: logging.LogRecord) -> None:
+        """Add the record to the buffer of its context, enforcing the global cap."""
+        with self._buffer_lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = deque(maxlen=self.capacity)
+            else:
+                self._buffers.move_to_end(key)
+            if len(buffer) == buffer.maxlen:
+                self._buffered -= 1
+            buffer.append(record)
+            self._buffered += 1
+
+            while self._buffered > self.max_records:
+                oldest_key, oldest = next(iter(self._buffers.items()))
+                oldest.popleft()
+                self._buffered -= 1
+                if not oldest:
+                    del self._buffers[oldest_key]
+
+    def _discard(self, key: Hashable) -> "Deque[logging.LogRecord]":
+        """Remove and return the buffer of a context. Must be called with the buffer lock held."""
+        buffer = self._buffers.pop(key, None)
+        if buffer is None:
+            return deque()
+        self._buffered -= len(buffer)
+        return buffer
+
+    def combine(self, record: logging.LogRecord, context: List[logging.LogRecord]) -> logging.LogRecord:
+        """Return a copy of the error record whose message is followed by its context.
+
+        The buffered records are rendered with this handler's formatter and escaped for the
+        wrapped handler's parse mode. If they do not fit into one message with the error,
+        the oldest ones are left out.
+
+        Args:
+            record: The record that triggered the flush
+            context: Buffered records of its context, oldest first
+
+        Returns:
+            The record to send, marked as already escaped
+        """
+        parse_mode = self.handler.parse_mode
+        message = escape(record.getMessage(), parse_mode)
+        budget = TELEGRAM_MESSAGE_LIMIT - len(message) - 200  # Leaves room for the header
+        lines: List[str] = []
+        for buffered in reversed(context):
+            line = escape(self.format(buffered), parse_mode)
+            if len(line) + 1 > budget:
+                break
+            lines.append(line)
+            budget -= len(line) + 1
+        lines.reverse()
+
+        title = f"Context ({len(lines)} records"
+        if len(lines) < len(context):
+            title += f", {len(context) - len(lines)} earlier omitted"
+        combined = copy.copy(record)
+        combined.msg = "\n".join([message, "", escape(title + "):", parse_mode), *lines])
+        combined.args = None
+        setattr(combined, ESCAPED_ATTR, True)
+        return combined
+
+    def close(self) -> None:
+        """Discard the buffers and close the wrapped handler."""
+        with self._buffer_lock:
+            self._buffers.clear()
+            self._buffered = 0
+        self.handler.close()
+        super().close()
@@ -0,0 +1,225 @@
+"""Digest handler that aggregates log records into periodic summary messages."""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from ..feedback import LoggerExclusionFilter, send_path_flag
+from ..forking import register_for_fork
+from ..formatters import ESCAPED_ATTR, escape
+from .base_telegram import TELEGRAM_MESSAGE_LIMIT, BaseTelegramHandler
+
+DigestKey = Tuple[str, int, str]
+
+
+@dataclass
+class DigestEntry:
+    """Aggregated statistics for a single (logger, level, message template) combination."""
+
+    count: int = 0
+    first_seen: float = 0.0
+    last_seen: float = 0.0
+    exemplars: List[str] = field(default_factory=list)
+
+
+class DigestTelegramHandler(logging.Handler):
+    """A handler that aggregates log records and periodically sends a digest to Telegram.
+
+    Instead of sending every record, the handler counts records per logger, level and
+    message template (the unformatted ``record.msg``) and sends one summary message per
+    interval through the wrapped handler. Memory usage is bounded by ``max_templates``:
+    records with new templates beyond the cap are only counted, in a single "other" line.
+    Templates are cut to ``max_template_length`` characters, so messages built with
+    f-strings, whose template is the whole message, are grouped by their beginning.
+
+    In a forked child process, the digest collected by the parent is discarded and the
+    worker thread is restarted on the first record.
+    """
+
+    def __init__(
+        self,
+        handler: BaseTelegramHandler,
+        interval: float = 300.0,
+        max_templates: int = 100,
+        max_exemplars: int = 3,
+        max_exemplar_length: int = 200,
+        max_template_length: int = 200,
+        level: int = logging.NOTSET,
+    ) -> None:
+        """Initialize the handler.
+
+        Args:
+            handler: The underlying Telegram handler used to send the digest
+            interval: Seconds between digests (default: 300s)
+            max_templates: Maximum number of distinct templates tracked per interval
+            max_exemplars: Maximum number of example messages kept per template
+            max_exemplar_length: Maximum length of a single example message
+            max_template_length: Maximum length of a stored template; longer ones are grouped by their beginning
+            level: Minimum logging level
+        """
+        super().__init__(level)
+        self.handler = handler
+        self.interval = interval
+        self.max_templates = max_templates
+        self.max_exemplars = max_exemplars
+        self.max_exemplar_length = max_exemplar_length
+        self.max_template_length = max_template_length
+        exclude_loggers = getattr(handler, "exclude_loggers", ())
+        if exclude_loggers:
+            self.addFilter(LoggerExclusionFilter(exclude_loggers))
+
+        self._entries: Dict[DigestKey, DigestEntry] = {}
+        self._overflow_count = 0
+        self._max_level = logging.NOTSET
+
+        self._shutdown = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._restart_needed = False
+        self._start_worker()
+        register_for_fork(self)
+
+    def _start_worker(self) -> None:
+        """Start the thread that sends digests periodically."""
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _after_fork_in_child(self) -> None:
+        """Reset the state inherited from the parent process after a fork."""
+        self.createLock()
+        self._entries = {}
+        self._overflow_count = 0
+        self._max_level = logging.NOTSET
+        shutdown = self._shutdown.is_set()
+        self._shutdown = threading.Event()
+        if shutdown:
+            self._shutdown.set()
+        self._worker = None
+        self._restart_needed = not shutdown
+
+    def _run(self) -> None:
+        """Send a digest every interval until the handler is closed."""
+        while not self._shutdown.wait(self.interval):
+            self.flush()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Add the record to the current digest, unless it was logged by a handler's send path."""
+        if send_path_flag.active:
+            return
+        if self._restart_needed:
+            self._restart_needed = False
+            self._start_worker()
+        try:
+            key = (record.name, record.levelno, str(record.msg)[: self.max_template_length])
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_templates:
+                    self._overflow_count += 1
+                    self._max_level = max(self._max_level, record.levelno)
+                    return
+                entry = self._entries[key] = DigestEntry(first_seen=record.created)
+
+            entry.count += 1
+            entry.last_seen = record.created
+            if len(entry.exemplars) < self.max_exemplars:
+                entry.exemplars.append(record.getMessage()[: self.max_exemplar_length])
+            self._max_level = max(self._max_level, record.levelno)
+        except Exception:
+            self.handleError(record)
+
+    def _swap(self) -> Tuple[Dict[DigestKey, DigestEntry], int, int]:
+        """Take the current digest state and reset it."""
+        self.acquire()
+        try:
+            entries, overflow_count, max_level = self._entries, self._overflow_count, self._max_level
+            self._entries = {}
+            self._overflow_count = 0
+            self._max_level = logging.NOTSET
+        finally:
+            self.release()
+        return entries, overflow_count, max_level
+
+    def _escape(self, text: str) -> str:
+        return escape(text, self.handler.parse_mode)
+
+    @staticmethod
+    def _format_time(timestamp: float) -> str:
+        return time.strftime("%H:%M:%S", time.localtime(timestamp))
+
+    def render(self, entries: Dict[DigestKey, DigestEntry], overflow_count: int) -> str:
+        """Render the digest text.
+
+        Templates are listed by descending count. Lines that would not fit into a single
+        Telegram message are summarized in a trailing line. The text is escaped for the
+        wrapped handler's parse mode.
+
+        Args:
+            entries: Aggregated entries keyed by (logger, level, template)
+            overflow_count: Number of records that did not fit into the template cap
+
+        Returns:
+            The digest text
+        """
+        total = sum(entry.count for entry in entries.values()) + overflow_count
+        first = min((entry.first_seen for entry in entries.values()), default=time.time())
+        last = max((entry.last_seen for entry in entries.values()), default=first)
+        header = (
+            f"📊 Digest: {total} records, {len(entries)} templates "
+            f"({self._format_time(first)} – {self._format_time(last)})"
+        )
+
+        lines = [self._escape(header)]
+        size = len(lines[0])
+        budget = TELEGRAM_MESSAGE_LIMIT - 100
+        ordered = sorted(entries.items(), key=lambda item: item[1].count, reverse=True)
+        for index, ((name, levelno, template), entry) in enumerate(ordered):
+            block = [
+                f"\n[{logging.getLevelName(levelno)}] {name} × {entry.count} "
+                f"({self._format_time(entry.first_seen)} – {self._format_time(entry.last_seen)})",
+                f"  {template}",
+            ]
+            block.extend(f"  • {exemplar}" for exemplar in entry.exemplars if exemplar != template)
+            block = [self._escape(line) for line in block]
+            block_size = sum(len(line) + 1 for line in block)
+            if size + block_size > budget:
+                omitted = sum(entry.count for _, entry in ordered[index:])
+                lines.append(self._escape(f"\n… {len(ordered) - index} more templates ({omitted} records)"))
+                break
+            lines.extend(block)
+            size += block_size
+
+        if overflow_count:
+            lines.append(self._escape(f"\n… {overflow_count} other records over the template limit"))
+        return "\n".join(lines)
+
+    def flush(self) -> None:
+        """Send the current digest, if any records were collected."""
+        entries, overflow_count, max_level = self._swap()
+        if not entries and not overflow_count:
+            return
+
+        record = logging.LogRecord(
+            name=__name__,
+            level=max_level,
+            pathname=__file__,
+            lineno=0,
+            msg=self.render(entries, overflow_count),
+            args=None,
+            exc_info=None,
+        )
+        setattr(record, ESCAPED_ATTR, True)
+        try:
+            self.handler.handle(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        """Send the remaining digest and stop the worker thread."""
+        if not self._shutdown.is_set():
+            self._shutdown.set()
+            if self._worker is not None and self._worker.is_alive():
+                self._worker.join(timeout=5)
+            self.flush()
+            self.handler.close()
+        super().close()
@@ -2,9 +2,9 @@
 
 import logging
 import threading
-from typing import Optional
+from typing import Any, Callable, Optional
 
-from python_telegram_logging.handlers.async_ import AsyncTelegramHandler
+from python_telegram_logging.feedback import LoggerExclusionFilter
 from python_telegram_logging.handlers.base_queue import BaseQueueHandler
 from python_telegram_logging.handlers.base_telegram import BaseTelegramHandler
 
@@ -14,6 +14,9 @@ class QueuedTelegramHandler(BaseQueueHandler):
 
     This handler is designed to work with synchronous handlers only. For asynchronous
     handlers, use AsyncTelegramHandler directly as it already includes queue functionality.
+
+    With a ``batch_size`` above one, the worker takes all records waiting in the queue (up
+    to ``batch_size``) and runs them through the handler's pipeline as one batch.
     """
 
     def __init__(
@@ -21,6 +24,11 @@ class QueuedTelegramHandler(BaseQueueHandler):
         handler: BaseTelegramHandler,
         queue_size: int = 1000,
         level: int = logging.NOTSET,
+        queue_class: Optional[Callable[..., Any]] = None,
+        saturation_callback: Optional[Callable[[bool, float], None]] = None,
+        saturation_high: float = 0.8,
+        saturation_low: float = 0.5,
+        batch_size: int = 1,
     ) -> None:
         """Initialize the handler.
 
@@ -28,40 +36,98 @@ class QueuedTelegramHandler(BaseQueueHandler):
             handler: The underlying Telegram handler (must be synchronous)
             queue_size: Maximum number of records in the queue
             level: Minimum logging level
+            queue_class: Queue implementation, called with ``maxsize`` (default: queue.Queue)
+            saturation_callback: Optional callback called with (saturated, saturation level) on threshold crossings
+            saturation_high: Saturation level at which the queue is considered saturated
+            saturation_low: Saturation level at which the queue is no longer considered saturated
+            batch_size: Maximum number of queued records sent through the handler's pipeline together
+                with ``handle_batch`` (default: 1, each record is passed to ``handle``)
 
         Raises:
             ValueError: If an async handler is provided
         """
-        if isinstance(handler, AsyncTelegramHandler):
+        # Checking against the base class avoids importing the async handler (and aiohttp) here.
+        if isinstance(handler, BaseQueueHandler):
             raise ValueError(
                 "[QueuedTelegramHandler] AsyncTelegramHandler already includes queue functionality. "
                 "Use it directly instead of wrapping it in QueuedTelegramHandler."
             )
 
-        super().__init__(queue_size=queue_size, level=level)
+        super().__init__(
+            queue_size=queue_size,
+            level=level,
+            queue_class=queue_class,
+            saturation_callback=saturation_callback,
+            saturation_high=saturation_high,
+            saturation_low=saturation_low,
+        )
         self.handler = handler
+        self.batch_size = batch_size
+        exclude_loggers = getattr(handler, "exclude_loggers", ())
+        if exclude_loggers:
+            # Drop the excluded records before they take a place in the queue.
+            self.addFilter(LoggerExclusionFilter(exclude_loggers))
         self._worker: Optional[threading.Thread] = None
-        self._start_worker()
+        self._start_processing()
 
-    def _start_worker(self) -> None:
+    def _start_processing(self) -> None:
         """Start the worker thread."""
         self._worker = threading.Thread(target=self._process_queue, daemon=True)
         self._worker.start()
 
+    def _after_fork_in_child(self) -> None:
+        """Reset the inherited state; the worker thread is restarted on the first record."""
+        super()._after_fork_in_child()
+        self._worker = None
+
+    def _get_telegram_handler(self) -> BaseTelegramHandler:
+        return self.handler
+
     def _process_queue(self) -> None:
         """Process records from the queue."""
+        if self.batch_size > 1:
+            self._process_batches()
+            return
         while not self._shutdown.is_set() or not self.queue.empty():
             try:
                 record = self.queue.get(timeout=0.1)
+                self._untrack_record(record)
                 try:
-                    self.handler.handle(record)
+                    if not self._is_superseded(record):
+                        self.handler.handle(record)
                 except Exception:
                     self.handleError(record)
                 finally:
                     self.queue.task_done()
+                    if self.saturation_callback is not None:
+                        self._check_saturation()
             except:  # Queue.Empty and others  # noqa: E722
                 continue
 
+    def _process_batches(self) -> None:
+        """Process records from the queue, passing the records waiting in the queue as one batch."""
+        while not self._shutdown.is_set() or not self.queue.empty():
+            try:
+                batch = [self.queue.get(timeout=0.1)]
+            except:  # Queue.Empty and others  # noqa: E722
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except:  # Queue.Empty and others  # noqa: E722
+                    break
+            for record in batch:
+                self._untrack_record(record)
+            try:
+                self.handler.handle_batch([record for record in batch if not self._is_superseded(record)])
+            except Exception:
+                self.handleError(batch[0])
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+                if self.saturation_callback is not None:
+                    self._check_saturation()
+
     def close(self) -> None:
         """Stop the worker thread and close the queue."""
         super().close()
@@ -1,32 +1,46 @@
 """Synchronous Telegram logging handler."""
 
 import logging
+import queue
+import threading
 import time
 from threading import Lock
-from typing import Any
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Set, Union
 
 import requests
 
-from ..exceptions import RateLimitError, TelegramAPIError
-from ..rate_limiting import BaseRateLimiter, TimeProvider
+from ..encoding import JSON_HEADERS, dumps
+from ..exceptions import RateLimitError, TelegramAPIError, WouldBlockError
+from ..feedback import send_path_flag
+from ..pipeline import Envelope
+from ..rate_limiting import AdaptiveRateControl, BaseRateLimiter, MonotonicTimeProvider, TimeProvider
+from ..schemes import CircuitState, WouldBlockPolicy
 from .base_telegram import BaseTelegramHandler
 
 
-class SyncTimeProvider(TimeProvider):
-    """Synchronous time provider using time.time()."""
-
-    def get_time(self) -> float:
-        """Get current time in seconds."""
-        return time.time()
+class SyncTimeProvider(MonotonicTimeProvider):
+    """Synchronous time provider using time.monotonic()."""
 
 
 class SyncRateLimiter(BaseRateLimiter):
     """Thread-safe rate limiter for synchronous operations."""
 
-    def __init__(self) -> None:
-        """Initialize the rate limiter."""
-        super().__init__(SyncTimeProvider())
+    def __init__(
+        self,
+        adaptive: Optional[AdaptiveRateControl] = None,
+        time_provider: Optional[TimeProvider] = None,
+        sleep: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        """Initialize the rate limiter.
+
+        Args:
+            adaptive: Optional AIMD control of each chat's rate (default: static limits)
+            time_provider: Object that provides current time (default: SyncTimeProvider)
+            sleep: Function waiting for the given seconds (default: time.sleep), e.g. ``VirtualClock.sleep``
+        """
+        super().__init__(time_provider or SyncTimeProvider(), adaptive)
         self._lock = Lock()
+        self._sleep_function = sleep or time.sleep
 
     def _acquire_lock(self) -> Lock:
         self._lock.acquire()
@@ -36,32 +50,420 @@ class SyncRateLimiter(BaseRateLimiter):
         lock.release()
 
     def _sleep(self, seconds: float) -> None:
-        time.sleep(seconds)
+        self._sleep_function(seconds)
 
 
 class SyncTelegramHandler(BaseTelegramHandler):
-    """Synchronous Telegram logging handler."""
+    """Synchronous Telegram logging handler.
+
+    Requests go through one ``requests.Session``, whose connection pool keeps the
+    connections to the API open between records. Pre-warming and keep-alive requests
+    run in a background thread.
+
+    By default, records are sent in the logging thread, which waits for the rate limits
+    and the requests. With ``non_blocking``, the logging thread only formats the records:
+    their messages are handed off to a background sender thread, started on first use,
+    which waits for the rate limits and sends the requests in order. With
+    ``WouldBlockPolicy.SHED``, messages that could not be sent right away, because of the
+    rate limits or the messages already waiting for the sender, are dropped instead and
+    reported as ``WouldBlockError``.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        non_blocking: bool = False,
+        would_block_policy: WouldBlockPolicy = WouldBlockPolicy.HAND_OFF,
+        max_handoff_messages: int = 1000,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the handler.
+
+        Args:
+            non_blocking: Send from a background thread, never waiting in the logging thread (default: False)
+            would_block_policy: What to do with messages that would have to wait in non-blocking mode
+                (default: HAND_OFF, let them wait in the background sender)
+            max_handoff_messages: Maximum number of messages waiting for the background sender; further
+                ones are dropped and reported as WouldBlockError (default: 1000)
+            *args: Positional arguments of BaseTelegramHandler
+            **kwargs: Keyword arguments of BaseTelegramHandler
+        """
+        super().__init__(*args, **kwargs)
+        self.non_blocking = non_blocking
+        self.would_block_policy = would_block_policy
+        self.max_handoff_messages = max_handoff_messages
+        self._handoff: "queue.Queue[Optional[Envelope]]" = queue.Queue(maxsize=max_handoff_messages)
+        self._sender: Optional[threading.Thread] = None
+        self._sender_lock = threading.Lock()
+        self._session = requests.Session()
+        self._maintenance_stop = threading.Event()
+        self._maintenance_restart_needed = False
+        if self.prewarm_connections or self.keepalive_interval:
+            self._start_connection_maintenance()
+
+    def _after_fork_in_child(self) -> None:
+        """Reset the state inherited from the parent process after a fork.
+
+        The parent's pooled connections and handed off messages are dropped, and the
+        maintenance and sender threads are restarted on first use.
+        """
+        super()._after_fork_in_child()
+        self._session = requests.Session()
+        self._handoff = queue.Queue(maxsize=self.max_handoff_messages)
+        self._sender = None
+        self._sender_lock = threading.Lock()
+        self._maintenance_restart_needed = not self._maintenance_stop.is_set() and bool(
+            self.prewarm_connections or self.keepalive_interval
+        )
 
     def _create_rate_limiter(self) -> Any:
-        return SyncRateLimiter()
+        return SyncRateLimiter(self.adaptive_rate_control)
 
-    def emit(self, record: logging.LogRecord) -> None:
-        """Send the log record to Telegram."""
+    def _post(
+        self,
+        method: str,
+        payload: Union[Dict[str, Any], bytes],
+        read_result: bool = False,
+        token: Optional[str] = None,
+        chat_id: Optional[Union[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """Send one API request, respecting rate limits.
+
+        When sharding across several bot tokens, a request rejected with 429 takes its
+        token out of rotation and is retried once with another available token.
+
+        Args:
+            method: API method name, e.g. "sendMessage"
+            payload: Request payload, or its encoded JSON body (see ``encode_payload``)
+            read_result: Whether to decode and return the ``result`` of the response
+            token: Bot token to use (default: chosen by the token pool)
+            chat_id: Destination chat, required if the payload is already encoded
+
+        Returns:
+            The ``result`` object of the response if read_result is set, else an empty dict
+        """
+        if isinstance(payload, bytes):
+            if chat_id is None:
+                raise ValueError("[SyncTelegramHandler] chat_id is required with an encoded payload.")
+            body = payload
+        else:
+            body = dumps(payload)
+            chat_id = payload["chat_id"]
+        retried = False
+        while True:
+            current_token = token or self.choose_token(chat_id)
+            blocked_for = self._token_pool.blocked_for(current_token)
+            if blocked_for > 0:
+                time.sleep(blocked_for)
+            limiter_key = self.limiter_key(current_token, chat_id)
+            self.attach_bot_limit(limiter_key, current_token)
+            self._rate_limiter.acquire(limiter_key)
+
+            try:
+                self.note_request()
+                response = self._session.post(
+                    self.method_url(current_token, method),
+                    data=body,
+                    headers=JSON_HEADERS,
+                    timeout=(self.connect_timeout, self.read_timeout),
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                self._circuit_breaker.record_failure()
+                raise
+            self.record_response_status(response.status_code)
+
+            if response.ok and not read_result:
+                self._rate_limiter.record_success(limiter_key)
+                return {}
+
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+            try:
+                result = self.check_response(response.status_code, data, response.text)
+            except RateLimitError as e:
+                self._rate_limiter.record_rate_limited(limiter_key, e.retry_after)
+                self._token_pool.penalize(current_token, e.retry_after)
+                if token is not None or retried or not self._token_pool.available():
+                    raise
+                retried = True
+                continue
+            self._rate_limiter.record_success(limiter_key)
+            return result
+
+    def _lookup_chat_type(self, chat_id: Union[str, int]) -> None:
+        """Look up the type of the chat with getChat. Runs in a background thread."""
+        send_path_flag.active = True
+        result = None
+        try:
+            response = self._session.post(
+                self.method_url(self.token, "getChat"),
+                data=dumps({"chat_id": chat_id}),
+                headers=JSON_HEADERS,
+                timeout=(self.connect_timeout, self.read_timeout),
+            )
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+            result = self.check_response(response.status_code, data, response.text)
+        except Exception as e:
+            self.handle_error(e)
+        finally:
+            self.finish_chat_type_lookup(chat_id, result)
+
+    def _ping(self, token: str) -> None:
+        """Send a getMe request, which opens or keeps alive a connection and verifies the token."""
+        self.note_request()
+        response = self._session.post(
+            self.method_url(token, "getMe"), timeout=(self.connect_timeout, self.read_timeout)
+        )
         try:
-            messages = self.format_message(record)
+            data = response.json()
+        except ValueError:
+            data = None
+        self.check_response(response.status_code, data, response.text)
+
+    def _start_connection_maintenance(self) -> None:
+        """Start the background thread pre-warming and keeping alive the connections."""
+        self._maintenance_restart_needed = False
+        threading.Thread(target=self._maintain_connections, name="telegram-keepalive", daemon=True).start()
+
+    def _maintain_connections(self) -> None:
+        """Pre-warm the connections, then send keep-alive requests while idle.
+
+        Pre-warming failures are reported to the error callback. Keep-alive failures are
+        ignored: a connection dropped by the server is reopened by the next request.
+        """
+        send_path_flag.active = True
+        if self.prewarm_connections:
+            for token in self._token_pool.tokens:
+                try:
+                    self._ping(token)
+                except Exception as e:
+                    self.handle_error(e)
+
+        while self.keepalive_interval:
+            delay = self.keepalive_delay()
+            if delay > 0:
+                if self._maintenance_stop.wait(delay):
+                    return
+                continue
+            try:
+                self._ping(self.token)
+            except Exception:
+                pass
 
-            for message in messages:
-                payload = self.prepare_payload(message)
-                self._rate_limiter.acquire(self.chat_id)
+    def _send_status(self, status_key: Hashable, message: str, chat_id: Union[str, int]) -> None:
+        """Edit the message sent for the status key, or send a new one."""
+        status_message = self.get_status_message(status_key, chat_id)
+        if status_message is not None:
+            message_id, token = status_message
+            try:
+                self._post("editMessageText", self.prepare_edit_payload(message, message_id, chat_id), token=token)
+                return
+            except TelegramAPIError as e:
+                if self.is_not_modified_error(e):
+                    return
+                # The message was most likely deleted: fall back to sending a new one.
+                self.remember_status_message(status_key, None, chat_id)
 
-                response = requests.post(self._base_url, json=payload)
+        # Edits must be made by the bot that sent the message, so the token is fixed here.
+        token = self.choose_token(chat_id)
+        result = self._post("sendMessage", self.prepare_payload(message, chat_id), read_result=True, token=token)
+        sent_id = result.get("message_id")
+        if sent_id is not None:
+            self.remember_status_message(status_key, (sent_id, token), chat_id)
 
-                if response.status_code == 429:
-                    retry_after = response.json().get("retry_after", 1)
-                    raise RateLimitError(retry_after)
+    def _send_envelope(self, envelope: Envelope) -> None:
+        """Send the message of an envelope, or edit the status message of its status key."""
+        chat_id, text = envelope.chat_id, envelope.text or ""
+        if self.needs_chat_type_lookup(chat_id):
+            threading.Thread(target=self._lookup_chat_type, args=(chat_id,), daemon=True).start()
 
-                if not response.ok:
-                    raise TelegramAPIError(status_code=response.status, response_text=response.text)
+        if envelope.status_key is not None:
+            self._send_status(envelope.status_key, text, chat_id)
+            return
+        self._post("sendMessage", self.encode_payload(text, chat_id), chat_id=chat_id)
 
+    def _hand_off(self, envelopes: Sequence[Envelope]) -> None:
+        """Hand off the envelopes to the background sender, or shed the records that would wait, per the policy.
+
+        With ``WouldBlockPolicy.SHED``, a message is shed if the messages waiting for the
+        sender and itself could not all be sent right away to its chat. A record is reported
+        once, and its remaining parts are shed too.
+        """
+        shed: Set[int] = set()
+        waiting = self._handoff.unfinished_tasks
+        for envelope in envelopes:
+            if id(envelope.record) in shed:
+                continue
+            if self.would_block_policy == WouldBlockPolicy.SHED:
+                wait_time = self.estimate_drain_time(waiting + 1, envelope.chat_id)
+                if wait_time > 0:
+                    shed.add(id(envelope.record))
+                    self.handle_error(WouldBlockError(wait_time))
+                    continue
+
+            self._ensure_sender()
+            try:
+                self._handoff.put_nowait(envelope)
+                waiting += 1
+            except queue.Full:
+                shed.add(id(envelope.record))
+                self.handle_error(WouldBlockError(self.estimate_drain_time(waiting, envelope.chat_id)))
+
+    def _ensure_sender(self) -> None:
+        """Start the background sender thread if it is not running."""
+        if self._sender is None or not self._sender.is_alive():
+            with self._sender_lock:
+                if self._sender is None or not self._sender.is_alive():
+                    self._sender = threading.Thread(target=self._run_sender, name="telegram-sender", daemon=True)
+                    self._sender.start()
+
+    def _run_sender(self) -> None:
+        """Send the handed off messages in order, waiting for the rate limits, until closed."""
+        send_path_flag.active = True
+        failed = None  # The remaining parts of a record's message are skipped after an error
+        # Parts of the current record's message that were sent, and records parked since it started
+        current = None
+        sent: Set[int] = set()
+        parked: Dict[int, logging.LogRecord] = {}
+        while True:
+            envelope = self._handoff.get()
+            try:
+                if envelope is None:
+                    return
+                key = id(envelope.record)
+                if key != current:
+                    current, sent, parked = key, set(), {}
+                if key == failed:
+                    continue
+                # Once a part is parked, the later parts follow it, in order
+                if key in parked or not self._circuit_breaker.allow_request():
+                    self.park_unsent([envelope], sent, parked)
+                    continue
+                self._send_envelope(envelope)
+                sent.add(key)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.park_unsent([envelope], sent, parked)  # type: ignore[list-item]
+                self.handle_error(e)
+            except Exception as e:
+                failed = id(envelope.record)  # type: ignore[union-attr]
+                self.handle_error(e)
+            finally:
+                self._handoff.task_done()
+
+    def _send_records(self, records: Sequence[logging.LogRecord]) -> bool:
+        """Run the records through the pipeline and send the messages, parking them if the API is unreachable.
+
+        In non-blocking mode, the messages are handed off to the background sender instead.
+        After an error other than a connection failure, the remaining parts of the failed
+        message are skipped.
+
+        Returns:
+            False if records were parked because of a connection failure or timeout
+        """
+        try:
+            envelopes = self.pipeline.run(records, self)
         except Exception as e:
             self.handle_error(e)
+            return True
+
+        if self.non_blocking:
+            self._hand_off([envelope for envelope in envelopes if envelope.text])
+            return True
+
+        failed: Set[int] = set()
+        sent: Set[int] = set()
+        for index, envelope in enumerate(envelopes):
+            if not envelope.text or id(envelope.record) in failed:
+                continue
+            try:
+                self._send_envelope(envelope)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.park_unsent([unsent for unsent in envelopes[index:] if unsent.text], sent)
+                self.handle_error(e)
+                return False
+            except Exception as e:
+                failed.add(id(envelope.record))
+                self.handle_error(e)
+            else:
+                sent.add(id(envelope.record))
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Send the log record to Telegram, then any records parked while the API was unreachable.
+
+        Records logged while sending, e.g. by the HTTP client or the error callback, are dropped.
+        """
+        if send_path_flag.active:
+            return
+        if self._maintenance_restart_needed:
+            self._start_connection_maintenance()
+        send_path_flag.active = True
+        try:
+            self._deliver([record])
+        finally:
+            send_path_flag.active = False
+
+    def handle_batch(self, records: Sequence[logging.LogRecord]) -> None:
+        """Filter the records and send them through the pipeline as one batch.
+
+        This is the batch version of ``handle``, used by ``QueuedTelegramHandler`` with a
+        ``batch_size`` above one.
+        """
+        kept = []
+        for record in records:
+            rv = self.filter(record)
+            if isinstance(rv, logging.LogRecord):
+                record = rv
+            if rv:
+                kept.append(record)
+        if not kept or send_path_flag.active:
+            return
+
+        self.acquire()
+        send_path_flag.active = True
+        try:
+            self._deliver(kept)
+        finally:
+            send_path_flag.active = False
+            self.release()
+
+    def _deliver(self, records: Sequence[logging.LogRecord]) -> None:
+        """Send the records, then any parked records.
+
+        In non-blocking mode, only the background sender asks the circuit breaker whether
+        to send, so that the half-open probe is not taken by the logging thread. Parked
+        records are handed off again once the circuit is no longer open.
+        """
+        if self.non_blocking:
+            self._send_records(records)
+            if self._parked and self._circuit_breaker.state != CircuitState.OPEN:
+                self._send_records(self.take_parked_records())
+            return
+
+        if not self._circuit_breaker.allow_request():
+            for record in records:
+                self.park_record(record)
+            return
+
+        if self._send_records(records) and self._parked:
+            self._send_records(self.take_parked_records())
+
+    def close(self) -> None:
+        """Stop the background threads and close the pooled connections.
+
+        Handed off messages are still sent for up to 5 seconds.
+        """
+        self._maintenance_stop.set()
+        if self._sender is not None and self._sender.is_alive():
+            try:
+                self._handoff.put(None, timeout=5)
+            except queue.Full:
+                pass
+            self._sender.join(timeout=5)
+        self._session.close()
+        super().close()
@@ -0,0 +1,329 @@
+"""Composable processing pipeline of the Telegram handlers.
+
+Between taking a record and sending it, a handler runs its ``pipeline``: an ordered list
+of stages, each transforming a batch of ``Envelope`` objects. An envelope starts as a
+record with its destination chat; a render stage sets its text, and later stages may
+split, merge, drop or reorder envelopes. The handler then sends every remaining envelope
+as one message (or, for status updates, one edit), respecting the rate limits.
+
+The default pipeline, ``[RenderStage(), SplitStage()]``, formats each record with the
+handler's formatter and splits texts longer than Telegram's limit. Custom pipelines
+combine the built-in stages or subclasses of ``Stage``::
+
+    handler = SyncTelegramHandler(
+        token, chat_id,
+        pipeline=[FilterStage(lambda record: record.levelno >= logging.ERROR), DedupStage(window=60),
+                  RenderStage(), AggregateStage(), SplitStage()],
+    )
+
+Stages receive whole batches, so per-batch work (deduplication, merging messages to the
+same chat) is done once per batch instead of once per record. Handlers that take records
+from a queue pass up to ``batch_size`` queued records at once; records emitted directly
+are processed as batches of one. Stages run in the thread (or event loop) that sends, one
+batch at a time per handler. Records parked while the API was unreachable go through the
+pipeline again when they are sent.
+"""
+
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Sequence, Union
+
+from .schemes import TELEGRAM_MESSAGE_LIMIT
+from .truncation import truncate_markup
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .handlers.base_telegram import BaseTelegramHandler
+
+#: Attribute of a parked record holding the text of its unsent parts, set when its first
+#: parts were sent before the API became unreachable; the render stage sends it as is.
+UNSENT_TEXT_ATTR = "telegram_unsent_text"
+
+
+@dataclass
+class Envelope:
+    """A message on its way through the pipeline.
+
+    Attributes:
+        records: Records the message is made of; one, unless merged by ``AggregateStage``
+        chat_id: Destination chat
+        status_key: Status key of a status update (see ``enable_status_updates``), else None
+        text: Message text, set by the render stage
+    """
+
+    records: List[logging.LogRecord]
+    chat_id: Union[str, int]
+    status_key: Optional[Hashable] = None
+    text: Optional[str] = None
+
+    @property
+    def record(self) -> logging.LogRecord:
+        """Return the first record of the message."""
+        return self.records[0]
+
+
+class Stage(ABC):
+    """A step of the pipeline."""
+
+    @abstractmethod
+    def process(self, batch: List[Envelope], handler: "BaseTelegramHandler") -> List[Envelope]:
+        """Process a batch of envelopes.
+
+        Args:
+            batch: Envelopes in sending order; the list may be modified and returned
+            handler: Handler running the pipeline
+
+        Returns:
+            The envelopes to pass to the next stage
+        """
+
+
+class FilterStage(Stage):
+    """Drop the envelopes whose first record does not satisfy a predicate."""
+
+    def __init__(self, predicate: Callable[[logging.LogRecord], bool]) -> None:
+        """Initialize the stage.
+
+        Args:
+            predicate: Function returning whether a record is kept
+        """
+        self.predicate = predicate
+
+    def process(self, batch: List[Envelope], handler: "BaseTelegramHandler") -> List[Envelope]:
+        """Keep the envelopes whose record satisfies the predicate."""
+        return [envelope for envelope in batch if self.predicate(envelope.record)]
+
+
+class EnrichStage(Stage):
+    """Call a function on every record, e.g. to add attributes used by the formatter."""
+
+    def __init__(self, function: Callable[[logging.LogRecord], Any]) -> None:
+        """Initialize the stage.
+
+        Args:
+            function: Function called with each record; its return value is ignored
+        """
+        self.function = function
+
+    def process(self, batch: List[Envelope], handler: "BaseTelegramHandler") -> List[Envelope]:
+        """Call the function on the records of the batch."""
+        for envelope in batch:
+            for record in envelope.records:
+                self.function(record)
+        return batch
+
+
+def _default_dedup_key(envelope: Envelope) -> Hashable:
+    record = envelope.record
+    return (envelope.chat_id, record.name, record.levelno, record.getMessage())
+
+
+class DedupStage(Stage):
+    """Drop envelopes repeating an earlier one of the batch or of the last ``window`` seconds.
+
+    ``suppressed`` counts the dropped envelopes. Status updates are never dropped.
+    """
+
+    def __init__(
+        self,
+        key: Callable[[Envelope], Hashable] = _default_dedup_key,
+        window: float = 0.0,
+        max_keys: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the stage.
+
+        Args:
+            key: Function returning the key under which envelopes are considered equal
+                (default: chat, logger, level and message of the first record)
+            window: Seconds a key is remembered across batches (default: 0, only within a batch)
+            max_keys: Maximum number of remembered keys; the oldest are forgotten first
+            clock: Monotonic clock
+        """
+        self.key = key
+        self.window = window
+        self.max_keys = max_keys
+        self._clock = clock
+        self._seen: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.suppressed = 0
+
+    def process(self, batch: List[Envelope], handler: "BaseTelegramHandler") -> List[Envelope]:
+        """Drop the duplicate envelopes of the batch."""
+        now = self._clock()
+        while self._seen and next(iter(self._seen.values())) <= now:
+            self._seen.popitem(last=False)
+
+        kept = []
+        batch_keys = set()
+        for envelope in batch:
+            if envelope.status_key is None:
+                key = self.key(envelope)
+                if key in batch_keys or key in self._seen:
+                    self.suppressed += 1
+                    continue
+                batch_keys.add(key)
+            kept.append(envelope)
+
+        if self.window > 0:
+            expires_at = now + self.window
+            for key in batch_keys:
+                self._seen[key] = expires_at
+                self._seen.move_to_end(key)
+            while len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+        return kept
+
+
+class RenderStage(Stage):
+    """Set the text of every envelope that has none, with the handler's formatter.
+
+    A parked record whose first parts were already sent gets the text of its unsent parts
+    instead (see ``UNSENT_TEXT_ATTR``).
+    """
+
+    def process(self, batch: List[Envelope], handler: "BaseTelegramHandler") -> List[Envelope]:
+        """Format the records of the batch."""
+        for envelope in batch:
+            if envelope.text is None:
+                unsent_text = getattr(envelope.record, UNSENT_TEXT_ATTR, None)
+                envelope.text = handler.format(envelope.record) if unsent_text is None else unsent_text
+        return batch
+
+
+class AggregateStage(Stage):
+    """Merge the rendered envelopes of a batch sent to the same chat into fewer messages.
+
+    Telegram limits messages per chat, not characters, so merging several short records
+    into one message multiplies the records delivered per minute. Texts are joined with
+    ``separator`` as long as the merged text stays within ``max_length``. Each chat's texts
+    keep their order; status updates are not merged. Must run after the render stage.
+    """
+
+    def __init__(self, max_length: int = TELEGRAM_MESSAGE_LIMIT, separator: str = "\n\n") -> None:
+        """Initialize the stage.
+
+        Args:
+            max_length: Maximum length of a merged text
+            separator: Text between the merged texts
+        """
+        self.max_length = max_length
+        self.separator = separator
+
+    def process(self, batch: List[Envelope], handler: "BaseTelegramHandler") -> List[Envelope]:
+        """Merge the envelopes of each chat."""
+        merged: List[Envelope] = []
+        open_envelopes: Dict[Union[str, int], Envelope] = {}
+        for envelope in batch:
+            text = envelope.text or ""
+            current = open_envelopes.get(envelope.chat_id)
+            if envelope.status_key is not None:
+                merged.append(envelope)
+                continue
+            if current is not None and len(current.text or "") + len(self.separator) + len(text) <= self.max_length:
+                current.records.extend(envelope.records)
+                current.text = f"{current.text}{self.separator}{text}"
+                continue
+            current = Envelope(list(envelope.records), envelope.chat_id, text=text)
+            open_envelopes[envelope.chat_id] = current
+            merged.append(current)
+        return merged
+
+
+class SplitStage(Stage):
+    """Split texts longer than Telegram's limit into several messages.
+
+    Status updates are edits of a single message, so they are cut to one message. Texts that
+    would need more than ``max_parts`` messages are cut first. Both cuts keep the markup
+    valid (see ``truncation.truncate_markup``).
+    """
+
+    def __init__(self, limit: int = TELEGRAM_MESSAGE_LIMIT, max_parts: Optional[int] = None) -> None:
+        """Initialize the stage.
+
+        Args:
+            limit: Maximum length of a message
+            max_parts: Maximum number of messages per text (default: the handler's ``max_message_parts``)
+        """
+        self.limit = limit
+        self.max_parts = max_parts
+
+    def process(self, batch: List[Envelope], handler: "BaseTelegramHandler") -> List[Envelope]:
+        """Split the long texts of the batch."""
+        limit = self.limit
+        if all(len(envelope.text or "") <= limit for envelope in batch):
+            return batch
+
+        max_parts = self.max_parts if self.max_parts is not None else handler.max_message_parts
+        split = []
+        for envelope in batch:
+            text = envelope.text or ""
+            if len(text) <= limit:
+                split.append(envelope)
+            elif envelope.status_key is not None:
+                envelope.text = truncate_markup(text, limit, handler.parse_mode)
+                split.append(envelope)
+            else:
+                if max_parts is not None:
+                    text = truncate_markup(text, max_parts * limit, handler.parse_mode)
+                for start in range(0, len(text), limit):
+                    split.append(Envelope(envelope.records, envelope.chat_id, text=text[start : start + limit]))
+        return split
+
+
+def _highest_level_first(envelope: Envelope) -> Any:
+    return -max(record.levelno for record in envelope.records)
+
+
+class ScheduleStage(Stage):
+    """Reorder the batch, by default sending the most severe messages first.
+
+    The sort is stable: envelopes with equal keys keep their order.
+    """
+
+    def __init__(self, key: Callable[[Envelope], Any] = _highest_level_first) -> None:
+        """Initialize the stage.
+
+        Args:
+            key: Sort key of the envelopes (default: highest level first)
+        """
+        self.key = key
+
+    def process(self, batch: List[Envelope], handler: "BaseTelegramHandler") -> List[Envelope]:
+        """Sort the batch."""
+        return sorted(batch, key=self.key)
+
+
+def default_stages() -> List[Stage]:
+    """Return the stages of the default pipeline: render, then split."""
+    return [RenderStage(), SplitStage()]
+
+
+@dataclass
+class Pipeline:
+    """Ordered list of stages run on the batches of a handler."""
+
+    stages: List[Stage] = field(default_factory=default_stages)
+
+    @classmethod
+    def from_stages(cls, stages: Optional[Sequence[Stage]]) -> "Pipeline":
+        """Return a pipeline of the stages, or the default pipeline if None."""
+        return cls() if stages is None else cls(list(stages))
+
+    def run(self, records: Sequence[logging.LogRecord], handler: "BaseTelegramHandler") -> List[Envelope]:
+        """Run the records through the stages.
+
+        Args:
+            records: Records to send, in order
+            handler: Handler running the pipeline
+
+        Returns:
+            The envelopes to send, in order
+        """
+        batch = [Envelope([record], handler.get_chat_id(record), handler.get_status_key(record)) for record in records]
+        for stage in self.stages:
+            if not batch:
+                break
+            batch = stage.process(batch, handler)
+        return batch
@@ -0,0 +1,296 @@
+"""Queue implementations for the queue-based handlers.
+
+Any class with the ``queue.Queue`` interface used by the handlers (``put_nowait``,
+``get``, ``get_nowait``, ``task_done``, ``join``, ``empty``, ``qsize``) can be passed
+as ``queue_class`` to ``QueuedTelegramHandler`` and ``AsyncTelegramHandler``.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Mapping, Optional
+
+
+class RingBufferQueue:
+    """Bounded multi-producer, single-consumer queue with lock-free puts.
+
+    ``queue.Queue`` takes a mutex and notifies a condition variable on every put, which
+    becomes a contention point when many threads log at once. This queue relies on
+    ``collections.deque.append`` and ``popleft`` being atomic instead: producers never
+    take a lock, and the consumer is only woken up through an event when it is idle.
+
+    The size bound is checked without a lock, so under contention the queue may briefly
+    hold up to one extra item per concurrent producer. Records rejected because the
+    queue is full are counted in ``dropped``.
+    """
+
+    def __init__(self, maxsize: int = 0) -> None:
+        """Initialize the queue.
+
+        Args:
+            maxsize: Maximum number of items (0 means unbounded)
+        """
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._buffer: Deque[Any] = deque()
+        self._not_empty = threading.Event()
+        self._consumer_waiting = False
+        self._unfinished = 0  # Only touched by the consumer
+        self._dropped_lock = threading.Lock()
+
+    def put_nowait(self, item: Any) -> None:
+        """Put an item into the queue without blocking.
+
+        Raises:
+            queue.Full: If the queue is full
+        """
+        if 0 < self.maxsize <= len(self._buffer):
+            # Only the overflow path takes a lock, to count drops exactly.
+            with self._dropped_lock:
+                self.dropped += 1
+            raise queue.Full
+        self._buffer.append(item)
+        if self._consumer_waiting:
+            self._not_empty.set()
+
+    def put(self, item: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        """Put an item into the queue. Never blocks, for compatibility with queue.Queue."""
+        self.put_nowait(item)
+
+    def get_nowait(self) -> Any:
+        """Remove and return an item without blocking.
+
+        Raises:
+            queue.Empty: If the queue is empty
+        """
+        try:
+            item = self._buffer.popleft()
+        except IndexError:
+            raise queue.Empty from None
+        self._unfinished += 1
+        return item
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        """Remove and return an item, waiting up to ``timeout`` seconds if the queue is empty.
+
+        Must only be called from the single consumer thread.
+
+        Raises:
+            queue.Empty: If no item became available
+        """
+        if not block:
+            return self.get_nowait()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return self.get_nowait()
+            except queue.Empty:
+                pass
+
+            self._not_empty.clear()
+            self._consumer_waiting = True
+            try:
+                # Re-check after announcing that we wait, so that a concurrent put is not missed.
+                if self._buffer:
+                    continue
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._not_empty.wait(remaining)
+            finally:
+                self._consumer_waiting = False
+
+    def drain(self, max_items: Optional[int] = None) -> List[Any]:
+        """Remove and return up to ``max_items`` items (all items if None) without blocking."""
+        items: List[Any] = []
+        popleft = self._buffer.popleft
+        try:
+            while max_items is None or len(items) < max_items:
+                items.append(popleft())
+        except IndexError:
+            pass
+        self._unfinished += len(items)
+        return items
+
+    def task_done(self) -> None:
+        """Indicate that a previously taken item has been processed."""
+        if self._unfinished <= 0:
+            raise ValueError("task_done() called too many times")
+        self._unfinished -= 1
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait until all items have been taken and processed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._buffer or self._unfinished > 0:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            time.sleep(0.01)
+
+    def qsize(self) -> int:
+        """Return the approximate number of items in the queue."""
+        return len(self._buffer)
+
+    def empty(self) -> bool:
+        """Return True if the queue is empty."""
+        return not self._buffer
+
+    def full(self) -> bool:
+        """Return True if the queue is full."""
+        return 0 < self.maxsize <= len(self._buffer)
+
+
+class FairQueue:
+    """Bounded queue serving records of different loggers by deficit round-robin.
+
+    Records are put into one sub-queue per key (the logger name by default) and taken in
+    deficit round-robin order: in each round, a key may take as many records as its weight
+    (fractional weights accumulate across rounds). A chatty logger therefore cannot starve
+    quieter ones: each key gets its weighted share of the consumer, and with it of the
+    Telegram rate budget. Records of the same key keep their order.
+
+    Memory is capped overall by ``maxsize``. With ``max_per_key``, it is also capped per key,
+    so that a single key cannot fill the whole queue and crowd out records of other keys.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        weights: Optional[Mapping[Hashable, float]] = None,
+        default_weight: float = 1.0,
+        max_per_key: Optional[int] = None,
+        key: Optional[Callable[[logging.LogRecord], Hashable]] = None,
+    ) -> None:
+        """Initialize the queue.
+
+        Use ``functools.partial`` to pass the options as a handler's ``queue_class``.
+
+        Args:
+            maxsize: Maximum number of records in all sub-queues (0 means unbounded)
+            weights: Weight per key; a key with weight 3 gets three times the share of a key with weight 1
+            default_weight: Weight of keys missing from ``weights``
+            max_per_key: Maximum number of records per key (default: None, only capped by maxsize)
+            key: Returns the sub-queue key of a record (default: the logger name)
+
+        Raises:
+            ValueError: If a weight is not positive
+        """
+        self.weights: Dict[Hashable, float] = dict(weights or {})
+        if default_weight <= 0 or any(weight <= 0 for weight in self.weights.values()):
+            raise ValueError("[FairQueue] Weights must be positive.")
+        self.maxsize = maxsize
+        self.default_weight = default_weight
+        self.max_per_key = max_per_key or 0
+        self.key = key or (lambda record: record.name)
+        self.dropped = 0
+        self._queues: Dict[Hashable, Deque[Any]] = {}
+        self._deficits: Dict[Hashable, float] = {}
+        self._active: Deque[Hashable] = deque()  # Keys with queued records, in round-robin order
+        self._size = 0
+        self._unfinished = 0
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._all_tasks_done = threading.Condition(self._mutex)
+
+    def put_nowait(self, item: Any) -> None:
+        """Put a record into the sub-queue of its key without blocking.
+
+        Raises:
+            queue.Full: If the queue or the key's sub-queue is full
+        """
+        key = self.key(item)
+        with self._mutex:
+            items = self._queues.get(key)
+            if (0 < self.maxsize <= self._size) or (items is not None and 0 < self.max_per_key <= len(items)):
+                self.dropped += 1
+                raise queue.Full
+            if items is None:
+                items = self._queues[key] = deque()
+                self._deficits[key] = 0.0
+                self._active.append(key)
+            items.append(item)
+            self._size += 1
+            self._unfinished += 1
+            self._not_empty.notify()
+
+    def put(self, item: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        """Put a record into the queue. Never blocks, like RingBufferQueue."""
+        self.put_nowait(item)
+
+    def _pop(self) -> Any:
+        """Take the next record in deficit round-robin order. Must be called with the mutex held."""
+        while True:
+            key = self._active[0]
+            if self._deficits[key] < 1:
+                # The key's turn starts: grant its quantum.
+                self._deficits[key] += self.weights.get(key, self.default_weight)
+                if self._deficits[key] < 1:
+                    self._active.rotate(-1)
+                    continue
+
+            items = self._queues[key]
+            item = items.popleft()
+            self._deficits[key] -= 1
+            if not items:
+                del self._queues[key], self._deficits[key]
+                self._active.popleft()
+            elif self._deficits[key] < 1:
+                self._active.rotate(-1)
+            self._size -= 1
+            return item
+
+    def get_nowait(self) -> Any:
+        """Remove and return the next record without blocking.
+
+        Raises:
+            queue.Empty: If the queue is empty
+        """
+        with self._mutex:
+            if not self._size:
+                raise queue.Empty
+            return self._pop()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        """Remove and return the next record, waiting up to ``timeout`` seconds if the queue is empty.
+
+        Raises:
+            queue.Empty: If no record became available
+        """
+        if not block:
+            return self.get_nowait()
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._size > 0, timeout):
+                raise queue.Empty
+            return self._pop()
+
+    def task_done(self) -> None:
+        """Indicate that a previously taken record has been processed."""
+        with self._all_tasks_done:
+            if self._unfinished <= 0:
+                raise ValueError("task_done() called too many times")
+            self._unfinished -= 1
+            if not self._unfinished:
+                self._all_tasks_done.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait until all records have been taken and processed."""
+        with self._all_tasks_done:
+            self._all_tasks_done.wait_for(lambda: not self._unfinished, timeout)
+
+    def qsize(self) -> int:
+        """Return the number of records in all sub-queues."""
+        return self._size
+
+    def qsize_by_key(self) -> Dict[Hashable, int]:
+        """Return the number of queued records per key."""
+        with self._mutex:
+            return {key: len(items) for key, items in self._queues.items()}
+
+    def empty(self) -> bool:
+        """Return True if the queue is empty."""
+        return not self._size
+
+    def full(self) -> bool:
+        """Return True if the queue is full."""
+        return 0 < self.maxsize <= self._size
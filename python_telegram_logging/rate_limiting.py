@@ -3,29 +3,74 @@
 This module implements Telegram's rate limiting rules:
 - Per chat: Maximum 1 message per second
 - In groups: Maximum 20 messages per minute
+
+- Per bot: Maximum 30 messages per second across all chats (``BotRateLimit``)
+
+A 429 response's ``retry_after`` is always honored as a hard floor. With an
+``AdaptiveRateControl``, the limits above are only starting points: each chat's rate is
+adapted with AIMD (additive increase on success, multiplicative decrease on 429).
+
+Limiters read time from a ``TimeProvider``. The handlers use ``time.monotonic()``, which
+unlike the wall clock does not jump with NTP corrections; ``simulation.VirtualClock``
+drives the limiters in simulated time.
 """
 
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
 from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Dict, List, Protocol, Tuple, TypeVar, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Protocol, Tuple, TypeVar, Union
+
+from .forking import register_for_fork
+from .schemes import ChatType
+
+# Messages per second a bot may send across all its chats
+BOT_RATE_LIMIT = 30.0
+
+
+class LimitProfile(NamedTuple):
+    """Rate limits of a chat: at most one message per ``min_interval`` and ``max_per_window`` per ``window``."""
+
+    min_interval: float = 1.0
+    max_per_window: int = 20
+    window: float = 60.0
+
+
+# Limits per chat type. The per-minute limit only applies to groups and channels; chats of
+# unknown type get the group limits.
+CHAT_TYPE_LIMITS: Dict[ChatType, LimitProfile] = {
+    ChatType.PRIVATE: LimitProfile(min_interval=1.0, max_per_window=60, window=60.0),
+    ChatType.GROUP: LimitProfile(min_interval=1.0, max_per_window=20, window=60.0),
+    ChatType.SUPERGROUP: LimitProfile(min_interval=1.0, max_per_window=20, window=60.0),
+    ChatType.CHANNEL: LimitProfile(min_interval=1.0, max_per_window=20, window=60.0),
+}
 
 
 @dataclass
 class ChatState:
     """State for a single chat's rate limiting."""
 
-    last_message_time: float = 0.0
+    last_message_time: float = float("-inf")
     message_timestamps: List[float] = field(default_factory=list)
-
-    def clean_old_messages(self, current_time: float, window: float = 60.0) -> None:
+    min_interval: float = 1.0
+    max_per_window: int = 20
+    window: float = 60.0
+    blocked_until: float = 0.0
+    # (min_interval, max_per_window) before the first adaptation, set by AdaptiveRateControl
+    initial_limits: Optional[Tuple[float, int]] = None
+    # Global limit of the bot sending to the chat, shared with its other chats
+    bot_limit: Optional["BotRateLimit"] = None
+
+    def clean_old_messages(self, current_time: float, window: Optional[float] = None) -> None:
         """Remove messages older than the window.
 
         Args:
             current_time: Current timestamp
-            window: Time window in seconds (default: 60s for minute window)
+            window: Time window in seconds (default: the state's window, 60s)
         """
-        cutoff = current_time - window
+        cutoff = current_time - (self.window if window is None else window)
         self.message_timestamps = [ts for ts in self.message_timestamps if ts > cutoff]
 
     def would_exceed_rate_limit(self, current_time: float) -> Tuple[bool, float]:
@@ -37,14 +82,18 @@ class ChatState:
         Returns:
             Tuple of (would_exceed, wait_time)
         """
+        # Honor the retry_after of the last 429 response
+        if current_time < self.blocked_until:
+            return True, self.blocked_until - current_time
+
         # Check per-second limit
         time_since_last = current_time - self.last_message_time
-        if time_since_last < 1.0:
-            return True, 1.0 - time_since_last
+        if time_since_last < self.min_interval:
+            return True, self.min_interval - time_since_last
 
         # Check per-minute limit (20 messages)
-        if len(self.message_timestamps) >= 20:
-            wait_time = self.message_timestamps[0] + 60 - current_time
+        if len(self.message_timestamps) >= self.max_per_window:
+            wait_time = self.message_timestamps[-self.max_per_window] + self.window - current_time
             if wait_time > 0:
                 return True, wait_time
 
@@ -59,6 +108,160 @@ class ChatState:
         self.last_message_time = current_time
         self.message_timestamps.append(current_time)
 
+    def estimate_drain_time(self, count: int, current_time: float) -> float:
+        """Estimate how long sending ``count`` more messages takes, starting now.
+
+        The first window of messages is simulated exactly; after that, sends repeat
+        with the window's period.
+
+        Args:
+            count: Number of messages to send
+            current_time: Current timestamp
+
+        Returns:
+            Seconds until the last of the messages can be sent
+        """
+        if count <= 0:
+            return 0.0
+
+        start_time = current_time
+        current_time = max(current_time, self.blocked_until)
+        recent = [ts for ts in self.message_timestamps if ts > current_time - self.window]
+        last = self.last_message_time
+        times = []
+        for _ in range(min(count, self.max_per_window)):
+            send_time = max(current_time, last + self.min_interval)
+            if len(recent) >= self.max_per_window:
+                send_time = max(send_time, recent[-self.max_per_window] + self.window)
+            recent.append(send_time)
+            times.append(send_time)
+            last = send_time
+
+        periods, index = divmod(count - 1, self.max_per_window)
+        return times[index] + periods * self.window - start_time
+
+
+class BotRateLimit:
+    """Token bucket limiting a bot's messages across all its chats.
+
+    One bucket is shared by all the handlers of a bot in the process (see
+    ``get_bot_rate_limit``) and by all the chats they send to. Times are those of the
+    limiters' time provider, so the limiters sharing a bucket must use the same clock.
+    The bucket's lock is only held to refill it and take a message, never while waiting.
+    """
+
+    def __init__(self, rate: float = BOT_RATE_LIMIT, burst: Optional[float] = None) -> None:
+        """Initialize the bucket, full.
+
+        Args:
+            rate: Messages per second
+            burst: Maximum number of messages sent at once after an idle period (default: rate)
+        """
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self._tokens = self.burst
+        self._updated: Optional[float] = None
+        self._lock = threading.Lock()
+        register_for_fork(self)
+
+    def _after_fork_in_child(self) -> None:
+        """Replace the lock, which a parent thread may have held while forking."""
+        self._lock = threading.Lock()
+
+    def lower_rate(self, rate: float) -> None:
+        """Lower the rate, and the burst along with it, if the given rate is lower."""
+        with self._lock:
+            if rate < self.rate:
+                self.rate = rate
+                self.burst = min(self.burst, rate)
+                self._tokens = min(self._tokens, self.burst)
+
+    def try_take(self, current_time: float) -> float:
+        """Take a message from the bucket if one is available.
+
+        Args:
+            current_time: Current timestamp
+
+        Returns:
+            0.0 if a message was taken, else the time to wait until one is available
+        """
+        with self._lock:
+            if self._updated is not None and current_time > self._updated:
+                self._tokens = min(self.burst, self._tokens + (current_time - self._updated) * self.rate)
+            if self._updated is None or current_time > self._updated:
+                self._updated = current_time
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+_bot_limits: Dict[str, BotRateLimit] = {}
+_bot_limits_lock = threading.Lock()
+
+
+def _reinit_registry_lock() -> None:
+    global _bot_limits_lock
+    _bot_limits_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_registry_lock)
+
+
+def get_bot_rate_limit(token: str, rate: float = BOT_RATE_LIMIT) -> BotRateLimit:
+    """Return the process-wide global limit of a bot, creating it if needed.
+
+    Every handler of the bot shares the limit, which sends at the lowest rate requested.
+
+    Args:
+        token: Bot token
+        rate: Messages per second of the bot across all its chats
+
+    Returns:
+        The bot's limit
+    """
+    with _bot_limits_lock:
+        limit = _bot_limits.get(token)
+        if limit is None:
+            limit = _bot_limits[token] = BotRateLimit(rate)
+        else:
+            limit.lower_rate(rate)
+        return limit
+
+
+@dataclass
+class AdaptiveRateControl:
+    """AIMD control of each chat's send rate, driven by the API's responses.
+
+    The chat's static limits are the starting point. Every successful send adds
+    ``additive_increase`` messages per second to the rate, and every 429 response
+    multiplies it by ``multiplicative_decrease``. The per-window limit is scaled along with
+    the per-message interval. The learned rate is kept in the chat's state.
+    """
+
+    additive_increase: float = 0.02
+    multiplicative_decrease: float = 0.5
+    min_rate: float = 1 / 60
+    max_rate: float = 30.0
+
+    def on_success(self, state: ChatState) -> None:
+        """Increase the chat's rate after a successful send."""
+        self._set_rate(state, 1 / state.min_interval + self.additive_increase)
+
+    def on_rate_limited(self, state: ChatState) -> None:
+        """Decrease the chat's rate after a 429 response."""
+        self._set_rate(state, 1 / state.min_interval * self.multiplicative_decrease)
+
+    def _set_rate(self, state: ChatState, rate: float) -> None:
+        """Set the chat's messages per second, scaling both limits from their initial values."""
+        if state.initial_limits is None:
+            state.initial_limits = (state.min_interval, state.max_per_window)
+        initial_interval, initial_per_window = state.initial_limits
+        rate = min(max(rate, self.min_rate), self.max_rate)
+        state.min_interval = 1 / rate
+        state.max_per_window = max(1, round(initial_per_window * initial_interval * rate))
+
 
 class TimeProvider(Protocol):
     """Protocol for getting current time."""
@@ -68,6 +271,14 @@ class TimeProvider(Protocol):
         ...
 
 
+class MonotonicTimeProvider:
+    """Time provider using time.monotonic(), the default of the handlers' rate limiters."""
+
+    def get_time(self) -> float:
+        """Get current time in seconds."""
+        return time.monotonic()
+
+
 T = TypeVar("T")  # Type variable for the lock type
 
 
@@ -78,13 +289,15 @@ class BaseRateLimiter(ABC):
     synchronization details to the concrete implementations.
     """
 
-    def __init__(self, time_provider: TimeProvider) -> None:
+    def __init__(self, time_provider: TimeProvider, adaptive: Optional[AdaptiveRateControl] = None) -> None:
         """Initialize the rate limiter.
 
         Args:
             time_provider: Object that provides current time
+            adaptive: Optional AIMD control of each chat's rate (default: static limits)
         """
         self._time_provider = time_provider
+        self.adaptive = adaptive
         self._chat_states: Dict[Union[str, int], ChatState] = defaultdict(ChatState)
 
     @abstractmethod
@@ -99,43 +312,106 @@ class BaseRateLimiter(ABC):
     def _sleep(self, seconds: float) -> None:
         """Sleep for the specified duration."""
 
-    def _check_limits(self, chat_id: Union[str, int]) -> None:
-        """Check and enforce rate limits for a chat.
+    def _reserve(self, chat_id: Union[str, int]) -> float:
+        """Record a message for the chat if the limits allow it now.
+
+        The chat's limits and its bot's global limit are checked in one step: the bot's
+        bucket is only drawn from once the chat's limits allow the message, and the message
+        is recorded for the chat as soon as the bucket allows it too.
+
+        Must be called with the lock held (or, for coroutines, without awaiting in between).
 
         Args:
             chat_id: The chat ID to check
 
-        Raises:
-            RateLimitError: If rate limits would be exceeded
+        Returns:
+            0.0 if the message was recorded, else the time to wait before trying again
         """
         current_time = self._time_provider.get_time()
         state = self._chat_states[chat_id]
-
-        # Clean up old messages
         state.clean_old_messages(current_time)
 
-        # Check if we would exceed limits
         would_exceed, wait_time = state.would_exceed_rate_limit(current_time)
         if would_exceed:
-            self._sleep(wait_time)
-            current_time = self._time_provider.get_time()
+            return wait_time
+        if state.bot_limit is not None:
+            wait_time = state.bot_limit.try_take(current_time)
+            if wait_time > 0:
+                return wait_time
 
-        # Record the message
         state.record_message(current_time)
+        return 0.0
 
-    def acquire(self, chat_id: Union[str, int]) -> None:
-        """Acquire permission to send a message.
+    def set_limits(self, chat_id: Union[str, int], profile: LimitProfile) -> None:
+        """Set the chat's limits, e.g. from its chat type.
+
+        With adaptive control, the profile becomes the starting point of the chat's rate.
+        """
+        state = self._chat_states[chat_id]
+        state.min_interval, state.max_per_window, state.window = profile
+        state.initial_limits = None
+
+    def set_bot_limit(self, chat_id: Union[str, int], bot_limit: Optional[BotRateLimit]) -> None:
+        """Make the chat's messages count against the global limit of the bot sending to it."""
+        self._chat_states[chat_id].bot_limit = bot_limit
 
-        This method is thread-safe/coroutine-safe depending on the implementation.
+    def record_success(self, chat_id: Union[str, int]) -> None:
+        """Report a successful send to the chat.
+
+        Feedback is applied without the lock: a lost update only slightly delays adaptation.
+        """
+        if self.adaptive is not None:
+            self.adaptive.on_success(self._chat_states[chat_id])
+
+    def record_rate_limited(self, chat_id: Union[str, int], retry_after: float) -> None:
+        """Report a 429 response: block the chat for ``retry_after`` seconds and adapt its rate."""
+        state = self._chat_states[chat_id]
+        state.blocked_until = max(state.blocked_until, self._time_provider.get_time() + retry_after)
+        if self.adaptive is not None:
+            self.adaptive.on_rate_limited(state)
+
+    def estimate_drain_time(self, chat_id: Union[str, int], count: int) -> float:
+        """Estimate how long sending ``count`` more messages to the chat takes.
+
+        This is a lock-free, read-only estimate meant for monitoring.
+
+        Args:
+            chat_id: The target chat ID
+            count: Number of messages to send
+
+        Returns:
+            Estimated seconds until the last message can be sent
+        """
+        state = self._chat_states.get(chat_id) or ChatState()
+        return state.estimate_drain_time(count, self._time_provider.get_time())
+
+    def try_acquire(self, chat_id: Union[str, int]) -> float:
+        """Acquire permission to send a message if the limits allow it now, without waiting.
 
         Args:
             chat_id: The target chat ID
 
-        Raises:
-            RateLimitError: If rate limits would be exceeded
+        Returns:
+            0.0 if the message may be sent, else the seconds to wait before it could be
         """
-        lock = self._acquire_lock()
+        lock: Any = self._acquire_lock()
         try:
-            self._check_limits(chat_id)
+            return self._reserve(chat_id)
         finally:
             self._release_lock(lock)
+
+    def acquire(self, chat_id: Union[str, int]) -> None:
+        """Acquire permission to send a message, waiting until the limits allow it.
+
+        This method is thread-safe/coroutine-safe depending on the implementation. The lock
+        is only held to reserve the message, not while waiting, so other chats are not
+        blocked by a chat waiting out its rate limit.
+
+        Args:
+            chat_id: The target chat ID
+        """
+        # Check again after waiting: the wait only covers the first limit that was exceeded.
+        wait_time = self.try_acquire(chat_id)
+        while wait_time > 0:
+            self._sleep(wait_time)
+            wait_time = self.try_acquire(chat_id)
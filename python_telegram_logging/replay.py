@@ -0,0 +1,241 @@
+"""Bulk replay of logged records to Telegram, e.g. to push a backlog after an outage.
+
+The input is a JSON-lines file with one record per line: the attributes of a
+``logging.LogRecord`` (as written by ``json.dumps(record.__dict__, default=str)``), of which
+only ``msg`` (or ``message``) is required. ``telegram_chat_id`` routes a record to another
+chat, as with ``extra=``.
+
+The file is streamed in chunks of ``chunk_size`` records. Each chunk is sent by a
+``ReplayHandler``, an ``AsyncTelegramHandler`` that merges the records waiting for a chat
+into as few messages as the length limit allows, while the chats are sent to
+concurrently. Once a chunk has been sent, the byte offset of the next one is written to
+the checkpoint file, so an interrupted replay resumes after the last complete chunk.
+Records of the interrupted chunk may therefore be sent twice, but none is lost. The
+replay stops at the first chunk that could not be sent because the API is unreachable::
+
+    python -m python_telegram_logging replay backlog.jsonl --chat-id -100123 --checkpoint backlog.ckpt
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Optional, Set, Union
+
+import aiohttp
+
+from .exceptions import CircuitOpenError
+from .handlers.async_ import AsyncTelegramHandler
+from .pipeline import AggregateStage, Envelope, RenderStage, SplitStage
+from .schemes import CircuitOpenPolicy
+
+
+@dataclass
+class ReplayReport:
+    """Progress and outcome of a replay."""
+
+    records: int = 0
+    messages: int = 0
+    chats: int = 0
+    failed: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+    start_offset: int = 0
+    offset: int = 0
+    completed: bool = False
+
+    @property
+    def throughput(self) -> float:
+        """Return the replayed records per second."""
+        return self.records / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary."""
+        status = "completed" if self.completed else f"stopped at byte {self.offset}"
+        return (
+            f"{self.records} records in {self.messages} messages to {self.chats} chats in {self.seconds:.1f}s "
+            f"({self.throughput:.1f} records/s, {self.failed} failed, {self.skipped} malformed lines skipped), "
+            f"{status}"
+        )
+
+
+class ReplayHandler(AsyncTelegramHandler):
+    """``AsyncTelegramHandler`` set up for replays.
+
+    Records are aggregated into dense messages per chat, the records of the HTTP clients'
+    loggers are not excluded (they are history, not feedback), and records are dropped
+    instead of parked while the API is unreachable, so that the replay can stop and
+    resume from its checkpoint instead. Sent messages, failed records and whether the API
+    became unreachable are counted for the report.
+    """
+
+    def __init__(
+        self, token: str, chat_id: Union[str, int], chunk_size: int = 1000, batch_size: int = 50, **kwargs: Any
+    ) -> None:
+        """Initialize the handler.
+
+        Args:
+            token: Telegram bot token
+            chat_id: Chat of the records without ``telegram_chat_id``
+            chunk_size: Number of records sent between two checkpoints, the size of the queue
+            batch_size: Maximum number of records of a chat run through the pipeline together
+            **kwargs: Other keyword arguments of AsyncTelegramHandler
+        """
+        self.messages = 0
+        self.failed = 0
+        self.unreachable = False
+        self.chats: Set[Union[str, int]] = set()
+        kwargs.setdefault("pipeline", [RenderStage(), AggregateStage(), SplitStage()])
+        kwargs.setdefault("exclude_loggers", ())
+        super().__init__(
+            token,
+            chat_id,
+            queue_size=chunk_size,
+            batch_size=batch_size,
+            circuit_open_policy=CircuitOpenPolicy.SHED,
+            **kwargs,
+        )
+        self._user_error_callback = self.error_callback
+        self.error_callback = self._on_error
+
+    def _on_error(self, error: Exception) -> None:
+        """Note connection failures, then call the user's error callback."""
+        if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError)):
+            self.unreachable = True
+        if self._user_error_callback is not None:
+            self._user_error_callback(error)
+
+    def handleError(self, record: Optional[logging.LogRecord]) -> None:  # noqa: N802
+        """Count a record that could not be sent."""
+        self.failed += 1
+
+    async def _async_send_envelope(self, envelope: Envelope) -> None:
+        """Send the message of an envelope and count it."""
+        await super()._async_send_envelope(envelope)
+        self.messages += 1
+        self.chats.add(envelope.chat_id)
+
+
+def parse_record(line: Union[str, bytes]) -> Optional[logging.LogRecord]:
+    """Build a log record from a JSON line, or return None if the line is not a JSON object."""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    if "msg" not in data:
+        data["msg"] = data.get("message", "")
+    args = data.get("args")
+    data["args"] = tuple(args) if isinstance(args, list) else args or None
+    data["exc_info"] = None  # Only the traceback text (exc_text) survives serialization
+    if "levelno" not in data:
+        level = logging.getLevelName(str(data.get("levelname", "ERROR")).upper())
+        data["levelno"] = level if isinstance(level, int) else logging.ERROR
+        data["levelname"] = logging.getLevelName(data["levelno"])
+    if "created" in data and "msecs" not in data:
+        data["msecs"] = (data["created"] - int(data["created"])) * 1000
+    record = logging.makeLogRecord(data)
+    # Render the message now: a record whose arguments do not fit it would fail its whole batch.
+    try:
+        record.msg = record.getMessage()
+    except (TypeError, ValueError):
+        record.msg = str(record.msg)
+    record.args = None
+    return record
+
+
+def read_checkpoint(checkpoint: str, path: str) -> int:
+    """Return the byte offset at which the replay of the file resumes (0 without a checkpoint).
+
+    Raises:
+        ValueError: If the checkpoint is corrupt, belongs to another file, or lies past its end
+    """
+    try:
+        with open(checkpoint, encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return 0
+    offset = data.get("offset") if isinstance(data, dict) else None
+    if not isinstance(offset, int):
+        raise ValueError(f"Corrupt checkpoint {checkpoint}")
+    if data.get("path") != os.path.abspath(path):
+        raise ValueError(f"Checkpoint {checkpoint} belongs to {data.get('path')}")
+    if offset > os.path.getsize(path):
+        raise ValueError(f"Checkpoint {checkpoint} lies past the end of {path}")
+    return offset
+
+
+def write_checkpoint(checkpoint: str, path: str, offset: int) -> None:
+    """Write the byte offset at which the replay of the file resumes, atomically."""
+    temp_path = f"{checkpoint}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump({"path": os.path.abspath(path), "offset": offset}, file)
+    os.replace(temp_path, checkpoint)
+
+
+def replay(
+    path: str,
+    handler: ReplayHandler,
+    checkpoint: Optional[str] = None,
+    progress: Optional[Callable[[ReplayReport], None]] = None,
+) -> ReplayReport:
+    """Send the records of a JSON-lines file, resuming from and updating the checkpoint.
+
+    Args:
+        path: JSON-lines file, or "-" for the standard input (without checkpoint)
+        handler: Handler sending the records; its queue size is the chunk size
+        checkpoint: Optional file storing the offset of the first record not sent yet
+        progress: Optional callback called with the report after each chunk
+
+    Returns:
+        The report; ``completed`` is False if the replay stopped because the API is unreachable
+    """
+    if path == "-" and checkpoint is not None:
+        raise ValueError("The standard input cannot be replayed with a checkpoint")
+    offset = read_checkpoint(checkpoint, path) if checkpoint is not None else 0
+    report = ReplayReport(start_offset=offset, offset=offset)
+    start = time.perf_counter()
+
+    def finish_chunk(end: int, records: int) -> bool:
+        handler.queue.join()
+        report.seconds = time.perf_counter() - start
+        report.messages, report.chats, report.failed = handler.messages, len(handler.chats), handler.failed
+        if handler.unreachable:
+            return False
+        report.records += records
+        report.offset = end
+        if checkpoint is not None:
+            write_checkpoint(checkpoint, path, end)
+        if progress is not None:
+            progress(report)
+        return True
+
+    file: BinaryIO = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        if offset:
+            file.seek(offset)
+        end, pending = offset, 0
+        for line in file:
+            end += len(line)
+            if not line.strip():
+                continue
+            record = parse_record(line)
+            if record is None:
+                report.skipped += 1
+                continue
+            handler.handle(record)
+            pending += 1
+            if pending >= handler.queue_size:
+                if not finish_chunk(end, pending):
+                    return report
+                pending = 0
+        report.completed = finish_chunk(end, pending)
+        return report
+    finally:
+        if file is not sys.stdin.buffer:
+            file.close()
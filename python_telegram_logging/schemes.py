@@ -2,7 +2,12 @@
 
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Union
+from typing import Any, Dict, Union
+
+from .encoding import PayloadTemplate, message_fields
+
+# Maximum length of a message text
+TELEGRAM_MESSAGE_LIMIT = 4096
 
 
 class ParseMode(str, Enum):
@@ -13,6 +18,15 @@ class ParseMode(str, Enum):
     MARKDOWN_V2 = "MarkdownV2"
 
 
+class ChatType(str, Enum):
+    """Telegram chat types, as returned by getChat."""
+
+    PRIVATE = "private"
+    GROUP = "group"
+    SUPERGROUP = "supergroup"
+    CHANNEL = "channel"
+
+
 class RetryStrategy(Enum):
     """Strategy for handling rate limiting and retries."""
 
@@ -21,6 +35,35 @@ class RetryStrategy(Enum):
     DROP = auto()
 
 
+class ShardStrategy(Enum):
+    """Strategy for picking the bot token of each request when sharding across tokens."""
+
+    ROUND_ROBIN = auto()
+    LEAST_LOADED = auto()
+
+
+class CircuitState(Enum):
+    """State of a circuit breaker."""
+
+    CLOSED = auto()
+    OPEN = auto()
+    HALF_OPEN = auto()
+
+
+class CircuitOpenPolicy(Enum):
+    """What to do with records while the circuit breaker is open."""
+
+    PARK = auto()
+    SHED = auto()
+
+
+class WouldBlockPolicy(Enum):
+    """What a non-blocking handler does with records whose send would have to wait."""
+
+    HAND_OFF = auto()
+    SHED = auto()
+
+
 @dataclass
 class TelegramMessage:
     """Schema for a Telegram message.
@@ -35,12 +78,17 @@ class TelegramMessage:
     disable_web_page_preview: bool = True
     disable_notification: bool = False
 
+    def _fields(self) -> Dict[str, Any]:
+        return message_fields(
+            self.chat_id, self.parse_mode.value, self.disable_web_page_preview, self.disable_notification
+        )
+
     def to_dict(self) -> dict:
         """Convert the message to a dictionary for the Telegram API."""
-        return {
-            "chat_id": self.chat_id,
-            "text": self.text,
-            "parse_mode": self.parse_mode.value,
-            "disable_web_page_preview": self.disable_web_page_preview,
-            "disable_notification": self.disable_notification,
-        }
+        payload = self._fields()
+        payload["text"] = self.text
+        return payload
+
+    def to_json(self) -> bytes:
+        """Encode the message as a ``sendMessage`` request body, like the handlers do."""
+        return PayloadTemplate(self._fields()).encode(self.text)
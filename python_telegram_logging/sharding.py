@@ -0,0 +1,89 @@
+"""Sharding of a handler's traffic across several bot tokens.
+
+Telegram's rate limits apply per bot, so sending through several bots to the same chat
+multiplies the achievable throughput. ``TokenPool`` picks the token for each request and
+takes tokens that received a 429 response out of rotation until their ``retry_after``
+has passed.
+"""
+
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Sequence
+
+from .forking import register_for_fork
+from .schemes import ShardStrategy
+
+
+class TokenPool:
+    """A set of bot tokens that share the traffic of a handler."""
+
+    def __init__(
+        self,
+        tokens: Sequence[str],
+        strategy: ShardStrategy = ShardStrategy.ROUND_ROBIN,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the pool.
+
+        Args:
+            tokens: Bot tokens, at least one
+            strategy: How to pick the token for each request (default: ROUND_ROBIN)
+            clock: Monotonic clock used for the retry_after penalties
+        """
+        if not tokens:
+            raise ValueError("[TokenPool] At least one bot token is required.")
+        self.tokens: List[str] = list(dict.fromkeys(tokens))
+        self.strategy = strategy
+        self._clock = clock
+        self._blocked_until: Dict[str, float] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        register_for_fork(self)
+
+    def _after_fork_in_child(self) -> None:
+        """Replace the lock, which a parent thread may have held while forking."""
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of tokens."""
+        return len(self.tokens)
+
+    def blocked_for(self, token: str) -> float:
+        """Return how many seconds the token stays out of rotation (0 if it is available)."""
+        return max(self._blocked_until.get(token, 0.0) - self._clock(), 0.0)
+
+    def available(self) -> List[str]:
+        """Return the tokens currently in rotation."""
+        now = self._clock()
+        return [token for token in self.tokens if self._blocked_until.get(token, 0.0) <= now]
+
+    def choose(self, load: Callable[[str], float]) -> str:
+        """Pick the token for the next request.
+
+        If every token is out of rotation, the one that becomes available first is returned;
+        callers should wait ``blocked_for(token)`` seconds before using it.
+
+        Args:
+            load: Returns the current load of a token (e.g. the seconds until it may send),
+                used by the LEAST_LOADED strategy
+
+        Returns:
+            The chosen token
+        """
+        if len(self.tokens) == 1:
+            return self.tokens[0]
+
+        candidates = self.available()
+        if not candidates:
+            return min(self.tokens, key=self.blocked_for)
+
+        if self.strategy == ShardStrategy.LEAST_LOADED:
+            return min(candidates, key=load)
+        return candidates[next(self._counter) % len(candidates)]
+
+    def penalize(self, token: str, retry_after: float) -> None:
+        """Take the token out of rotation for ``retry_after`` seconds."""
+        with self._lock:
+            blocked_until = self._clock() + retry_after
+            self._blocked_until[token] = max(self._blocked_until.get(token, 0.0), blocked_until)
@@ -0,0 +1,483 @@
+"""Deterministic simulation of the rate limiters and queue consumers in virtual time.
+
+Real sends are paced by Telegram's limits, so checking a limiter or scheduler change
+against millions of messages would take days of wall-clock time. The harness runs them
+against a ``VirtualClock`` instead: sleeping advances the clock immediately, and
+``VirtualTimeEventLoop`` lets asyncio code (``AsyncRateLimiter``, the sender tasks of
+``AsyncTelegramHandler``) run in the same virtual time.
+
+``SimulatedBotAPI`` stands in for the Bot API. It enforces the per-chat limits the way
+Telegram does, answering 429 to every send that breaks them, and records each such send
+as a violation. Every ``simulate_*`` function returns a ``SimulationReport`` with the
+violations and the achieved throughput::
+
+    report = simulate_sync_limiter(messages=1_000_000, chats=100)
+    assert not report.violations
+    print(report.throughput, report.efficiency)
+"""
+
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import math
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Union
+
+from .circuit_breaker import CircuitBreaker
+from .handlers.async_ import AsyncRateLimiter, AsyncTelegramHandler
+from .handlers.base_telegram import CHAT_ID_ATTR
+from .handlers.sync import SyncRateLimiter
+from .rate_limiting import AdaptiveRateControl, LimitProfile
+
+# Tolerance of the limit checks, for the rounding of float time arithmetic
+EPSILON = 1e-6
+
+
+class VirtualClock:
+    """Simulated monotonic clock: sleeping advances the time instead of waiting.
+
+    The clock is a ``TimeProvider`` (``get_time``) and a clock function (calling it returns
+    the time), so it can be passed to the rate limiters, ``TokenPool`` and ``CircuitBreaker``.
+    """
+
+    def __init__(self, start: float = 0.0, resolution: float = 1e-6) -> None:
+        """Initialize the clock.
+
+        Args:
+            start: Initial time in seconds
+            resolution: Minimum seconds a sleep advances the time by, so that waits shorter
+                than the float precision of the time still make progress, like on a real clock
+        """
+        self.now = start
+        self.resolution = resolution
+
+    def __call__(self) -> float:
+        """Return the current time in seconds."""
+        return self.now
+
+    def get_time(self) -> float:
+        """Return the current time in seconds."""
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """Advance the time by the given seconds, at least by the clock's resolution."""
+        if seconds > 0:
+            self.now += max(seconds, self.resolution)
+
+
+class _VirtualTimeSelector:
+    """Selector that polls the real selector and advances the virtual clock instead of blocking."""
+
+    def __init__(self, selector: Any, clock: VirtualClock) -> None:
+        self._selector = selector
+        self._clock = clock
+
+    def select(self, timeout: Optional[float] = None) -> List[Any]:
+        events: List[Any] = self._selector.select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            raise RuntimeError("[VirtualTimeEventLoop] Deadlock: no callbacks are scheduled and no I/O is possible.")
+        self._clock.sleep(timeout)
+        return events
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._selector, name)
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):  # type: ignore[misc,valid-type]
+    """Event loop whose clock is a ``VirtualClock``.
+
+    When all tasks are waiting, the loop advances the clock to the next scheduled callback
+    instead of blocking, so ``asyncio.sleep`` and timeouts take no wall-clock time.
+    """
+
+    def __init__(self, clock: VirtualClock) -> None:
+        """Initialize the loop.
+
+        Args:
+            clock: Virtual clock driven by the loop
+        """
+        super().__init__()
+        self.clock = clock
+        selector: Any = getattr(self, "_selector")
+        self._selector = _VirtualTimeSelector(selector, clock)
+
+    def time(self) -> float:
+        """Return the virtual time."""
+        return self.clock.now
+
+    def call_later(  # type: ignore[override]  # The stubs type *args with TypeVarTuple, unavailable in 3.8
+        self,
+        delay: float,
+        callback: Callable[..., object],
+        *args: Any,
+        context: Optional[contextvars.Context] = None,
+    ) -> asyncio.TimerHandle:
+        """Schedule the callback, at least the clock's resolution later if the delay is positive."""
+        if delay > 0:
+            delay = max(delay, self.clock.resolution)
+        return super().call_later(delay, callback, *args, context=context)
+
+
+class LimitViolation(NamedTuple):
+    """A send that broke a per-chat limit."""
+
+    chat_id: Union[str, int]
+    time: float
+    rule: str  # "min_interval" or "max_per_window"
+
+
+class SimulatedBotAPI:
+    """Stand-in for the Bot API that enforces per-chat limits in virtual time.
+
+    A send that breaks a limit is rejected with a ``retry_after`` and recorded in
+    ``violations``, like Telegram's 429 responses.
+    """
+
+    def __init__(self, clock: VirtualClock, profile: LimitProfile = LimitProfile(), latency: float = 0.0) -> None:
+        """Initialize the API.
+
+        Args:
+            clock: Virtual clock
+            profile: Limits of every chat (default: the group limits)
+            latency: Simulated seconds each request takes before reaching the API
+        """
+        self.clock = clock
+        self.profile = profile
+        self.latency = latency
+        self.sent = 0
+        self.first_send: Optional[float] = None
+        self.last_send: Optional[float] = None
+        self.sent_by_chat: Dict[Union[str, int], int] = defaultdict(int)
+        self.violations: List[LimitViolation] = []
+        self._recent: Dict[Union[str, int], Deque[float]] = defaultdict(lambda: deque(maxlen=profile.max_per_window))
+
+    def send(self, chat_id: Union[str, int]) -> float:
+        """Deliver a message arriving now.
+
+        Returns:
+            0.0 if the message was accepted, else the retry_after of the 429 response
+        """
+        now = self.clock.now
+        recent = self._recent[chat_id]
+        wait_time = 0.0
+        rule = ""
+        if recent and now - recent[-1] < self.profile.min_interval - EPSILON:
+            wait_time = recent[-1] + self.profile.min_interval - now
+            rule = "min_interval"
+        elif len(recent) == self.profile.max_per_window and now - recent[0] < self.profile.window - EPSILON:
+            wait_time = recent[0] + self.profile.window - now
+            rule = "max_per_window"
+        if rule:
+            self.violations.append(LimitViolation(chat_id, now, rule))
+            return float(max(1, math.ceil(wait_time)))
+
+        recent.append(now)
+        self.sent += 1
+        self.sent_by_chat[chat_id] += 1
+        if self.first_send is None:
+            self.first_send = now
+        self.last_send = now
+        return 0.0
+
+    def post_sync(self, chat_id: Union[str, int]) -> float:
+        """Send a message through a synchronous request, see ``send``."""
+        self.clock.sleep(self.latency)
+        return self.send(chat_id)
+
+    async def post(self, chat_id: Union[str, int]) -> float:
+        """Send a message through an asynchronous request, see ``send``."""
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return self.send(chat_id)
+
+
+@dataclass
+class SimulationReport:
+    """Outcome of a simulation run."""
+
+    messages: int
+    chats: int
+    simulated_seconds: float
+    wall_seconds: float
+    max_throughput: float
+    violations: List[LimitViolation] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """Return the delivered messages per simulated second."""
+        if self.simulated_seconds <= 0:
+            return float("inf") if self.messages else 0.0
+        return self.messages / self.simulated_seconds
+
+    @property
+    def efficiency(self) -> float:
+        """Return the throughput relative to the sustained rate the limits allow."""
+        return self.throughput / self.max_throughput
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary."""
+        return (
+            f"{self.messages} messages to {self.chats} chats in {self.simulated_seconds:.0f} simulated seconds "
+            f"({self.wall_seconds:.2f}s wall): {self.throughput:.3f} msg/s, {self.efficiency:.1%} of the "
+            f"sustained limit, {len(self.violations)} violations"
+        )
+
+
+def _report(api: SimulatedBotAPI, chats: int, wall_start: float) -> SimulationReport:
+    """Build the report of a finished simulation."""
+    profile = api.profile
+    per_chat_rate = min(1 / profile.min_interval, profile.max_per_window / profile.window)
+    # The first message is sent at the start, so n messages span n - 1 of the limit's intervals.
+    simulated = (api.last_send or 0.0) - (api.first_send or 0.0) + 1 / per_chat_rate
+    return SimulationReport(
+        messages=api.sent,
+        chats=chats,
+        simulated_seconds=simulated,
+        wall_seconds=time.perf_counter() - wall_start,
+        max_throughput=per_chat_rate * chats,
+        violations=api.violations,
+    )
+
+
+def _chat_ids(chats: int) -> List[int]:
+    return [-1000000000000 - index for index in range(chats)]
+
+
+def _split(messages: int, chat_ids: List[int]) -> Dict[int, int]:
+    """Spread the messages over the chats as evenly as possible."""
+    per_chat, remainder = divmod(messages, len(chat_ids))
+    return {chat_id: per_chat + (index < remainder) for index, chat_id in enumerate(chat_ids)}
+
+
+def simulate_sync_limiter(
+    messages: int,
+    chats: int = 1,
+    profile: LimitProfile = LimitProfile(),
+    adaptive: Optional[AdaptiveRateControl] = None,
+    latency: float = 0.0,
+) -> SimulationReport:
+    """Send messages round-robin to the chats from one thread through a ``SyncRateLimiter``.
+
+    This is how ``SyncTelegramHandler`` (and the worker of ``QueuedTelegramHandler``)
+    sends: one request at a time, waiting for the limiter of each message's chat.
+
+    Args:
+        messages: Number of messages to deliver
+        chats: Number of destination chats
+        profile: Limits of every chat
+        adaptive: Optional AIMD control of the limiter
+        latency: Simulated seconds per request
+
+    Returns:
+        The simulation report
+    """
+    wall_start = time.perf_counter()
+    clock = VirtualClock()
+    api = SimulatedBotAPI(clock, profile, latency)
+    limiter = SyncRateLimiter(adaptive, time_provider=clock, sleep=clock.sleep)
+    chat_ids = _chat_ids(chats)
+    for chat_id in chat_ids:
+        limiter.set_limits(chat_id, profile)
+
+    for chat_id in itertools.islice(itertools.cycle(chat_ids), messages):
+        while True:
+            limiter.acquire(chat_id)
+            retry_after = api.post_sync(chat_id)
+            if not retry_after:
+                limiter.record_success(chat_id)
+                break
+            limiter.record_rate_limited(chat_id, retry_after)
+    return _report(api, chats, wall_start)
+
+
+def _run(clock: VirtualClock, coroutine: Any) -> Any:
+    """Run the coroutine to completion on a new virtual time event loop."""
+    loop = VirtualTimeEventLoop(clock)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def simulate_async_limiter(
+    messages: int,
+    chats: int = 1,
+    profile: LimitProfile = LimitProfile(),
+    adaptive: Optional[AdaptiveRateControl] = None,
+    latency: float = 0.0,
+) -> SimulationReport:
+    """Send messages to the chats through an ``AsyncRateLimiter``, with one task per chat.
+
+    Args:
+        messages: Number of messages to deliver
+        chats: Number of destination chats
+        profile: Limits of every chat
+        adaptive: Optional AIMD control of the limiter
+        latency: Simulated seconds per request
+
+    Returns:
+        The simulation report
+    """
+    wall_start = time.perf_counter()
+    clock = VirtualClock()
+    api = SimulatedBotAPI(clock, profile, latency)
+    limiter = AsyncRateLimiter(adaptive, time_provider=clock)
+    counts = _split(messages, _chat_ids(chats))
+    for chat_id in counts:
+        limiter.set_limits(chat_id, profile)
+
+    async def send_all(chat_id: int, count: int) -> None:
+        for _ in range(count):
+            while True:
+                await limiter.acquire(chat_id)
+                retry_after = await api.post(chat_id)
+                if not retry_after:
+                    limiter.record_success(chat_id)
+                    break
+                limiter.record_rate_limited(chat_id, retry_after)
+
+    async def main() -> None:
+        await asyncio.gather(*(send_all(chat_id, count) for chat_id, count in counts.items()))
+
+    _run(clock, main())
+    return _report(api, chats, wall_start)
+
+
+class _SimulatedResponse:
+    """Response of ``_SimulatedSession``, with the attributes the handler reads."""
+
+    def __init__(self, retry_after: float) -> None:
+        self.status = 429 if retry_after else 200
+        self.ok = not retry_after
+        self._text = json.dumps(
+            {"ok": False, "error_code": 429, "parameters": {"retry_after": retry_after}}
+            if retry_after
+            else {"ok": True, "result": {}}
+        )
+
+    async def text(self) -> str:
+        return self._text
+
+    async def __aenter__(self) -> "_SimulatedResponse":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+
+class _SimulatedRequest:
+    """Awaitable context manager returned by ``_SimulatedSession.post``, like aiohttp's."""
+
+    def __init__(self, api: SimulatedBotAPI, data: bytes) -> None:
+        self._api = api
+        self._data = data
+
+    async def __aenter__(self) -> _SimulatedResponse:
+        return _SimulatedResponse(await self._api.post(json.loads(self._data)["chat_id"]))
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+
+class _SimulatedSession:
+    """Replacement of the handler's aiohttp session that sends to a ``SimulatedBotAPI``."""
+
+    def __init__(self, api: SimulatedBotAPI) -> None:
+        self._api = api
+
+    def post(self, url: str, data: bytes, headers: Dict[str, str]) -> _SimulatedRequest:
+        return _SimulatedRequest(self._api, data)
+
+    async def close(self) -> None:
+        pass
+
+
+class _SimulatedAsyncHandler(AsyncTelegramHandler):
+    """``AsyncTelegramHandler`` whose queue is processed by the simulation instead of a thread."""
+
+    def __init__(self, clock: VirtualClock, api: SimulatedBotAPI, **kwargs: Any) -> None:
+        self._clock = clock
+        # The process-wide bot limits run on the real clock; SimulatedBotAPI only models the chat limits.
+        kwargs.setdefault("bot_rate_limit", None)
+        super().__init__(token="simulation", chat_id=0, **kwargs)
+        self._session = _SimulatedSession(api)  # type: ignore[assignment]
+        self._token_pool._clock = clock
+        self._circuit_breaker = CircuitBreaker(clock=clock)
+        self.failed = 0
+
+    def _create_rate_limiter(self) -> Any:
+        return AsyncRateLimiter(self.adaptive_rate_control, time_provider=self._clock)
+
+    def _start_processing(self) -> None:
+        pass
+
+    def handleError(self, record: Optional[logging.LogRecord]) -> None:  # noqa: N802
+        self.failed += 1
+
+
+def simulate_async_handler(
+    messages: int,
+    chats: int = 1,
+    profile: LimitProfile = LimitProfile(),
+    adaptive: Optional[AdaptiveRateControl] = None,
+    latency: float = 0.0,
+    queue_size: int = 1000,
+    **handler_kwargs: Any,
+) -> SimulationReport:
+    """Log records to the chats through the queue consumer of ``AsyncTelegramHandler``.
+
+    All records are logged as one burst, as fast as the queue accepts them, and are
+    processed by the handler's dispatcher and per-chat sender tasks.
+
+    Args:
+        messages: Number of records to log, each sent as one message
+        chats: Number of destination chats
+        profile: Limits of every chat
+        adaptive: Optional AIMD control of the handler's limiter
+        latency: Simulated seconds per request
+        queue_size: Size of the handler's queue
+        **handler_kwargs: Other keyword arguments of AsyncTelegramHandler, e.g. ``max_concurrent_requests``
+
+    Returns:
+        The simulation report
+    """
+    wall_start = time.perf_counter()
+    clock = VirtualClock()
+    api = SimulatedBotAPI(clock, profile, latency)
+    handler = _SimulatedAsyncHandler(
+        clock, api, queue_size=queue_size, adaptive_rate_control=adaptive, **handler_kwargs
+    )
+    chat_ids = _chat_ids(chats)
+    for chat_id in chat_ids:
+        handler._rate_limiter.set_limits(chat_id, profile)
+
+    def make_record(chat_id: int) -> logging.LogRecord:
+        record = logging.LogRecord("simulation", logging.ERROR, __file__, 0, "message", (), None)
+        setattr(record, CHAT_ID_ATTR, chat_id)
+        return record
+
+    async def main() -> List[Any]:
+        dispatcher = asyncio.ensure_future(handler._process_queue())
+        for chat_id in itertools.islice(itertools.cycle(chat_ids), messages):
+            while handler.queue_depth() >= handler.queue_size:
+                await asyncio.sleep(0.1)
+            handler.emit(make_record(chat_id))
+        while handler.queue_depth() > 0:
+            await asyncio.sleep(1.0)
+        tasks = [dispatcher, *(sender.task for sender in handler._senders.values() if sender.task is not None)]
+        for task in tasks:
+            task.cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        _run(clock, main())
+    finally:
+        handler._senders = {}
+        handler.close()
+    return _report(api, chats, wall_start)
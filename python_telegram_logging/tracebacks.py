@@ -0,0 +1,191 @@
+"""Compact rendering of exception tracebacks for Telegram messages.
+
+Deep framework stacks and recursion make tracebacks the main reason a log record is
+split into several Telegram messages. ``TracebackRenderer`` collapses repeated frames,
+optionally folds standard library and third-party frames, and trims outer frames until
+the traceback fits a character budget, always keeping the innermost frames and the
+messages of the whole exception chain.
+"""
+
+import sysconfig
+import threading
+import traceback
+from collections import OrderedDict
+from types import TracebackType
+from typing import Hashable, List, Optional, Tuple, Type, Union
+
+ExcInfo = Tuple[Type[BaseException], BaseException, Optional[TracebackType]]
+OptExcInfo = Union[ExcInfo, Tuple[None, None, None]]
+
+_CAUSE_MESSAGE = "\nThe above exception was the direct cause of the following exception:\n\n"
+_CONTEXT_MESSAGE = "\nDuring handling of the above exception, another exception occurred:\n\n"
+
+_LIBRARY_PATHS = tuple(
+    {path for path in (sysconfig.get_paths().get("stdlib"), sysconfig.get_paths().get("platstdlib")) if path}
+)
+_PACKAGE_DIRS = ("site-packages", "dist-packages")
+
+# Frame limits tried in turn until the rendered traceback fits the budget.
+_FRAME_LIMITS = (None, 30, 15, 8, 4, 2, 1, 0)
+
+
+def is_library_file(filename: str) -> bool:
+    """Return whether the file belongs to the standard library or an installed package."""
+    return (
+        filename.startswith(_LIBRARY_PATHS)
+        or filename.startswith("<frozen ")
+        or any(directory in filename for directory in _PACKAGE_DIRS)
+    )
+
+
+def _shorten_path(filename: str) -> str:
+    """Strip the installation prefix of third-party files."""
+    for directory in _PACKAGE_DIRS:
+        index = filename.rfind(directory)
+        if index != -1:
+            return filename[index + len(directory) + 1 :]
+    return filename
+
+
+class TracebackRenderer:
+    """Render exceptions compactly enough to fit into a single Telegram message.
+
+    Rendered tracebacks are cached per fingerprint (exception types, messages and frame
+    locations of the whole chain), so an exception repeating in a loop is rendered once.
+    """
+
+    def __init__(
+        self,
+        max_length: int = 3000,
+        fold_library_frames: bool = True,
+        cache_size: int = 128,
+    ) -> None:
+        """Initialize the renderer.
+
+        Args:
+            max_length: Target maximum length of the rendered traceback in characters
+            fold_library_frames: Whether to fold runs of stdlib and site-packages frames
+            cache_size: Maximum number of rendered tracebacks kept in the cache
+        """
+        self.max_length = max_length
+        self.fold_library_frames = fold_library_frames
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(exc_info: ExcInfo) -> Hashable:
+        """Return a hashable fingerprint of the exception chain."""
+        parts = []
+        exc: Optional[BaseException] = exc_info[1]
+        tb = exc_info[2]
+        seen = set()
+        while exc is not None and id(exc) not in seen:
+            seen.add(id(exc))
+            frames = []
+            while tb is not None:
+                frames.append((tb.tb_frame.f_code.co_filename, tb.tb_lineno))
+                tb = tb.tb_next
+            parts.append((type(exc), str(exc), tuple(frames)))
+            exc = exc.__cause__ or (None if exc.__suppress_context__ else exc.__context__)
+            tb = exc.__traceback__ if exc is not None else None
+        return tuple(parts)
+
+    def render(self, exc_info: ExcInfo) -> str:
+        """Render the exception, using the cache when possible.
+
+        Args:
+            exc_info: Exception info tuple as returned by sys.exc_info()
+
+        Returns:
+            The rendered traceback without a trailing newline
+        """
+        key = self.fingerprint(exc_info)
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+                return text
+
+        text = self._render(exc_info)
+
+        with self._lock:
+            self._cache[key] = text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    def _compact_frames(self, frames: traceback.StackSummary) -> List[str]:
+        """Render frames, collapsing identical consecutive frames and folding library frames."""
+        entries = []
+        index, count = 0, len(frames)
+        while index < count:
+            frame = frames[index]
+
+            if self.fold_library_frames and is_library_file(frame.filename):
+                end = index
+                # The innermost frame is never folded.
+                while end < count - 1 and is_library_file(frames[end].filename):
+                    end += 1
+                if end - index >= 2:
+                    entries.append(f"  … {end - index} library frames\n")
+                    index = end
+                    continue
+
+            end = index + 1
+            while end < count and (frames[end].filename, frames[end].lineno, frames[end].name) == (
+                frame.filename,
+                frame.lineno,
+                frame.name,
+            ):
+                end += 1
+
+            entry = f'  File "{_shorten_path(frame.filename)}", line {frame.lineno}, in {frame.name}\n'
+            if frame.line:
+                entry += f"    {frame.line.strip()}\n"
+            entries.append(entry)
+            if end - index > 1:
+                entries.append(f"  … {end - index - 1} identical frames\n")
+            index = end
+        return entries
+
+    def _render(self, exc_info: ExcInfo) -> str:
+        """Render the exception chain within the length budget."""
+        # (separator to the next exception, frame entries, exception message), innermost last
+        chain: List[Tuple[str, List[str], str]] = []
+        exc: Optional[traceback.TracebackException] = traceback.TracebackException(*exc_info)
+        separator = ""
+        while exc is not None:
+            chain.append((separator, self._compact_frames(exc.stack), "".join(exc.format_exception_only())))
+            if exc.__cause__ is not None:
+                exc, separator = exc.__cause__, _CAUSE_MESSAGE
+            elif exc.__context__ is not None and not exc.__suppress_context__:
+                exc, separator = exc.__context__, _CONTEXT_MESSAGE
+            else:
+                exc = None
+        chain.reverse()
+
+        text = ""
+        for limit in _FRAME_LIMITS:
+            text = self._join(chain, limit)
+            if len(text) <= self.max_length:
+                return text
+
+        # Even the exception messages alone are too long: keep the head and the tail.
+        half = max(self.max_length // 2 - 10, 0)
+        return f"{text[:half]}\n…\n{text[-half:]}" if half else text[: self.max_length]
+
+    @staticmethod
+    def _join(chain: List[Tuple[str, List[str], str]], limit: Optional[int]) -> str:
+        """Join the chain, keeping at most ``limit`` innermost frame entries per exception."""
+        parts = []
+        for separator, entries, message in chain:
+            if entries:
+                parts.append("Traceback (most recent call last):\n")
+                if limit is not None and len(entries) > limit:
+                    parts.append(f"  … {len(entries) - limit} outer frames omitted\n")
+                    entries = entries[len(entries) - limit :]
+                parts.extend(entries)
+            parts.append(message)
+            parts.append(separator)
+        return "".join(parts).rstrip("\n")
@@ -0,0 +1,243 @@
+"""Head-and-tail truncation of oversized messages.
+
+A single log call with a huge argument (a response body, a dump) would otherwise be
+formatted in full, split into thousands of messages and sent for hours at the per-chat
+rate. Handlers cap the rendered text at ``max_message_length`` characters, keeping its
+beginning and end around an elision marker such as ``… 49M characters omitted …``.
+``bound_record`` caps the message and its string arguments before formatting, so the full
+text is not built in the common cases, and ``truncate_middle`` caps raw text before it is
+escaped. Text that is already formatted is only cut by ``truncate_markup``, which keeps its
+markup valid.
+"""
+
+import copy
+import logging
+import re
+from typing import Any, List, Mapping, Optional, Sequence, TypeVar
+
+from .schemes import ParseMode
+
+AnyStr = TypeVar("AnyStr", str, bytes)
+
+
+def format_count(count: int) -> str:
+    """Return a short rendering of a character count, e.g. "950", "12K" or "49M".
+
+    Only letters and digits are used, so the result needs no escaping in any parse mode.
+    """
+    if count < 10_000:
+        return str(count)
+    if count < 10_000_000:
+        return f"{count // 1000}K"
+    return f"{count // 1_000_000}M"
+
+
+def elision_marker(omitted: int) -> str:
+    """Return the marker replacing the omitted middle of a text."""
+    return f"\n… {format_count(omitted)} characters omitted …\n"
+
+
+def truncate_middle(text: AnyStr, max_length: int) -> AnyStr:
+    """Cap the text at ``max_length``, keeping its head and tail around an elision marker.
+
+    Only the kept parts are copied. Two thirds of the kept characters are taken from the
+    head, where messages usually say what happened, and one third from the tail. Bytes are
+    capped at ``max_length`` bytes.
+
+    Args:
+        text: Text to cap, str or bytes
+        max_length: Maximum length of the result
+
+    Returns:
+        The text itself if it is short enough, else the truncated text
+    """
+    if len(text) <= max_length:
+        return text
+
+    omitted = len(text) - max_length
+    for _ in range(3):  # The marker's length depends on the count it shows
+        marker: Any = elision_marker(omitted)
+        if isinstance(text, bytes):
+            marker = marker.encode("utf-8")
+        keep = max_length - len(marker)
+        if len(text) - keep == omitted:
+            break
+        omitted = len(text) - keep
+    if keep <= 0:
+        return text[:max_length]
+
+    tail = keep // 3
+    head = keep - tail
+    return text[:head] + marker + text[len(text) - tail :]  # type: ignore[no-any-return]
+
+
+def _fair_share(lengths: Sequence[int], budget: int) -> int:
+    """Return the length cap that splits the budget fairly between values of the given lengths.
+
+    Values shorter than their share keep their length, and the rest of the budget is split
+    evenly between the longer ones.
+    """
+    remaining = len(lengths)
+    for length in sorted(lengths):
+        share = budget // remaining
+        if length > share:
+            return share
+        budget -= length
+        remaining -= 1
+    return budget
+
+
+def bound_values(values: Sequence[Any], max_length: int) -> Optional[List[Any]]:
+    """Return the values with their strings capped to a total of ``max_length``, or None if they fit."""
+    lengths = [len(value) for value in values if isinstance(value, (str, bytes))]
+    if sum(lengths) <= max_length:
+        return None
+    cap = _fair_share(lengths, max_length)
+    return [_truncate_value(value, cap) for value in values]
+
+
+def _truncate_value(value: Any, max_length: int) -> Any:
+    """Return the value capped at ``max_length`` if it is a string, else as is."""
+    if isinstance(value, str):
+        return truncate_middle(value, max_length)
+    if isinstance(value, bytes):
+        return truncate_middle(value, max_length)
+    return value
+
+
+def bound_record(record: logging.LogRecord, max_length: int) -> logging.LogRecord:
+    """Return the record with its message, or its string arguments, capped at ``max_length`` characters.
+
+    The string arguments share ``max_length`` fairly: the longest ones are truncated until
+    they fit together. The record is copied if anything is truncated, so other handlers
+    still get the full record. A message with arguments is left as is, since truncating it
+    could drop some of its placeholders, and so are arguments of other types; their text is
+    capped after formatting.
+
+    Args:
+        record: Record to bound
+        max_length: Maximum length of the message, or of its string arguments together
+
+    Returns:
+        The record itself if nothing needs to be truncated, else a truncated copy
+    """
+    msg, args = record.msg, record.args
+    if not args:
+        if not isinstance(msg, (str, bytes)) or len(msg) <= max_length:
+            return record
+        msg = _truncate_value(msg, max_length)
+    elif isinstance(args, Mapping):
+        values = bound_values(list(args.values()), max_length)
+        if values is None:
+            return record
+        args = dict(zip(args.keys(), values))
+    else:
+        values = bound_values(args, max_length)
+        if values is None:
+            return record
+        args = tuple(values)
+
+    bounded = copy.copy(record)
+    bounded.msg = msg
+    bounded.args = args  # type: ignore[assignment]
+    return bounded
+
+
+_HTML_TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>")
+# Escapes first, so that escaped entity characters are skipped
+_MARKDOWN_V2_TOKEN = re.compile(r"\\.|```|`|\|\||__|[*_~]", re.DOTALL)
+_MARKDOWN_TOKEN = re.compile(r"\\.|```|[*_`]", re.DOTALL)
+
+
+def _safe_cut(text: str, cut: int, parse_mode: ParseMode) -> int:
+    """Move the cut position back so that it does not split a tag, an entity or an escape sequence."""
+    head = text[:cut]
+    if parse_mode == ParseMode.HTML:
+        tag_start = head.rfind("<")
+        if tag_start > head.rfind(">"):
+            cut = tag_start
+        entity_start = head.rfind("&", 0, cut)
+        if entity_start > head.rfind(";", 0, cut):
+            cut = entity_start
+        return cut
+
+    # Do not split a run of entity characters such as ``` or __, nor a backslash from the character it escapes.
+    while 0 < cut < len(text) and text[cut - 1] in "`_|" and text[cut] == text[cut - 1]:
+        cut -= 1
+    backslashes = len(head[:cut]) - len(head[:cut].rstrip("\\"))
+    return cut - backslashes % 2
+
+
+def _closing_markup(head: str, parse_mode: ParseMode) -> str:
+    """Return the markup closing the entities left open at the end of the head."""
+    if parse_mode == ParseMode.HTML:
+        open_tags: List[str] = []
+        for tag in _HTML_TAG.finditer(head):
+            name = tag.group(2).lower()
+            if not tag.group(1):
+                open_tags.append(name)
+            elif name in open_tags:
+                del open_tags[len(open_tags) - 1 - open_tags[::-1].index(name) :]
+        return "".join(f"</{name}>" for name in reversed(open_tags))
+
+    pattern = _MARKDOWN_V2_TOKEN if parse_mode == ParseMode.MARKDOWN_V2 else _MARKDOWN_TOKEN
+    stack: List[str] = []
+    position = 0
+    while True:
+        if parse_mode == ParseMode.MARKDOWN and stack and stack[-1] in ("`", "```"):
+            # Legacy Markdown has no escapes inside code entities: only the delimiter ends them.
+            end = head.find(stack[-1], position)
+            if end < 0:
+                break
+            position = end + len(stack.pop())
+            continue
+        match = pattern.search(head, position)
+        if match is None:
+            break
+        position = match.end()
+        token = match.group()
+        if token.startswith("\\"):
+            continue
+        if stack and stack[-1] in ("`", "```"):
+            # Code entities only end with their own delimiter.
+            if token == stack[-1]:
+                stack.pop()
+        elif token in stack:
+            del stack[len(stack) - 1 - stack[::-1].index(token) :]
+        else:
+            stack.append(token)
+    return "".join(reversed(stack))
+
+
+def truncate_markup(text: str, max_length: int, parse_mode: Optional[ParseMode]) -> str:
+    """Cap formatted text at ``max_length`` without breaking its markup.
+
+    Unlike ``truncate_middle``, only the head of the text is kept, since the entities open
+    at the start of an arbitrary tail are unknown. The head is cut before any partial tag,
+    HTML entity or escape sequence, followed by the elision marker and by the markup that
+    closes the entities still open. If not even the closing markup fits, only the marker is
+    returned. Text without a parse mode is truncated in the middle.
+
+    Args:
+        text: Formatted text to cap
+        max_length: Maximum length of the result
+        parse_mode: Parse mode of the text
+
+    Returns:
+        The text itself if it is short enough, else its truncated head
+    """
+    if len(text) <= max_length:
+        return text
+    if parse_mode is None:
+        return truncate_middle(text, max_length)
+
+    reserve = 0
+    for _ in range(5):  # The marker and the closing markup depend on where the head is cut
+        cut = _safe_cut(text, max(max_length - reserve, 0), parse_mode)
+        head = text[:cut]
+        result = head + elision_marker(len(text) - cut) + _closing_markup(head, parse_mode)
+        if len(result) <= max_length:
+            return result
+        reserve = max(reserve + 1, len(result) - cut)
+    # The closing markup does not fit next to the marker: send the marker alone, which needs no markup.
+    return elision_marker(len(text)).strip()[:max_length]
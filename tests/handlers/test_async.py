@@ -1,13 +1,18 @@
 """Test the async handler."""
 
+import asyncio
+import json
 import logging
+import threading
 import time
-from unittest.mock import AsyncMock
+from unittest.mock import ANY, AsyncMock
 
+import aiohttp
 import pytest
 
+from python_telegram_logging.encoding import JSON_HEADERS
 from python_telegram_logging.handlers.async_ import AsyncTelegramHandler
-from python_telegram_logging.schemes import ParseMode
+from python_telegram_logging.schemes import TELEGRAM_MESSAGE_LIMIT, ParseMode
 
 
 @pytest.fixture
@@ -66,16 +71,14 @@ def test_emit(handler, mock_session):
     time.sleep(0.5)  # Increased sleep time to ensure processing
 
     # Since format_message returns a list of messages, the handler should make one API call per message
-    mock_session.post.assert_called_once_with(
-        handler._base_url,
-        json={
-            "chat_id": "test_chat_id",
-            "text": "Test message",
-            "parse_mode": ParseMode.HTML.value,
-            "disable_web_page_preview": True,
-            "disable_notification": False,
-        },
-    )
+    mock_session.post.assert_called_once_with(handler._base_url, data=ANY, headers=JSON_HEADERS)
+    assert json.loads(mock_session.post.call_args.kwargs["data"]) == {
+        "chat_id": "test_chat_id",
+        "text": "Test message",
+        "parse_mode": ParseMode.HTML.value,
+        "disable_web_page_preview": True,
+        "disable_notification": False,
+    }
 
 
 def test_close(handler, mock_session):
@@ -93,3 +96,217 @@ def test_close(handler, mock_session):
 
     # The session should be closed by the cleanup coroutine
     mock_session.close.assert_called_once()
+
+
+def test_chats_are_sent_concurrently(handler, mock_session):
+    """Test that a chat waiting for its rate limit does not block other chats."""
+    handler._session = mock_session
+
+    async def acquire(chat_id, slot=None):
+        if chat_id == "slow_chat":
+            await asyncio.sleep(0.5)
+        await slot.acquire()
+
+    handler._rate_limiter.acquire = acquire
+
+    for chat_id, text in [("slow_chat", "slow 1"), ("slow_chat", "slow 2"), ("fast_chat", "fast")]:
+        record = logging.LogRecord(
+            name="test_logger", level=logging.INFO, pathname="test.py", lineno=1, msg=text, args=(), exc_info=None
+        )
+        record.telegram_chat_id = chat_id
+        handler.emit(record)
+
+    time.sleep(0.4)
+    assert [json.loads(call.kwargs["data"])["text"] for call in mock_session.post.call_args_list] == ["fast"]
+
+    time.sleep(1.0)
+    texts = [json.loads(call.kwargs["data"])["text"] for call in mock_session.post.call_args_list]
+    assert texts == ["fast", "slow 1", "slow 2"]
+    assert json.loads(mock_session.post.call_args_list[1].kwargs["data"])["chat_id"] == "slow_chat"
+
+
+def test_batches_are_aggregated(mock_session):
+    """Test that a batch of queued records is sent through the pipeline as one message."""
+    from python_telegram_logging.pipeline import AggregateStage, RenderStage, SplitStage
+
+    handler = AsyncTelegramHandler(
+        token="test_token",
+        chat_id="test_chat_id",
+        batch_size=10,
+        pipeline=[RenderStage(), AggregateStage(separator=" "), SplitStage()],
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._session = mock_session
+    handler._rate_limiter.acquire = AsyncMock()
+    records = [
+        logging.LogRecord("test_logger", logging.INFO, "test.py", 1, msg, (), None) for msg in ["one", "two", "three"]
+    ]
+
+    try:
+        # Queue the records before the sender gets a chance to take the first one
+        for record in records:
+            handler.queue.put_nowait(record)
+        handler.queue.join()
+    finally:
+        handler.close()
+
+    texts = [json.loads(call.kwargs["data"])["text"] for call in mock_session.post.call_args_list]
+    assert " ".join(texts) == "one two three"
+
+
+def make_record(msg, name="test_logger", **attrs):
+    record = logging.LogRecord(name, logging.INFO, "test.py", 1, msg, (), None)
+    record.__dict__.update(attrs)
+    return record
+
+
+class BlockingSends:
+    """Replacement of ``_async_emit_batch`` that records the sent messages, blocking until released."""
+
+    def __init__(self, released=True, delay=0.0):
+        """Initialize the replacement."""
+        self.sent = []
+        self.released = threading.Event()
+        if released:
+            self.released.set()
+        self.delay = delay
+
+    async def __call__(self, records):
+        while not self.released.is_set():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(self.delay)
+        self.sent.extend(record.getMessage() for record in records)
+        return True
+
+
+def test_dispatched_records_count_against_queue_size():
+    """Test that records taken by the senders still take their place in the queue."""
+    handler = AsyncTelegramHandler(token="test_token", chat_id="test_chat_id", queue_size=10)
+    handler._async_emit_batch = sends = BlockingSends(released=False)
+    dropped = []
+    handler.handleError = dropped.append
+    try:
+        for i in range(15):
+            handler.emit(make_record(f"{i}"))
+        time.sleep(0.3)
+
+        assert handler.queue_depth() == 10
+        assert handler.saturation() == 1.0
+        assert [record.getMessage() for record in dropped] == [f"{i}" for i in range(10, 15)]
+        # One record is being sent, one is the sender's lookahead and one was taken past it.
+        assert handler.queue.qsize() == 7
+        assert handler.estimated_drain_time() == pytest.approx(handler.estimate_drain_time(10, "test_chat_id"))
+
+        sends.released.set()
+        time.sleep(0.3)
+        assert handler.queue_depth() == 0
+        assert handler.estimated_drain_time() == 0.0
+    finally:
+        handler.close()
+    assert sends.sent == [f"{i}" for i in range(10)]
+
+
+def test_drain_time_is_estimated_per_chat():
+    handler = AsyncTelegramHandler(token="test_token", chat_id="test_chat_id")
+    handler._async_emit_batch = sends = BlockingSends(released=False)
+    try:
+        for i in range(30):
+            handler.emit(make_record(f"{i}", telegram_chat_id="busy" if i % 3 else "quiet"))
+        time.sleep(0.3)
+
+        expected = max(handler.estimate_drain_time(20, "busy"), handler.estimate_drain_time(10, "quiet"))
+        assert handler.estimated_drain_time() == pytest.approx(expected)
+        assert handler.estimated_drain_time() < handler.estimate_drain_time(30, "test_chat_id")
+    finally:
+        sends.released.set()
+        handler.close()
+
+
+def test_status_updates_are_coalesced_at_send_time():
+    handler = AsyncTelegramHandler(token="test_token", chat_id="test_chat_id", enable_status_updates=True)
+    handler._async_emit_batch = sends = BlockingSends(released=False)
+    try:
+        for i in range(5):
+            handler.emit(make_record(f"progress {i}", telegram_status_key="job"))
+            time.sleep(0.15)
+        sends.released.set()
+        time.sleep(0.3)
+    finally:
+        handler.close()
+
+    assert sends.sent == ["progress 0", "progress 4"]
+
+
+def test_fair_queue_serves_quiet_loggers_first():
+    """Test that records stay in a FairQueue until the sender can send them."""
+    from python_telegram_logging.queues import FairQueue
+
+    handler = AsyncTelegramHandler(token="test_token", chat_id="test_chat_id", queue_class=FairQueue)
+    handler._async_emit_batch = sends = BlockingSends(released=False, delay=0.005)
+    try:
+        for i in range(60):
+            handler.emit(make_record(f"noisy {i}", name="noisy"))
+        time.sleep(0.3)
+        for i in range(5):
+            handler.emit(make_record(f"quiet {i}", name="quiet"))
+        sends.released.set()
+        deadline = time.monotonic() + 5
+        while len(sends.sent) < 65 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        handler.close()
+
+    assert len(sends.sent) == 65
+    assert sends.sent.index("quiet 0") < 5
+    assert [text for text in sends.sent if text.startswith("quiet")] == [f"quiet {i}" for i in range(5)]
+
+
+def test_idle_senders_are_stopped():
+    handler = AsyncTelegramHandler(token="test_token", chat_id="test_chat_id", sender_idle_timeout=0.5)
+    handler._async_emit_batch = sends = BlockingSends()
+    try:
+        for i in range(20):
+            handler.emit(make_record(f"{i}", telegram_chat_id=i))
+        time.sleep(0.3)
+        assert len(sends.sent) == 20
+        assert 0 < len(handler._senders) <= 20
+
+        time.sleep(0.6)
+        assert handler._senders == {}
+
+        handler.emit(make_record("again", telegram_chat_id=1))
+        time.sleep(0.3)
+        assert sends.sent[-1] == "again"
+    finally:
+        handler.close()
+
+
+def test_parts_sent_before_a_connection_failure_are_not_resent():
+    """Test that a record whose second part failed is replayed from that part on."""
+    handler = AsyncTelegramHandler(token="test_token", chat_id="test_chat_id", max_message_length=None)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    sent = []
+    failures = [aiohttp.ClientError("down")]
+
+    async def send_envelope(envelope):
+        if len(sent) == 1 and failures:
+            raise failures.pop()
+        sent.append(envelope.text)
+
+    handler._async_send_envelope = send_envelope
+    handler._session = AsyncMock()
+    handler.handle_error = lambda error: None
+    parts = ["a" * TELEGRAM_MESSAGE_LIMIT, "b" * TELEGRAM_MESSAGE_LIMIT, "c" * 100]
+    try:
+        record = make_record("".join(parts))
+        assert asyncio.run(handler._async_emit_batch([record])) is False
+        assert sent == parts[:1]
+        assert len(handler._parked) == 1
+
+        parked = handler.take_parked_records()
+        assert asyncio.run(handler._async_emit_batch(parked)) is True
+    finally:
+        handler.close()
+
+    assert sent == parts
+    assert record.getMessage() == "".join(parts)
@@ -0,0 +1,118 @@
+"""Test the context buffering handler."""
+
+import asyncio
+import logging
+from unittest.mock import patch
+
+import pytest
+
+from python_telegram_logging.formatters import ESCAPED_ATTR
+from python_telegram_logging.handlers.context import ContextBufferingHandler, log_context
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+from python_telegram_logging.schemes import ParseMode
+
+
+def make_record(msg, level=logging.INFO, name="app"):
+    return logging.LogRecord(name=name, level=level, pathname="test.py", lineno=1, msg=msg, args=(), exc_info=None)
+
+
+@pytest.fixture
+def handler():
+    base_handler = SyncTelegramHandler(token="test_token", chat_id="test_chat_id", parse_mode=ParseMode.HTML)
+    base_handler.setFormatter(logging.Formatter("%(message)s"))
+    handler = ContextBufferingHandler(base_handler, capacity=3, max_records=5)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    with patch.object(base_handler, "handle") as mock_handle:
+        yield handler, mock_handle
+        handler.close()
+
+
+def sent_messages(mock_handle):
+    return [call.args[0].getMessage() for call in mock_handle.call_args_list]
+
+
+def test_clean_context_sends_nothing(handler):
+    handler, mock_handle = handler
+    with handler.context("request-1"):
+        handler.handle(make_record("step 1"))
+        handler.handle(make_record("step 2", level=logging.WARNING))
+        assert handler.buffered_records() == 2
+
+    mock_handle.assert_not_called()
+    assert handler.buffered_records() == 0
+
+
+def test_error_sends_the_context_in_one_message(handler):
+    handler, mock_handle = handler
+    error = make_record("payment <failed>", level=logging.ERROR)
+    with handler.context("request-1"):
+        for i in range(5):
+            handler.handle(make_record(f"step {i}"))
+        handler.handle(error)
+        assert handler.buffered_records() == 0
+
+    (sent,) = mock_handle.call_args_list
+    record = sent.args[0]
+    assert record is not error
+    assert record.levelno == logging.ERROR and getattr(record, ESCAPED_ATTR)
+    assert record.getMessage() == (
+        "payment &lt;failed&gt;\n\nContext (3 records):\nINFO step 2\nINFO step 3\nINFO step 4"
+    )
+    assert error.getMessage() == "payment <failed>"
+
+
+def test_contexts_are_buffered_separately(handler):
+    handler, mock_handle = handler
+
+    async def request(key, fail):
+        with handler.context(key):
+            handler.handle(make_record(f"{key} started"))
+            await asyncio.sleep(0)
+            if fail:
+                handler.handle(make_record(f"{key} failed", level=logging.ERROR))
+
+    async def main():
+        await asyncio.gather(request("a", False), request("b", True))
+
+    asyncio.run(main())
+
+    assert sent_messages(mock_handle) == ["b failed\n\nContext (1 records):\nINFO b started"]
+
+
+def test_errors_outside_a_context_are_sent_alone(handler):
+    handler, mock_handle = handler
+    error = make_record("boom", level=logging.ERROR)
+    handler.handle(make_record("dropped"))
+    handler.handle(error)
+
+    assert [call.args[0] for call in mock_handle.call_args_list] == [error]
+    assert handler.buffered_records() == 0
+
+
+def test_global_cap_drops_records_of_the_least_recent_context(handler):
+    handler, mock_handle = handler
+    for key, count in (("a", 3), ("b", 2), ("c", 1)):
+        token = log_context.set(key)
+        for i in range(count):
+            handler.handle(make_record(f"{key}{i}"))
+        log_context.reset(token)
+
+    assert handler.buffered_records() == 5
+    token = log_context.set("a")
+    handler.handle(make_record("a failed", level=logging.ERROR))
+    log_context.reset(token)
+
+    assert sent_messages(mock_handle) == ["a failed\n\nContext (2 records):\nINFO a1\nINFO a2"]
+
+
+def test_long_context_keeps_the_latest_records(handler):
+    handler, mock_handle = handler
+    handler.capacity = 10
+    with handler.context("request-1"):
+        for i in range(3):
+            handler.handle(make_record(f"{i}" * 2000))
+        handler.handle(make_record("failed", level=logging.ERROR))
+
+    message = sent_messages(mock_handle)[0]
+    assert message.startswith("failed\n\nContext (1 records, 2 earlier omitted):\n")
+    assert message.endswith("2" * 2000)
@@ -0,0 +1,96 @@
+"""Test the digest handler."""
+
+import logging
+from unittest.mock import patch
+
+import pytest
+
+from python_telegram_logging.handlers.base_telegram import TELEGRAM_MESSAGE_LIMIT
+from python_telegram_logging.handlers.digest import DigestTelegramHandler
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+from python_telegram_logging.schemes import ParseMode
+
+
+def make_record(msg, args=(), name="test_logger", level=logging.WARNING, created=None):
+    record = logging.LogRecord(name=name, level=level, pathname="test.py", lineno=1, msg=msg, args=args, exc_info=None)
+    if created is not None:
+        record.created = created
+    return record
+
+
+@pytest.fixture
+def base_handler():
+    handler = SyncTelegramHandler(token="test_token", chat_id="test_chat_id", parse_mode=ParseMode.HTML)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
+
+
+@pytest.fixture
+def handler(base_handler):
+    handler = DigestTelegramHandler(base_handler, interval=3600, max_templates=2, max_exemplars=2)
+    yield handler
+    with patch.object(handler.handler, "handle"):
+        handler.close()
+
+
+def test_aggregates_by_template(handler):
+    for i in range(5):
+        handler.handle(make_record("Slow query took %s ms", (i,), created=1000.0 + i))
+    handler.handle(make_record("Cache miss", level=logging.INFO))
+
+    assert len(handler._entries) == 2
+    entry = handler._entries[("test_logger", logging.WARNING, "Slow query took %s ms")]
+    assert entry.count == 5
+    assert entry.first_seen == 1000.0
+    assert entry.last_seen == 1004.0
+    assert entry.exemplars == ["Slow query took 0 ms", "Slow query took 1 ms"]
+
+
+def test_template_cap(handler):
+    for i in range(10):
+        handler.handle(make_record(f"Template {i}"))
+
+    assert len(handler._entries) == 2
+    assert handler._overflow_count == 8
+
+
+def test_template_length_cap(base_handler):
+    handler = DigestTelegramHandler(base_handler, interval=3600, max_template_length=20)
+    for i in range(50):
+        handler.handle(make_record(f"Request failed: {'x' * 1000} #{i}"))
+
+    (key,) = handler._entries
+    assert key[2] == "Request failed: xxxx"
+    assert handler._entries[key].count == 50
+    with patch.object(handler.handler, "handle"):
+        handler.close()
+
+
+def test_flush_sends_single_digest(handler):
+    for i in range(1000):
+        handler.handle(make_record("Value <%s>", (i,)))
+    handler.handle(make_record("Failure", level=logging.ERROR))
+
+    with patch.object(handler.handler, "handle") as mock_handle:
+        handler.flush()
+        handler.flush()  # Nothing collected since the previous digest
+
+    mock_handle.assert_called_once()
+    digest = mock_handle.call_args.args[0]
+    assert digest.levelno == logging.ERROR
+    text = digest.getMessage()
+    assert "1001 records, 2 templates" in text
+    assert "× 1000" in text
+    assert "Value &lt;%s&gt;" in text
+    assert len(text) <= TELEGRAM_MESSAGE_LIMIT
+
+
+def test_close_sends_remaining_digest(base_handler):
+    handler = DigestTelegramHandler(base_handler, interval=3600)
+    handler.handle(make_record("Pending"))
+
+    with patch.object(handler.handler, "handle") as mock_handle:
+        handler.close()
+
+    mock_handle.assert_called_once()
+    assert not handler._worker.is_alive()
@@ -11,6 +11,7 @@ import pytest
 from python_telegram_logging.handlers.async_ import AsyncTelegramHandler
 from python_telegram_logging.handlers.queue import QueuedTelegramHandler
 from python_telegram_logging.handlers.sync import SyncTelegramHandler
+from python_telegram_logging.queues import RingBufferQueue
 from python_telegram_logging.schemes import ParseMode
 
 
@@ -134,3 +135,109 @@ def test_handler_cleanup(handler):
     with patch.object(handler.handler, "close") as mock_close:
         handler.close()
         mock_close.assert_called_once()
+
+
+def test_status_updates_are_coalesced():
+    base_handler = SyncTelegramHandler(token="test_token", chat_id="test_chat_id", enable_status_updates=True)
+    handler = QueuedTelegramHandler(base_handler, queue_size=10)
+    can_continue = threading.Event()
+    handled = []
+
+    def blocking_handle(record):
+        can_continue.wait(timeout=1.0)
+        handled.append(record.getMessage())
+
+    with patch.object(handler.handler, "handle", side_effect=blocking_handle):
+        for i in range(4):
+            record = logging.LogRecord(
+                name="test_logger",
+                level=logging.INFO,
+                pathname="test.py",
+                lineno=1,
+                msg=f"Step {i}",
+                args=(),
+                exc_info=None,
+            )
+            record.telegram_status_key = "job"
+            handler.emit(record)
+        can_continue.set()
+        time.sleep(0.3)
+
+    # The first update may already be in progress, the intermediate ones are skipped.
+    assert handled[-1] == "Step 3"
+    assert len(handled) <= 2
+    handler.close()
+
+
+def test_status_updates_are_coalesced_per_chat():
+    base_handler = SyncTelegramHandler(token="test_token", chat_id="test_chat_id", enable_status_updates=True)
+    handler = QueuedTelegramHandler(base_handler, queue_size=10)
+    can_continue = threading.Event()
+    handled = []
+
+    def blocking_handle(record):
+        can_continue.wait(timeout=1.0)
+        handled.append(record.getMessage())
+
+    with patch.object(handler.handler, "handle", side_effect=blocking_handle):
+        handler.emit(logging.LogRecord("test_logger", logging.INFO, "test.py", 1, "Busy", (), None))
+        for chat_id in ["first", "second"]:
+            record = logging.LogRecord("test_logger", logging.INFO, "test.py", 1, f"Done in {chat_id}", (), None)
+            record.telegram_status_key = "job"
+            record.telegram_chat_id = chat_id
+            handler.emit(record)
+        can_continue.set()
+        time.sleep(0.3)
+
+    # Neither chat's update supersedes the other's
+    assert handled == ["Busy", "Done in first", "Done in second"]
+    handler.close()
+
+
+def test_ring_buffer_queue(base_handler):
+    handler = QueuedTelegramHandler(base_handler, queue_class=RingBufferQueue)
+    record = logging.LogRecord(
+        name="test_logger", level=logging.INFO, pathname="test.py", lineno=1, msg="Test message", args=(), exc_info=None
+    )
+
+    with patch.object(handler.handler, "handle") as mock_handle:
+        handler.handle(record)
+        time.sleep(0.1)
+        mock_handle.assert_called_once_with(record)
+
+    assert isinstance(handler.queue, RingBufferQueue)
+    handler.close()
+
+
+def test_backpressure_api(base_handler):
+    transitions = []
+    handler = QueuedTelegramHandler(
+        base_handler,
+        queue_size=10,
+        saturation_callback=lambda saturated, level: transitions.append((saturated, level)),
+        saturation_high=0.5,
+        saturation_low=0.2,
+    )
+    can_continue = threading.Event()
+
+    with patch.object(handler.handler, "handle", side_effect=lambda record: can_continue.wait(timeout=1.0)):
+        for i in range(7):
+            record = logging.LogRecord(
+                name="test_logger", level=logging.INFO, pathname="test.py", lineno=1, msg=f"{i}", args=(), exc_info=None
+            )
+            handler.emit(record)
+        time.sleep(0.1)
+
+        # One record is being handled by the worker, the rest is queued.
+        assert handler.queue_depth() == 6
+        assert handler.saturation() == pytest.approx(0.6)
+        assert handler.is_saturated()
+        assert handler.estimated_drain_time() == pytest.approx(5.0, abs=0.1)
+
+        can_continue.set()
+        time.sleep(0.3)
+
+    assert handler.queue_depth() == 0
+    assert not handler.is_saturated()
+    assert [saturated for saturated, _ in transitions] == [True, False]
+    handler.close()
@@ -1,11 +1,16 @@
+import json
 import logging
-from unittest.mock import Mock, patch
+import threading
+import time
+from unittest.mock import ANY, Mock, patch
 
 import pytest
 
+from python_telegram_logging.encoding import JSON_HEADERS
+from python_telegram_logging.exceptions import WouldBlockError
 from python_telegram_logging.handlers.base_telegram import TELEGRAM_MESSAGE_LIMIT
-from python_telegram_logging.handlers.sync import SyncTelegramHandler
-from python_telegram_logging.schemes import ParseMode
+from python_telegram_logging.handlers.sync import SyncRateLimiter, SyncTelegramHandler
+from python_telegram_logging.schemes import ParseMode, WouldBlockPolicy
 
 
 @pytest.fixture
@@ -26,7 +31,7 @@ def test_emit(handler):
     mock_response.ok = True
     mock_response.status_code = 200
 
-    with patch("python_telegram_logging.handlers.sync.requests.post", return_value=mock_response) as mock_post:
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", return_value=mock_response) as mock_post:
         record = logging.LogRecord(
             name="test_logger",
             level=logging.INFO,
@@ -40,16 +45,14 @@ def test_emit(handler):
         handler.emit(record)
 
         # Since format_message returns a list of messages, the handler should make one API call per message
-        mock_post.assert_called_once_with(
-            handler._base_url,
-            json={
-                "chat_id": "test_chat_id",
-                "text": "Test message",
-                "parse_mode": ParseMode.HTML.value,
-                "disable_web_page_preview": True,
-                "disable_notification": False,
-            },
-        )
+        mock_post.assert_called_once_with(handler._base_url, data=ANY, headers=JSON_HEADERS, timeout=(5.0, 10.0))
+        assert json.loads(mock_post.call_args.kwargs["data"]) == {
+            "chat_id": "test_chat_id",
+            "text": "Test message",
+            "parse_mode": ParseMode.HTML.value,
+            "disable_web_page_preview": True,
+            "disable_notification": False,
+        }
 
 
 def test_emit_long_message(handler):
@@ -59,7 +62,7 @@ def test_emit_long_message(handler):
 
     MESSAGE_LENGTH = TELEGRAM_MESSAGE_LIMIT + TELEGRAM_MESSAGE_LIMIT // 2
 
-    with patch("python_telegram_logging.handlers.sync.requests.post", return_value=mock_response) as mock_post:
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", return_value=mock_response) as mock_post:
         record = logging.LogRecord(
             name="test_logger",
             level=logging.INFO,
@@ -77,6 +80,158 @@ def test_emit_long_message(handler):
         calls = mock_post.call_args_list
 
         # First chunk
-        assert len(calls[0].kwargs["json"]["text"]) == TELEGRAM_MESSAGE_LIMIT
+        assert len(json.loads(calls[0].kwargs["data"])["text"]) == TELEGRAM_MESSAGE_LIMIT
         # Second chunk
-        assert len(calls[1].kwargs["json"]["text"]) == MESSAGE_LENGTH - TELEGRAM_MESSAGE_LIMIT
+        assert len(json.loads(calls[1].kwargs["data"])["text"]) == MESSAGE_LENGTH - TELEGRAM_MESSAGE_LIMIT
+
+
+def test_status_updates_edit_previous_message():
+    handler = SyncTelegramHandler(token="test_token", chat_id="test_chat_id", enable_status_updates=True)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    sent_response = Mock(ok=True, status_code=200, text="")
+    sent_response.json.return_value = {"ok": True, "result": {"message_id": 42}}
+    edited_response = Mock(ok=True, status_code=200, text="")
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", side_effect=[sent_response, edited_response]
+    ) as mock_post:
+        for progress in (10, 20):
+            record = logging.LogRecord(
+                name="test_logger",
+                level=logging.INFO,
+                pathname="test.py",
+                lineno=1,
+                msg="Progress %s%%",
+                args=(progress,),
+                exc_info=None,
+            )
+            record.telegram_status_key = "job"
+            handler.emit(record)
+
+    assert mock_post.call_count == 2
+    send_call, edit_call = mock_post.call_args_list
+    assert send_call.args[0] == handler._base_url
+    assert edit_call.args[0] == handler._edit_url
+    assert json.loads(edit_call.kwargs["data"])["message_id"] == 42
+    assert json.loads(edit_call.kwargs["data"])["text"] == "Progress 20%"
+
+
+def test_status_cache_is_bounded():
+    handler = SyncTelegramHandler(
+        token="test_token", chat_id="test_chat_id", enable_status_updates=True, status_cache_size=2
+    )
+    for message_id, key in enumerate(["a", "b", "c"]):
+        handler.remember_status_message(key, (message_id, "test_token"))
+
+    assert handler.get_status_message("a") is None
+    assert handler.get_status_message("b") == (1, "test_token")
+    assert handler.get_status_message("c") == (2, "test_token")
+
+
+class BlockingClock:
+    """Clock whose sleep advances the time, recording the sleeping threads, once released."""
+
+    def __init__(self):
+        """Start with sleeps released."""
+        self.now = 1000.0
+        self.sleepers = []
+        self.released = threading.Event()
+        self.released.set()
+
+    def get_time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleepers.append(threading.current_thread())
+        self.released.wait(5)
+        self.now += seconds
+
+
+def make_non_blocking_handler(clock, **kwargs):
+    handler = SyncTelegramHandler(token="test_token", chat_id="test_chat_id", non_blocking=True, **kwargs)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._rate_limiter = SyncRateLimiter(time_provider=clock, sleep=clock.sleep)
+    return handler
+
+
+def make_record(msg, **attrs):
+    record = logging.LogRecord("test_logger", logging.INFO, "test.py", 1, msg, (), None)
+    record.__dict__.update(attrs)
+    return record
+
+
+def test_non_blocking_handler_hands_off_rate_limited_messages():
+    clock = BlockingClock()
+    handler = make_non_blocking_handler(clock)
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", return_value=Mock(ok=True, status_code=200)
+    ) as mock_post:
+        for msg in ["one", "two", "three"]:
+            handler.emit(make_record(msg))
+        handler._handoff.join()
+
+    assert [json.loads(call.kwargs["data"])["text"] for call in mock_post.call_args_list] == ["one", "two", "three"]
+    assert clock.sleepers and threading.main_thread() not in clock.sleepers
+    handler.close()
+
+
+def test_non_blocking_handler_keeps_the_order_behind_handed_off_messages():
+    clock = BlockingClock()
+    handler = make_non_blocking_handler(clock)
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", return_value=Mock(ok=True, status_code=200)
+    ) as mock_post:
+        clock.released.clear()
+        handler.emit(make_record("one"))
+        handler.emit(make_record("two"))  # Waits in the background sender
+        handler.emit(make_record("other chat", telegram_chat_id=7))  # Could be sent now, but not before "two"
+        deadline = time.monotonic() + 2
+        while not clock.sleepers and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert mock_post.call_count == 1
+        clock.released.set()
+        handler._handoff.join()
+
+    texts = [json.loads(call.kwargs["data"])["text"] for call in mock_post.call_args_list]
+    assert texts == ["one", "two", "other chat"]
+    handler.close()
+
+
+def test_non_blocking_handler_sheds_rate_limited_messages():
+    clock = BlockingClock()
+    errors = []
+    handler = make_non_blocking_handler(clock, would_block_policy=WouldBlockPolicy.SHED, error_callback=errors.append)
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", return_value=Mock(ok=True, status_code=200)
+    ) as mock_post:
+        handler.emit(make_record("one"))
+        handler.emit(make_record("two"))
+        handler._handoff.join()
+
+    assert mock_post.call_count == 1
+    assert [type(error) for error in errors] == [WouldBlockError]
+    assert errors[0].wait_time == 1.0
+    assert not clock.sleepers
+    handler.close()
+
+
+def test_non_blocking_handler_does_not_wait_for_slow_requests():
+    def slow_post(*args, **kwargs):
+        time.sleep(0.5)
+        return Mock(ok=True, status_code=200)
+
+    handler = make_non_blocking_handler(BlockingClock())
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", side_effect=slow_post) as mock_post:
+        start = time.monotonic()
+        for msg in ["one", "two"]:
+            handler.emit(make_record(msg))
+        assert time.monotonic() - start < 0.1
+
+        handler._handoff.join()
+
+    assert [json.loads(call.kwargs["data"])["text"] for call in mock_post.call_args_list] == ["one", "two"]
+    handler.close()
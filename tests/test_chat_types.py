@@ -0,0 +1,115 @@
+"""Test chat type detection and the chat type limit profiles."""
+
+import json
+import logging
+import time
+from unittest.mock import Mock, patch
+
+from python_telegram_logging.chat_types import ChatTypeCache
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+from python_telegram_logging.rate_limiting import CHAT_TYPE_LIMITS
+from python_telegram_logging.schemes import ChatType
+
+
+class FakeClock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_record(msg="message"):
+    return logging.LogRecord("test", logging.ERROR, "test.py", 1, msg, (), None)
+
+
+def fake_post(chat_type):
+    def post(url, data, headers, timeout):
+        if url.endswith("/getChat"):
+            response = Mock(ok=True, status_code=200, text="")
+            response.json.return_value = {"ok": True, "result": {"id": json.loads(data)["chat_id"], "type": chat_type}}
+            return response
+        return Mock(ok=True, status_code=200)
+
+    return post
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_cache_expires_entries():
+    clock = FakeClock()
+    cache = ChatTypeCache(ttl=60.0, clock=clock)
+    cache.set(42, ChatType.PRIVATE)
+
+    assert cache.get(42) == ChatType.PRIVATE
+    assert cache.get("42") == ChatType.PRIVATE
+    clock.now += 60.0
+    assert cache.get(42) is None
+
+
+def test_cache_is_persisted(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "chat_types.json")
+    ChatTypeCache(ttl=60.0, path=path, clock=clock).set(42, ChatType.CHANNEL)
+
+    assert ChatTypeCache(ttl=60.0, path=path, clock=clock).get(42) == ChatType.CHANNEL
+    clock.now += 60.0
+    assert ChatTypeCache(ttl=60.0, path=path, clock=clock).get(42) is None
+
+
+def test_corrupt_cache_file_is_ignored(tmp_path):
+    path = tmp_path / "chat_types.json"
+    path.write_text("not json")
+
+    assert ChatTypeCache(path=str(path)).get(42) is None
+
+
+def test_handler_looks_up_chat_type_once_and_applies_profile():
+    handler = SyncTelegramHandler(token="token", chat_id=42, detect_chat_types=True)
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", side_effect=fake_post("private")
+    ) as mock_post:
+        handler.emit(make_record())
+        assert wait_for(lambda: handler._applied_chat_types.get(42) == ChatType.PRIVATE)
+        handler.emit(make_record())
+
+    urls = [call.args[0] for call in mock_post.call_args_list]
+    assert sum(url.endswith("/getChat") for url in urls) == 1
+    assert sum(url.endswith("/sendMessage") for url in urls) == 2
+    assert handler._rate_limiter._chat_states[42].max_per_window == CHAT_TYPE_LIMITS[ChatType.PRIVATE].max_per_window
+
+
+def test_cached_chat_type_is_used_without_lookup():
+    cache = ChatTypeCache()
+    cache.set(42, ChatType.SUPERGROUP)
+    handler = SyncTelegramHandler(token="token", chat_id=42, detect_chat_types=True, chat_type_cache=cache)
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", side_effect=fake_post("private")
+    ) as mock_post:
+        handler.emit(make_record())
+
+    assert [call.args[0].rsplit("/", 1)[1] for call in mock_post.call_args_list] == ["sendMessage"]
+    assert handler._applied_chat_types[42] == ChatType.SUPERGROUP
+
+
+def test_failed_lookup_is_not_retried_immediately():
+    errors = []
+    handler = SyncTelegramHandler(token="token", chat_id=42, detect_chat_types=True, error_callback=errors.append)
+
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", side_effect=fake_post("unknown")):
+        handler.emit(make_record())
+        assert wait_for(lambda: handler._chat_type_lookups.get(42, float("inf")) != float("inf"))
+
+    assert not handler.needs_chat_type_lookup(42)
+    assert 42 not in handler._applied_chat_types
+
+
+def test_detection_is_disabled_by_default():
+    handler = SyncTelegramHandler(token="token", chat_id=42)
+    assert not handler.needs_chat_type_lookup(42)
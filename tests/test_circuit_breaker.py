@@ -0,0 +1,198 @@
+"""Test the circuit breaker and request timeouts."""
+
+import json
+import logging
+from unittest.mock import Mock, patch
+
+import requests
+
+from python_telegram_logging.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from python_telegram_logging.exceptions import CircuitOpenError
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+from python_telegram_logging.schemes import TELEGRAM_MESSAGE_LIMIT, CircuitOpenPolicy, CircuitState
+
+
+class FakeClock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_record(msg):
+    return logging.LogRecord("test", logging.ERROR, "test.py", 1, msg, (), None)
+
+
+def make_handler(clock, **kwargs):
+    handler = SyncTelegramHandler(token="test_token", chat_id="test_chat_id", **kwargs)
+    # Isolate the test from the process-wide breaker of api.telegram.org
+    handler._circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=clock)
+    return handler
+
+
+def test_opens_after_threshold_and_half_opens_after_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+
+    clock.now += 30.0
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+    # Only one probe at a time
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=clock)
+    breaker.record_failure()
+    clock.now += 10.0
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+
+
+def test_registry_shares_breaker_per_host():
+    assert get_circuit_breaker("example.org") is get_circuit_breaker("example.org")
+    assert get_circuit_breaker("example.org") is not get_circuit_breaker("example.com")
+
+
+def test_registry_keeps_the_settings_of_each_handler():
+    breaker = get_circuit_breaker("example.org", failure_threshold=2, reset_timeout=5.0)
+
+    assert breaker is not get_circuit_breaker("example.org")
+    assert breaker is get_circuit_breaker("example.org", failure_threshold=2, reset_timeout=5.0)
+    assert (breaker.failure_threshold, breaker.reset_timeout) == (2, 5.0)
+    handler = SyncTelegramHandler(
+        token="test_token", chat_id="test_chat_id", circuit_failure_threshold=3, circuit_reset_timeout=7.0
+    )
+    assert (handler._circuit_breaker.failure_threshold, handler._circuit_breaker.reset_timeout) == (3, 7.0)
+    handler.close()
+
+
+def test_parks_records_while_open_and_replays_them():
+    clock = FakeClock()
+    handler = make_handler(clock)
+    ok_response = Mock(ok=True, status_code=200)
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", side_effect=requests.ConnectionError("down")
+    ) as mock_post:
+        handler.emit(make_record("first"))
+        handler.emit(make_record("second"))
+        handler.emit(make_record("third"))
+
+    # The third record is parked without a request
+    assert mock_post.call_count == 2
+    assert handler._circuit_breaker.state == CircuitState.OPEN
+    assert [record.msg for record in handler._parked] == ["first", "second", "third"]
+
+    clock.now += 30.0
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", return_value=ok_response) as mock_post:
+        handler.emit(make_record("fourth"))
+
+    texts = [json.loads(call.kwargs["data"])["text"] for call in mock_post.call_args_list]
+    assert texts == ["fourth", "first", "second", "third"]
+    assert not handler._parked
+    assert handler._circuit_breaker.state == CircuitState.CLOSED
+
+
+def test_non_blocking_handler_closes_the_circuit_after_an_outage():
+    clock = FakeClock()
+    handler = make_handler(clock, non_blocking=True)
+    handler._circuit_breaker.failure_threshold = 1
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", side_effect=requests.ConnectionError("down")
+    ):
+        handler.emit(make_record("first"))
+        handler._handoff.join()
+    assert handler._circuit_breaker.state == CircuitState.OPEN
+    assert len(handler._parked) == 1
+
+    clock.now += 30.0
+    ok_response = Mock(ok=True, status_code=200)
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", return_value=ok_response) as mock_post:
+        handler.emit(make_record("second"))
+        handler._handoff.join()
+
+    texts = [json.loads(call.kwargs["data"])["text"] for call in mock_post.call_args_list]
+    assert texts == ["second", "first"]
+    assert handler._circuit_breaker.state == CircuitState.CLOSED
+    assert len(handler._parked) == 0
+    handler.close()
+
+
+def test_non_blocking_handler_parks_only_the_unsent_parts():
+    handler = make_handler(FakeClock(), non_blocking=True, max_message_length=None)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    parts = ["a" * TELEGRAM_MESSAGE_LIMIT, "b" * TELEGRAM_MESSAGE_LIMIT, "c" * 100]
+    responses = [Mock(ok=True, status_code=200), requests.ConnectionError("down")]
+
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", side_effect=responses) as mock_post:
+        handler.emit(make_record("".join(parts)))
+        handler._handoff.join()
+    assert mock_post.call_count == 2
+    assert len(handler._parked) == 1
+
+    ok_response = Mock(ok=True, status_code=200)
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", return_value=ok_response) as mock_post:
+        handler.emit(make_record("next"))
+        handler._handoff.join()
+
+    texts = [json.loads(call.kwargs["data"])["text"] for call in mock_post.call_args_list]
+    assert texts == ["next"] + parts[1:]
+    assert not handler._parked
+    handler.close()
+
+
+def test_server_errors_open_the_circuit():
+    clock = FakeClock()
+    handler = make_handler(clock)
+    error_response = Mock(ok=False, status_code=502, text="Bad Gateway")
+    error_response.json.side_effect = ValueError
+
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", return_value=error_response):
+        handler.emit(make_record("first"))
+        handler.emit(make_record("second"))
+
+    assert handler._circuit_breaker.state == CircuitState.OPEN
+
+
+def test_shed_policy_reports_dropped_records():
+    clock = FakeClock()
+    errors = []
+    handler = make_handler(clock, circuit_open_policy=CircuitOpenPolicy.SHED, error_callback=errors.append)
+    handler._circuit_breaker.record_failure()
+    handler._circuit_breaker.record_failure()
+
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post") as mock_post:
+        handler.emit(make_record("dropped"))
+
+    mock_post.assert_not_called()
+    assert not handler._parked
+    assert len(errors) == 1
+    assert isinstance(errors[0], CircuitOpenError)
+
+
+def test_parked_records_are_bounded():
+    clock = FakeClock()
+    handler = make_handler(clock, max_parked_records=2)
+    handler._circuit_breaker.record_failure()
+    handler._circuit_breaker.record_failure()
+
+    for msg in ("first", "second", "third"):
+        handler.emit(make_record(msg))
+
+    assert [record.msg for record in handler._parked] == ["second", "third"]
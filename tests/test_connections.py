@@ -0,0 +1,133 @@
+"""Test connection reuse, pre-warming and keep-alive requests."""
+
+import json
+import logging
+import math
+import time
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+from python_telegram_logging.exceptions import TelegramAPIError
+from python_telegram_logging.handlers.async_ import AsyncTelegramHandler
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+
+
+def make_record(msg="message"):
+    return logging.LogRecord("test", logging.ERROR, "test.py", 1, msg, (), None)
+
+
+def fake_post(status=200):
+    def post(url, data=None, headers=None, timeout=None):
+        response = Mock(ok=status < 400, status_code=status, text="")
+        response.json.return_value = {"ok": status < 400, "result": {}}
+        return response
+
+    return post
+
+
+def methods(mock_post):
+    return [call.args[0].rsplit("/", 1)[1] for call in mock_post.call_args_list]
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_sync_handler_reuses_one_session():
+    handler = SyncTelegramHandler(token="token", chat_id=42)
+
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", side_effect=fake_post()) as mock_post:
+        handler.emit(make_record("one"))
+        handler.emit(make_record("two"))
+
+    assert methods(mock_post) == ["sendMessage", "sendMessage"]
+    assert [json.loads(call.kwargs["data"])["text"] for call in mock_post.call_args_list] == ["one", "two"]
+    handler.close()
+
+
+def test_sync_handler_prewarms_every_token():
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", side_effect=fake_post()) as mock_post:
+        handler = SyncTelegramHandler(token="token", chat_id=42, shard_tokens=["other"], prewarm_connections=True)
+        assert wait_for(lambda: mock_post.call_count == 2)
+
+    urls = sorted(call.args[0] for call in mock_post.call_args_list)
+    assert urls == ["https://api.telegram.org/botother/getMe", "https://api.telegram.org/bottoken/getMe"]
+    handler.close()
+
+
+def test_prewarm_failures_are_reported():
+    errors = []
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", side_effect=fake_post(401)):
+        handler = SyncTelegramHandler(token="token", chat_id=42, prewarm_connections=True, error_callback=errors.append)
+        assert wait_for(lambda: errors)
+
+    assert isinstance(errors[0], TelegramAPIError)
+    handler.close()
+
+
+def test_keepalive_requests_are_sent_while_idle():
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", side_effect=fake_post()) as mock_post:
+        handler = SyncTelegramHandler(token="token", chat_id=42, keepalive_interval=0.05)
+        assert wait_for(lambda: mock_post.call_count >= 2)
+        handler.close()
+        count = mock_post.call_count
+        time.sleep(0.1)
+
+    assert set(methods(mock_post)) == {"getMe"}
+    assert mock_post.call_count == count
+
+
+def test_keepalive_delay_follows_the_last_request():
+    handler = SyncTelegramHandler(token="token", chat_id=42)
+    assert handler.keepalive_delay() == math.inf
+
+    handler.keepalive_interval = 30.0
+    assert handler.keepalive_delay() == 0.0
+    handler.note_request()
+    assert 29.0 < handler.keepalive_delay() <= 30.0
+    handler.close()
+
+
+def test_connections_are_not_shared_with_a_forked_child():
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", side_effect=fake_post()) as mock_post:
+        handler = SyncTelegramHandler(token="token", chat_id=42, prewarm_connections=True)
+        assert wait_for(lambda: mock_post.call_count == 1)
+        session = handler._session
+
+        handler._after_fork_in_child()
+        assert handler._session is not session
+        assert handler._maintenance_restart_needed
+
+        handler.emit(make_record())
+        assert wait_for(lambda: mock_post.call_count == 3)
+
+    assert sorted(methods(mock_post)) == ["getMe", "getMe", "sendMessage"]
+    assert not handler._maintenance_restart_needed
+    handler.close()
+
+
+def make_aiohttp_session():
+    response = Mock(ok=True, status=200)
+    response.text = AsyncMock(return_value='{"ok": true, "result": {}}')
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=response)
+    context.__aexit__ = AsyncMock(return_value=None)
+    session = Mock()
+    session.post = Mock(return_value=context)
+    session.close = AsyncMock()
+    return session
+
+
+def test_async_handler_prewarms_and_keeps_alive():
+    session = make_aiohttp_session()
+    with patch("python_telegram_logging.handlers.async_.aiohttp.ClientSession", return_value=session):
+        handler = AsyncTelegramHandler(token="token", chat_id=42, prewarm_connections=True, keepalive_interval=0.05)
+        try:
+            assert wait_for(lambda: session.post.call_count >= 2)
+        finally:
+            handler.close()
+
+    assert {call.args[0] for call in session.post.call_args_list} == {"https://api.telegram.org/bottoken/getMe"}
+    session.close.assert_awaited_once()
@@ -0,0 +1,64 @@
+"""Test the JSON encoding of request bodies."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from python_telegram_logging import encoding
+from python_telegram_logging.encoding import PayloadTemplate, dumps
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+from python_telegram_logging.schemes import ParseMode, TelegramMessage
+
+TEXTS = ["plain", 'quotes " and \\ backslashes', "unicode é 🔥 \u2028", "control \x00\n\t", ""]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_backend(request):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+        yield
+    else:
+        with patch.object(encoding, "orjson", None):
+            yield
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_template_matches_dict_encoding(json_backend, text):
+    fields = {"chat_id": -100123, "parse_mode": "HTML", "disable_notification": False}
+    body = PayloadTemplate(fields).encode(text)
+
+    assert json.loads(body) == {**fields, "text": text}
+
+
+def test_template_without_fields():
+    assert json.loads(PayloadTemplate({}).encode("x")) == {"text": "x"}
+
+
+def test_lone_surrogates_are_escaped(json_backend):
+    assert json.loads(dumps({"text": "bad \ud800"})) == {"text": "bad \ud800"}
+
+
+def test_handler_encoding_matches_prepare_payload():
+    handler = SyncTelegramHandler(token="token", chat_id="chat", parse_mode=ParseMode.MARKDOWN_V2)
+
+    for chat_id in (None, 42, "@channel"):
+        assert json.loads(handler.encode_payload("text", chat_id)) == handler.prepare_payload("text", chat_id)
+    assert {key[0] for key in handler._payload_templates} == {"chat", 42, "@channel"}
+
+
+def test_handler_encoding_follows_attribute_changes():
+    handler = SyncTelegramHandler(token="token", chat_id=42)
+    handler.encode_payload("warm up the cache")
+
+    handler.parse_mode = ParseMode.MARKDOWN_V2
+    handler.disable_web_page_preview = False
+    handler.disable_notification = True
+
+    assert json.loads(handler.encode_payload("text")) == handler.prepare_payload("text")
+    assert json.loads(handler.encode_payload("text"))["parse_mode"] == ParseMode.MARKDOWN_V2.value
+
+
+def test_telegram_message_to_json():
+    message = TelegramMessage(chat_id=42, text="<b>hi</b>", parse_mode=ParseMode.HTML)
+    assert json.loads(message.to_json()) == message.to_dict()
@@ -0,0 +1,179 @@
+"""Test the guard against feedback loops from the handlers' own I/O."""
+
+import json
+import logging
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import aiohttp
+import pytest
+import requests
+
+from python_telegram_logging.feedback import TRANSPORT_LOGGERS, LoggerExclusionFilter, send_path_flag
+from python_telegram_logging.handlers.async_ import AsyncTelegramHandler
+from python_telegram_logging.handlers.digest import DigestTelegramHandler
+from python_telegram_logging.handlers.queue import QueuedTelegramHandler
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger("feedback_test")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    yield logger
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+
+def make_record(name="app", msg="message"):
+    return logging.LogRecord(name, logging.ERROR, "test.py", 1, msg, (), None)
+
+
+@pytest.mark.parametrize(
+    "name, excluded",
+    [
+        ("urllib3", True),
+        ("urllib3.connectionpool", True),
+        ("aiohttp.client", True),
+        ("aiohttp.server", False),
+        ("urllib3x", False),
+        ("app", False),
+    ],
+)
+def test_exclusion_filter(name, excluded):
+    assert LoggerExclusionFilter(TRANSPORT_LOGGERS).filter(make_record(name)) is not excluded
+
+
+def test_transport_loggers_are_excluded_by_default():
+    handler = SyncTelegramHandler(token="token", chat_id=42)
+    assert not handler.filter(make_record("urllib3.connectionpool"))
+    assert handler.filter(make_record("app"))
+
+    handler = SyncTelegramHandler(token="token", chat_id=42, exclude_loggers=())
+    assert handler.filter(make_record("urllib3.connectionpool"))
+
+
+def test_records_logged_while_sending_are_dropped(logger):
+    handler = SyncTelegramHandler(token="token", chat_id=42)
+    logger.addHandler(handler)
+
+    def post(*args, **kwargs):
+        logger.warning("logged by the HTTP client")
+        return Mock(ok=True, status_code=200)
+
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", side_effect=post) as mock_post:
+        logger.error("first")
+        logger.error("second")
+
+    assert mock_post.call_count == 2
+    assert not send_path_flag.active
+
+
+def test_error_callback_logging_does_not_feed_back(logger):
+    errors = []
+
+    def error_callback(error):
+        errors.append(error)
+        logger.error("send failed: %s", error)
+
+    handler = SyncTelegramHandler(token="token", chat_id=42, error_callback=error_callback)
+    logger.addHandler(handler)
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", side_effect=requests.ConnectionError("down")
+    ) as mock_post:
+        logger.error("message")
+
+    assert mock_post.call_count == 1
+    assert len(errors) == 1
+
+
+def test_queued_handler_drops_records_of_the_worker_sends(logger):
+    base_handler = SyncTelegramHandler(token="token", chat_id=42)
+    handler = QueuedTelegramHandler(base_handler)
+    logger.addHandler(handler)
+    sent = threading.Event()
+
+    def post(*args, **kwargs):
+        logging.getLogger("feedback_test").error("logged by the HTTP client")
+        sent.set()
+        return Mock(ok=True, status_code=200)
+
+    try:
+        with patch("python_telegram_logging.handlers.sync.requests.Session.post", side_effect=post) as mock_post:
+            logger.error("message")
+            assert sent.wait(2.0)
+            handler.queue.join()
+            time.sleep(0.1)
+        assert mock_post.call_count == 1
+        assert handler.queue_depth() == 0
+    finally:
+        handler.close()
+
+
+def test_digest_ignores_records_logged_while_sending():
+    handler = DigestTelegramHandler(SyncTelegramHandler(token="token", chat_id=42), interval=3600)
+    try:
+        send_path_flag.active = True
+        try:
+            handler.emit(make_record())
+        finally:
+            send_path_flag.active = False
+        assert handler._entries == {}
+        assert not handler.filter(make_record("urllib3"))
+    finally:
+        handler._shutdown.set()
+
+
+def test_async_handler_drops_records_from_its_event_loop():
+    handler = AsyncTelegramHandler(token="token", chat_id=42)
+    emitted = threading.Event()
+
+    def emit():
+        handler.emit(make_record())
+        emitted.set()
+
+    try:
+        for _ in range(100):
+            if handler._loop is not None:
+                break
+            time.sleep(0.01)
+        handler._loop.call_soon_threadsafe(emit)
+        assert emitted.wait(2.0)
+        assert handler.queue_depth() == 0
+        assert not handler.filter(make_record("aiohttp.client"))
+    finally:
+        handler.close()
+
+
+def test_async_handler_requeues_parked_records_from_its_event_loop():
+    handler = AsyncTelegramHandler(token="token", chat_id=42)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    response = AsyncMock(ok=True, status=200)
+    request = AsyncMock()
+    request.__aenter__.return_value = response
+    session = AsyncMock()
+    session.post = Mock(side_effect=[aiohttp.ClientConnectionError("down"), request, request])
+    handler._session = session
+    handler._rate_limiter.acquire = AsyncMock()
+
+    try:
+        handler.emit(make_record(msg="first"))
+        assert wait_for(lambda: len(handler._parked) == 1)
+        handler.emit(make_record(msg="second"))
+        assert wait_for(lambda: session.post.call_count == 3)
+    finally:
+        handler.close()
+
+    texts = [json.loads(call.kwargs["data"])["text"] for call in session.post.call_args_list]
+    assert texts == ["first", "second", "first"]
+    assert not handler._parked
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
@@ -0,0 +1,123 @@
+"""Test that the handlers keep working in forked child processes."""
+
+import logging
+import os
+import threading
+
+import pytest
+
+from python_telegram_logging.handlers.async_ import AsyncTelegramHandler
+from python_telegram_logging.handlers.digest import DigestTelegramHandler
+from python_telegram_logging.handlers.queue import QueuedTelegramHandler
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+
+class RecordingHandler(SyncTelegramHandler):
+    """Telegram handler that writes the messages it would send to a file descriptor."""
+
+    fd = -1
+
+    def emit(self, record):
+        self._rate_limiter.acquire(self.chat_id)
+        os.write(self.fd, f"{os.getpid()}:{record.getMessage()}\n".encode())
+
+
+def make_record(msg):
+    return logging.LogRecord("test", logging.ERROR, "test.py", 1, msg, (), None)
+
+
+def run_in_child(child):
+    """Fork, run child() in the child with a write fd, and return what the child wrote."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - runs in the child
+        code = 0
+        try:
+            os.close(read_fd)
+            child(write_fd)
+        except BaseException:
+            code = 1
+        finally:
+            os._exit(code)
+
+    os.close(write_fd)
+    chunks = []
+    while True:
+        chunk = os.read(read_fd, 4096)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    return b"".join(chunks).decode()
+
+
+def test_queued_handler_restarts_worker_in_child():
+    target = RecordingHandler(token="token", chat_id="chat")
+    handler = QueuedTelegramHandler(target)
+
+    # Locks held by other parent threads while forking must not deadlock the child.
+    handler._pending_status_lock.acquire()
+    target._rate_limiter._lock.acquire()
+    try:
+
+        def child(fd):
+            target.fd = fd
+            handler.handle(make_record("from child"))
+            handler.close()
+
+        output = run_in_child(child)
+    finally:
+        handler._pending_status_lock.release()
+        target._rate_limiter._lock.release()
+        handler.close()
+
+    pid, message = output.strip().split(":")
+    assert message == "from child"
+    assert int(pid) != os.getpid()
+
+
+def test_async_handler_restarts_loop_in_child():
+    handler = AsyncTelegramHandler(token="token", chat_id="chat")
+    parent_thread = handler._thread
+
+    def child(fd):
+        async def fake_emit(records):
+            for record in records:
+                os.write(fd, f"{record.getMessage()}\n".encode())
+            return True
+
+        handler._async_emit_batch = fake_emit
+        handler.handle(make_record("from child"))
+        handler.close()
+        assert handler._thread is not parent_thread
+
+    try:
+        assert run_in_child(child) == "from child\n"
+    finally:
+        handler.close()
+
+
+def test_digest_handler_discards_parent_digest_in_child():
+    target = RecordingHandler(token="token", chat_id="chat")
+    handler = DigestTelegramHandler(target, interval=3600)
+    handler.handle(make_record("from parent"))
+
+    def child(fd):
+        target.fd = fd
+        handler.handle(make_record("from child"))
+        assert handler._worker is not None and handler._worker.is_alive()
+        handler.close()
+
+    try:
+        output = run_in_child(child)
+    finally:
+        handler._entries.clear()
+        handler.close()
+
+    assert "from child" in output
+    assert "from parent" not in output
+    assert threading.main_thread().is_alive()
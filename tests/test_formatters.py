@@ -0,0 +1,139 @@
+"""Test the Telegram formatters and escaping helpers."""
+
+import logging
+import sys
+
+import pytest
+
+from python_telegram_logging.formatters import (
+    HTMLFormatter,
+    MarkdownFormatter,
+    MarkdownV2Formatter,
+    TemplateFormatter,
+    escape,
+    escape_code,
+)
+from python_telegram_logging.schemes import ParseMode
+
+
+def make_record(msg, args=(), exc_info=None, level=logging.ERROR):
+    return logging.LogRecord(
+        name="app.db", level=level, pathname="test.py", lineno=1, msg=msg, args=args, exc_info=exc_info
+    )
+
+
+@pytest.mark.parametrize(
+    "parse_mode, text, expected",
+    [
+        (ParseMode.HTML, "a < b && c > d", "a &lt; b &amp;&amp; c &gt; d"),
+        (ParseMode.MARKDOWN, "snake_case *bold* [link]", "snake\\_case \\*bold\\* \\[link]"),
+        (ParseMode.MARKDOWN_V2, "1.5 - (x) \\ !", "1\\.5 \\- \\(x\\) \\\\ \\!"),
+    ],
+)
+def test_escape(parse_mode, text, expected):
+    assert escape(text, parse_mode) == expected
+
+
+def test_escape_code():
+    assert escape_code("<a href='x'>", ParseMode.HTML) == "&lt;a href='x'&gt;"
+    assert escape_code("`cmd` \\ _x_", ParseMode.MARKDOWN_V2) == "\\`cmd\\` \\\\ _x_"
+    assert escape_code("`cmd`", ParseMode.MARKDOWN) == "'cmd'"
+
+
+def test_html_formatter():
+    formatter = HTMLFormatter(datefmt="%Y")
+    record = make_record("Value <%s>", ("x & y",))
+
+    text = formatter.format(record)
+
+    assert text.startswith("🔴 <b>ERROR</b> [")
+    assert "\n<code>app.db</code>\nValue &lt;x &amp; y&gt;" in text
+
+
+def test_formatter_renders_escaped_traceback():
+    try:
+        raise ValueError("<bad>")
+    except ValueError:
+        record = make_record("Failed", exc_info=sys.exc_info())
+
+    text = MarkdownV2Formatter().format(record)
+
+    assert "```\nTraceback" in text
+    assert "ValueError: <bad>\n```" in text
+
+
+def test_header_is_cached_per_logger_and_level():
+    formatter = MarkdownFormatter()
+    formatter.format(make_record("one"))
+    formatter.format(make_record("two"))
+    formatter.format(make_record("three", level=logging.INFO))
+
+    assert set(formatter._headers) == {("app.db", logging.ERROR), ("app.db", logging.INFO)}
+
+
+def test_already_escaped_message_is_kept():
+    record = make_record("<b>digest</b>")
+    record.telegram_escaped = True
+
+    assert HTMLFormatter().format(record).endswith("<b>digest</b>")
+
+
+def test_template_formatter_default_matches_telegram_formatter():
+    record = make_record("a < b")
+    assert TemplateFormatter().format(record) == HTMLFormatter().format(record)
+
+
+def test_template_formatter_renders_extras():
+    record = make_record("Payment failed for %s", args=("<alice>",))
+    record.user_id = 42
+    record.plan = "pro & co"
+
+    text = TemplateFormatter("{levelname:bold} {user_id:code}: {message}{extras}").format(record)
+
+    assert text == (
+        "<b>ERROR</b> <code>42</code>: Payment failed for &lt;alice&gt;\n\n"
+        "user_id: <code>42</code>\nplan: <code>pro &amp; co</code>"
+    )
+
+
+def test_template_formatter_selected_extras_and_missing_fields():
+    record = make_record("done")
+    record.user_id = 42
+    record.plan = "pro"
+    formatter = TemplateFormatter("{message} ({missing}){extras}", extra_fields=["plan"])
+
+    assert formatter.format(record) == "done ()\n\nplan: <code>pro</code>"
+    assert formatter.format(make_record("done")) == "done ()"
+
+
+def test_template_formatter_escapes_literals_for_parse_mode():
+    formatter = TemplateFormatter("[{levelname:bold}] {name:code} - {message}", parse_mode=ParseMode.MARKDOWN_V2)
+    assert formatter.format(make_record("v1.2")) == "\\[*ERROR*\\] `app.db` \\- v1\\.2"
+
+
+def test_template_formatter_caches_static_parts_per_logger_and_level():
+    formatter = TemplateFormatter("{emoji} {levelname} {name}: {message}")
+    formatter.format(make_record("first"))
+    prefix, pairs = formatter._plans[("app.db", logging.ERROR)]
+
+    assert prefix == "🔴 ERROR app.db: "
+    assert len(pairs) == 1
+    assert formatter.format(make_record("second")) == "🔴 ERROR app.db: second"
+
+
+def test_template_formatter_appends_traceback():
+    try:
+        raise ValueError("<bad>")
+    except ValueError:
+        record = make_record("failed", exc_info=sys.exc_info())
+
+    text = TemplateFormatter("{message}").format(record)
+
+    assert text.startswith("failed\n\n<pre>Traceback")
+    assert "ValueError: &lt;bad&gt;</pre>" in text
+
+
+@pytest.mark.parametrize("template", ["{message!r}", "{message:italic}", "{}", "{message"])
+def test_template_formatter_rejects_invalid_templates(template):
+    with pytest.raises(ValueError):
+        TemplateFormatter(template)
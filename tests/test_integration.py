@@ -1,6 +1,7 @@
 """Integration tests for the logging handlers."""
 
 import asyncio
+import json
 import logging
 import time
 from unittest.mock import AsyncMock, Mock, patch
@@ -81,8 +82,8 @@ async def test_async_logger_integration(mock_session):
         calls = mock_session.post.call_args_list
 
         # Check the messages
-        assert calls[0].kwargs["json"]["text"] == "Starting async task"
-        assert calls[1].kwargs["json"]["text"] == "Async task completed"
+        assert json.loads(calls[0].kwargs["data"])["text"] == "Starting async task"
+        assert json.loads(calls[1].kwargs["data"])["text"] == "Async task completed"
     finally:
         # Clean up
         handler.close()
@@ -100,8 +101,8 @@ def test_sync_logger_integration(mock_requests):
     handler.setFormatter(logging.Formatter("%(message)s"))
     logger.addHandler(handler)
 
-    # Mock requests.post to return our mock response
-    with patch("requests.post", return_value=mock_requests) as mock_post:
+    # Mock requests.Session.post to return our mock response
+    with patch("requests.Session.post", return_value=mock_requests) as mock_post:
         try:
             # Run our sync application
             sync_main(logger)
@@ -111,8 +112,8 @@ def test_sync_logger_integration(mock_requests):
             calls = mock_post.call_args_list
 
             # Check the messages
-            assert calls[0].kwargs["json"]["text"] == "Starting sync task"
-            assert calls[1].kwargs["json"]["text"] == "Sync task completed"
+            assert json.loads(calls[0].kwargs["data"])["text"] == "Starting sync task"
+            assert json.loads(calls[1].kwargs["data"])["text"] == "Sync task completed"
         finally:
             # Clean up
             handler.close()
@@ -133,8 +134,8 @@ def test_queue_logger_integration(mock_requests):
     handler = QueuedTelegramHandler(handler=base_handler)
     logger.addHandler(handler)
 
-    # Mock requests.post to return our mock response
-    with patch("requests.post", return_value=mock_requests) as mock_post:
+    # Mock requests.Session.post to return our mock response
+    with patch("requests.Session.post", return_value=mock_requests) as mock_post:
         try:
             # Run our sync application
             sync_main(logger)
@@ -147,8 +148,8 @@ def test_queue_logger_integration(mock_requests):
             calls = mock_post.call_args_list
 
             # Check the messages in order
-            assert calls[0].kwargs["json"]["text"] == "Starting sync task"
-            assert calls[1].kwargs["json"]["text"] == "Sync task completed"
+            assert json.loads(calls[0].kwargs["data"])["text"] == "Starting sync task"
+            assert json.loads(calls[1].kwargs["data"])["text"] == "Sync task completed"
         finally:
             # Clean up
             handler.close()  # Queue handler close is synchronous
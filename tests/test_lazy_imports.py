@@ -0,0 +1,44 @@
+"""Test that the package imports its HTTP clients lazily."""
+
+import subprocess
+import sys
+
+import pytest
+
+import python_telegram_logging
+
+
+def loaded_modules(statement):
+    code = f"{statement}\nimport sys\nprint('\\n'.join(sys.modules))"
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+
+
+def test_package_import_loads_no_http_client():
+    modules = loaded_modules("import python_telegram_logging")
+    assert "requests" not in modules
+    assert "aiohttp" not in modules
+
+
+@pytest.mark.parametrize(
+    "name, loaded, not_loaded",
+    [
+        ("SyncTelegramHandler", "requests", "aiohttp"),
+        ("QueuedTelegramHandler", None, "aiohttp"),
+        ("AsyncTelegramHandler", "aiohttp", "requests"),
+    ],
+)
+def test_handler_loads_only_its_http_client(name, loaded, not_loaded):
+    modules = loaded_modules(f"from python_telegram_logging import {name}")
+    if loaded is not None:
+        assert loaded in modules
+    assert not_loaded not in modules
+
+
+def test_public_names_resolve():
+    for name in python_telegram_logging.__all__:
+        assert getattr(python_telegram_logging, name).__name__ == name
+    assert "SyncTelegramHandler" in dir(python_telegram_logging)
+    assert isinstance(python_telegram_logging.__version__, str)
+
+    with pytest.raises(AttributeError):
+        python_telegram_logging.DoesNotExist
@@ -0,0 +1,173 @@
+"""Test the processing pipeline and its stages."""
+
+import json
+import logging
+from unittest.mock import Mock, patch
+
+import pytest
+
+from python_telegram_logging.handlers.queue import QueuedTelegramHandler
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+from python_telegram_logging.pipeline import (
+    AggregateStage,
+    DedupStage,
+    EnrichStage,
+    Envelope,
+    FilterStage,
+    Pipeline,
+    RenderStage,
+    ScheduleStage,
+    SplitStage,
+    Stage,
+)
+
+
+class FakeClock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_record(msg="message", level=logging.ERROR, **attrs):
+    record = logging.LogRecord("test", level, "test.py", 1, msg, (), None)
+    record.__dict__.update(attrs)
+    return record
+
+
+@pytest.fixture
+def handler():
+    handler = SyncTelegramHandler(token="token", chat_id=42)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
+
+
+def run(stages, records, handler):
+    return Pipeline(stages).run(records, handler)
+
+
+def texts(envelopes):
+    return [envelope.text for envelope in envelopes]
+
+
+def sent_texts(mock_post):
+    return [json.loads(call.kwargs["data"])["text"] for call in mock_post.call_args_list]
+
+
+def test_default_pipeline_renders_and_splits(handler):
+    envelopes = Pipeline().run([make_record("a" * 5000), make_record("short")], handler)
+
+    assert [len(text) for text in texts(envelopes)] == [4096, 904, 5]
+    assert envelopes[0].records == envelopes[1].records
+    assert {envelope.chat_id for envelope in envelopes} == {42}
+
+
+def test_filter_and_enrich(handler):
+    def enrich(record):
+        record.msg = f"[host] {record.msg}"
+
+    stages = [FilterStage(lambda record: record.levelno >= logging.ERROR), EnrichStage(enrich), RenderStage()]
+    envelopes = run(stages, [make_record("kept"), make_record("dropped", level=logging.INFO)], handler)
+
+    assert texts(envelopes) == ["[host] kept"]
+
+
+def test_dedup_within_batch_and_window(handler):
+    clock = FakeClock()
+    dedup = DedupStage(window=60.0, clock=clock)
+    stages = [dedup, RenderStage()]
+
+    assert texts(run(stages, [make_record("a"), make_record("a"), make_record("b")], handler)) == ["a", "b"]
+    assert texts(run(stages, [make_record("a")], handler)) == []
+    clock.now += 60.0
+    assert texts(run(stages, [make_record("a")], handler)) == ["a"]
+    assert dedup.suppressed == 2
+
+
+def test_aggregate_merges_per_chat_up_to_the_limit(handler):
+    records = [
+        make_record("one"),
+        make_record("other chat", telegram_chat_id=7),
+        make_record("two"),
+        make_record("three"),
+    ]
+    envelopes = run([RenderStage(), AggregateStage(max_length=len("one\ntwo"), separator="\n")], records, handler)
+
+    assert [(envelope.chat_id, envelope.text) for envelope in envelopes] == [
+        (42, "one\ntwo"),
+        (7, "other chat"),
+        (42, "three"),
+    ]
+    assert [record.msg for record in envelopes[0].records] == ["one", "two"]
+
+
+def test_schedule_sends_most_severe_first(handler):
+    records = [make_record("info", level=logging.INFO), make_record("critical", level=logging.CRITICAL)]
+    assert texts(run([RenderStage(), ScheduleStage()], records, handler)) == ["critical", "info"]
+
+
+def test_split_cuts_status_updates_to_one_message(handler):
+    text = "<b>Progress</b> <code>" + "x &amp; " * 20 + "</code>"
+    envelope = Envelope([make_record()], 42, status_key="job", text=text)
+    (cut,) = texts(SplitStage(limit=80).process([envelope], handler))
+
+    assert len(cut) <= 80
+    assert cut.startswith("<b>Progress</b> <code>x &amp; x")
+    assert "characters omitted" in cut
+    assert cut.endswith("</code>")
+    assert "&" not in cut.replace("&amp;", "")
+
+
+def test_handler_runs_custom_stages():
+    class UppercaseStage(Stage):
+        def process(self, batch, handler):
+            for envelope in batch:
+                envelope.text = envelope.text.upper()
+            return batch
+
+    handler = SyncTelegramHandler(token="token", chat_id=42, pipeline=[RenderStage(), UppercaseStage()])
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", return_value=Mock(ok=True)) as mock_post:
+        handler.emit(make_record("hello"))
+
+    assert sent_texts(mock_post) == ["HELLO"]
+
+
+def test_stage_errors_are_reported(handler):
+    errors = []
+    handler.error_callback = errors.append
+    handler.pipeline = Pipeline([FilterStage(lambda record: 1 / 0)])
+
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post") as mock_post:
+        handler.emit(make_record())
+
+    assert isinstance(errors[0], ZeroDivisionError)
+    mock_post.assert_not_called()
+
+
+def test_queued_handler_sends_batches():
+    handler = SyncTelegramHandler(
+        token="token", chat_id=42, pipeline=[RenderStage(), AggregateStage(separator=" "), SplitStage()]
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    queued = QueuedTelegramHandler(handler, batch_size=10)
+    queued._shutdown.set()  # Let the worker exit once the queue is drained
+    queued._worker.join()
+
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", return_value=Mock(ok=True)) as mock_post:
+        for msg in ["one", "two", "three"]:
+            queued.queue.put_nowait(make_record(msg))
+        queued._process_queue()
+
+    assert sent_texts(mock_post) == ["one two three"]
+    assert queued.queue.empty()
+
+
+def test_split_caps_number_of_parts(handler):
+    envelope = Envelope([make_record()], 42, text="h" * 30 + "t" * 30)
+    parts = texts(SplitStage(limit=20, max_parts=2).process([envelope], handler))
+
+    assert len(parts) == 2
+    assert parts[0].startswith("h")
+    assert "".join(parts).endswith("omitted …\n")  # Formatted text only keeps its head
@@ -0,0 +1,166 @@
+"""Test the queue implementations."""
+
+import functools
+import logging
+import queue
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from python_telegram_logging.handlers.queue import QueuedTelegramHandler
+from python_telegram_logging.queues import FairQueue, RingBufferQueue
+
+
+def test_put_and_get_preserve_order():
+    buffer = RingBufferQueue(maxsize=10)
+    for i in range(5):
+        buffer.put_nowait(i)
+
+    assert buffer.qsize() == 5
+    assert [buffer.get_nowait() for _ in range(5)] == [0, 1, 2, 3, 4]
+    assert buffer.empty()
+    with pytest.raises(queue.Empty):
+        buffer.get_nowait()
+
+
+def test_overflow_is_counted():
+    buffer = RingBufferQueue(maxsize=2)
+    buffer.put_nowait(1)
+    buffer.put_nowait(2)
+
+    for _ in range(3):
+        with pytest.raises(queue.Full):
+            buffer.put_nowait(3)
+
+    assert buffer.full()
+    assert buffer.dropped == 3
+
+
+def test_get_waits_for_producer():
+    buffer = RingBufferQueue()
+    timer = threading.Timer(0.05, buffer.put_nowait, args=("item",))
+    timer.start()
+
+    assert buffer.get(timeout=1.0) == "item"
+    with pytest.raises(queue.Empty):
+        buffer.get(timeout=0.01)
+
+
+def test_drain_and_join():
+    buffer = RingBufferQueue()
+    for i in range(10):
+        buffer.put_nowait(i)
+
+    assert buffer.drain(max_items=4) == [0, 1, 2, 3]
+    assert buffer.drain() == [4, 5, 6, 7, 8, 9]
+    for _ in range(10):
+        buffer.task_done()
+    buffer.join(timeout=1.0)
+    with pytest.raises(ValueError):
+        buffer.task_done()
+
+
+def test_concurrent_producers():
+    buffer = RingBufferQueue(maxsize=100_000)
+
+    def produce(offset):
+        for i in range(1000):
+            buffer.put_nowait(offset + i)
+
+    threads = [threading.Thread(target=produce, args=(n * 1000,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(buffer.drain()) == list(range(8000))
+
+
+def make_record(name, msg="message"):
+    return logging.LogRecord(name, logging.INFO, "test.py", 1, msg, (), None)
+
+
+def take_names(fair_queue, count):
+    return [fair_queue.get_nowait().name for _ in range(count)]
+
+
+def test_fair_queue_round_robin_across_loggers():
+    fair_queue = FairQueue(maxsize=100)
+    for i in range(6):
+        fair_queue.put_nowait(make_record("noisy", str(i)))
+    fair_queue.put_nowait(make_record("quiet"))
+
+    assert take_names(fair_queue, 4) == ["noisy", "quiet", "noisy", "noisy"]
+    assert fair_queue.qsize() == 3
+
+
+def test_fair_queue_weights():
+    fair_queue = FairQueue(weights={"alerts": 3, "debug": 0.5})
+    for _ in range(10):
+        for name in ("alerts", "app", "debug"):
+            fair_queue.put_nowait(make_record(name))
+
+    names = take_names(fair_queue, 9)
+    assert names.count("alerts") == 6
+    assert names.count("app") == 2
+    assert names.count("debug") == 1
+
+
+def test_fair_queue_keeps_order_within_key():
+    fair_queue = FairQueue()
+    for i in range(3):
+        fair_queue.put_nowait(make_record("a", str(i)))
+        fair_queue.put_nowait(make_record("b", str(i)))
+
+    records = [fair_queue.get_nowait() for _ in range(6)]
+    assert [record.msg for record in records if record.name == "a"] == ["0", "1", "2"]
+    assert fair_queue.empty()
+    with pytest.raises(queue.Empty):
+        fair_queue.get(timeout=0.01)
+
+
+def test_fair_queue_caps_each_key():
+    fair_queue = FairQueue(maxsize=4, max_per_key=2)
+    fair_queue.put_nowait(make_record("noisy"))
+    fair_queue.put_nowait(make_record("noisy"))
+    with pytest.raises(queue.Full):
+        fair_queue.put_nowait(make_record("noisy"))
+
+    # The quiet logger still has room
+    fair_queue.put_nowait(make_record("quiet"))
+    assert fair_queue.qsize_by_key() == {"noisy": 2, "quiet": 1}
+    assert fair_queue.dropped == 1
+
+
+def test_fair_queue_lets_a_single_key_fill_the_queue_by_default():
+    fair_queue = FairQueue(maxsize=4)
+    for _ in range(4):
+        fair_queue.put_nowait(make_record("noisy"))
+    with pytest.raises(queue.Full):
+        fair_queue.put_nowait(make_record("quiet"))
+    assert fair_queue.qsize_by_key() == {"noisy": 4}
+
+
+def test_fair_queue_rejects_non_positive_weights():
+    with pytest.raises(ValueError):
+        FairQueue(weights={"a": 0})
+
+
+def test_fair_queue_with_queued_handler():
+    target = Mock()
+    handler = QueuedTelegramHandler(
+        Mock(
+            spec=["handle", "close", "get_status_key", "get_chat_id"],
+            handle=target,
+            get_status_key=lambda record: None,
+            get_chat_id=lambda record: "chat",
+        ),
+        queue_size=10,
+        queue_class=functools.partial(FairQueue, weights={"alerts": 2}),
+    )
+    for name in ("noisy", "alerts"):
+        handler.handle(make_record(name))
+    handler.close()
+
+    assert sorted(call.args[0].name for call in target.call_args_list) == ["alerts", "noisy"]
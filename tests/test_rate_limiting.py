@@ -0,0 +1,219 @@
+"""Test the rate limiting state."""
+
+import logging
+from unittest.mock import Mock, patch
+
+import pytest
+
+from python_telegram_logging.handlers.sync import SyncRateLimiter, SyncTelegramHandler
+from python_telegram_logging.rate_limiting import (
+    AdaptiveRateControl,
+    BaseRateLimiter,
+    BotRateLimit,
+    ChatState,
+    get_bot_rate_limit,
+)
+
+
+class FakeTimeProvider:
+    now = 1000.0
+
+    def get_time(self):
+        return self.now
+
+
+class FakeRateLimiter(BaseRateLimiter):
+    def _acquire_lock(self):
+        return None
+
+    def _release_lock(self, lock):
+        pass
+
+    def _sleep(self, seconds):
+        self._time_provider.now += seconds
+
+
+def test_estimate_drain_time_fresh_chat():
+    state = ChatState()
+
+    assert state.estimate_drain_time(0, 1000.0) == 0.0
+    assert state.estimate_drain_time(1, 1000.0) == 0.0
+    # One message per second within the first minute window
+    assert state.estimate_drain_time(20, 1000.0) == 19.0
+    # Then 20 messages per minute
+    assert state.estimate_drain_time(21, 1000.0) == 60.0
+    assert state.estimate_drain_time(45, 1000.0) == 124.0
+
+
+def test_estimate_drain_time_respects_sent_messages():
+    state = ChatState()
+    for i in range(20):
+        state.record_message(1000.0 + i)
+
+    # The window is full: the next message can go when the oldest one leaves the window.
+    assert state.estimate_drain_time(1, 1019.5) == pytest.approx(40.5)
+
+
+def test_retry_after_is_a_hard_floor():
+    limiter = FakeRateLimiter(FakeTimeProvider())
+    limiter.record_rate_limited("chat", 30.0)
+
+    assert limiter._reserve("chat") == pytest.approx(30.0)
+    assert limiter.estimate_drain_time("chat", 1) == pytest.approx(30.0)
+    limiter.acquire("chat")
+    assert limiter._time_provider.now == pytest.approx(1030.0)
+
+
+def test_acquire_waits_for_all_limits():
+    limiter = FakeRateLimiter(FakeTimeProvider())
+    for _ in range(20):
+        limiter.acquire("chat")
+    assert limiter._time_provider.now == pytest.approx(1019.0)
+
+    # The per-second wait is not enough: the window only has room again at 1060.
+    limiter.acquire("chat")
+    assert limiter._time_provider.now == pytest.approx(1060.0)
+
+
+def test_try_acquire_never_waits():
+    limiter = FakeRateLimiter(FakeTimeProvider())
+
+    assert limiter.try_acquire("chat") == 0.0
+    assert limiter.try_acquire("chat") == pytest.approx(1.0)
+    assert limiter._time_provider.now == 1000.0
+    assert len(limiter._chat_states["chat"].message_timestamps) == 1
+
+    limiter._time_provider.now += 1.0
+    assert limiter.try_acquire("chat") == 0.0
+
+
+def test_bot_limit_is_shared_by_its_chats():
+    limiter = FakeRateLimiter(FakeTimeProvider())
+    bot_limit = BotRateLimit(rate=2.0)
+    for chat_id in ("a", "b", "c"):
+        limiter.set_bot_limit(chat_id, bot_limit)
+
+    assert limiter.try_acquire("a") == 0.0
+    assert limiter.try_acquire("b") == 0.0
+    assert limiter.try_acquire("c") == pytest.approx(0.5)
+    limiter.acquire("c")
+    assert limiter._time_provider.now == pytest.approx(1000.5)
+
+
+def test_chat_limits_and_bot_limit_are_reserved_together():
+    limiter = FakeRateLimiter(FakeTimeProvider())
+    bot_limit = BotRateLimit(rate=1.0)
+    limiter.set_bot_limit("a", bot_limit)
+    limiter.set_bot_limit("b", bot_limit)
+    assert limiter.try_acquire("a") == 0.0
+
+    # Neither limit is drawn from while the other one refuses the message.
+    limiter._time_provider.now += 0.5
+    assert limiter.try_acquire("a") == pytest.approx(0.5)
+    assert limiter.try_acquire("b") == pytest.approx(0.5)
+    assert limiter._chat_states["b"].message_timestamps == []
+    limiter._time_provider.now += 0.5
+    assert limiter.try_acquire("b") == 0.0
+    assert limiter.try_acquire("a") == pytest.approx(1.0)
+
+
+def test_sync_limiter_does_not_hold_its_lock_while_waiting():
+    locked_while_sleeping = []
+    clock = FakeTimeProvider()
+
+    def sleep(seconds):
+        locked_while_sleeping.append(limiter._lock.locked())
+        clock.now += seconds
+
+    limiter = SyncRateLimiter(time_provider=clock, sleep=sleep)
+    limiter.acquire("chat")
+    limiter.acquire("chat")
+
+    assert locked_while_sleeping == [False]
+
+
+def test_handlers_of_a_bot_share_its_limit():
+    handler = SyncTelegramHandler(token="shared_token", chat_id=1)
+    other = SyncTelegramHandler(token="shared_token", chat_id=2, shard_tokens=["other_token"])
+    unlimited = SyncTelegramHandler(token="shared_token", chat_id=3, bot_rate_limit=None)
+
+    assert handler._bot_limits["shared_token"] is other._bot_limits["shared_token"]
+    assert handler._bot_limits["shared_token"] is get_bot_rate_limit("shared_token")
+    assert other._bot_limits["other_token"] is not handler._bot_limits["shared_token"]
+    assert unlimited._bot_limits == {}
+
+    handler.attach_bot_limit(1, "shared_token")
+    assert handler._rate_limiter._chat_states[1].bot_limit is get_bot_rate_limit("shared_token")
+
+
+def test_shared_bot_limit_uses_the_lowest_rate():
+    fast = SyncTelegramHandler(token="mixed_rate_token", chat_id=1, bot_rate_limit=20)
+    slow = SyncTelegramHandler(token="mixed_rate_token", chat_id=2, bot_rate_limit=5)
+    faster = SyncTelegramHandler(token="mixed_rate_token", chat_id=3, bot_rate_limit=25)
+
+    limit = get_bot_rate_limit("mixed_rate_token")
+    assert fast._bot_limits["mixed_rate_token"] is slow._bot_limits["mixed_rate_token"] is limit
+    assert faster._bot_limits["mixed_rate_token"] is limit
+    assert (limit.rate, limit.burst) == (5, 5)
+    taken = [limit.try_take(100.0) for _ in range(6)]
+    assert taken[:5] == [0.0] * 5
+    assert taken[5] == pytest.approx(0.2)
+
+
+def test_adaptive_rate_increases_on_success_and_halves_on_429():
+    control = AdaptiveRateControl(additive_increase=0.1, multiplicative_decrease=0.5)
+    limiter = FakeRateLimiter(FakeTimeProvider(), adaptive=control)
+
+    for _ in range(10):
+        limiter.record_success("chat")
+    state = limiter._chat_states["chat"]
+    assert 1 / state.min_interval == pytest.approx(2.0)
+    assert state.max_per_window == 40
+
+    limiter.record_rate_limited("chat", 5.0)
+    assert 1 / state.min_interval == pytest.approx(1.0)
+    assert state.max_per_window == 20
+    assert state.blocked_until == pytest.approx(1005.0)
+    # Other chats keep their own rate
+    assert limiter._chat_states["other"].min_interval == 1.0
+
+
+def test_adaptive_rate_is_clamped():
+    control = AdaptiveRateControl(min_rate=0.5, max_rate=1.5)
+    state = ChatState()
+
+    for _ in range(10):
+        control.on_rate_limited(state)
+    assert state.min_interval == pytest.approx(2.0)
+    assert state.max_per_window == 10
+
+    for _ in range(1000):
+        control.on_success(state)
+    assert state.min_interval == pytest.approx(1 / 1.5)
+    assert state.max_per_window == 30
+
+
+def test_static_limits_without_adaptive_control():
+    limiter = FakeRateLimiter(FakeTimeProvider())
+    for _ in range(10):
+        limiter.record_success("chat")
+    assert limiter._chat_states["chat"].min_interval == 1.0
+
+
+def test_handler_reports_feedback_to_limiter():
+    handler = SyncTelegramHandler(token="token", chat_id="chat", adaptive_rate_control=AdaptiveRateControl())
+    assert isinstance(handler._rate_limiter, SyncRateLimiter)
+    handler._rate_limiter = Mock()
+    too_many = Mock(ok=False, status_code=429, text="Too Many Requests")
+    too_many.json.return_value = {"ok": False, "description": "Too Many Requests", "parameters": {"retry_after": 7}}
+    record = logging.LogRecord("test", logging.ERROR, "test.py", 1, "message", (), None)
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", return_value=Mock(ok=True, status_code=200)
+    ):
+        handler.emit(record)
+    handler._rate_limiter.record_success.assert_called_once_with("chat")
+
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", return_value=too_many):
+        handler.emit(record)
+    handler._rate_limiter.record_rate_limited.assert_called_once_with("chat", 7)
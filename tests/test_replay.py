@@ -0,0 +1,142 @@
+"""Test the bulk replay of JSON-lines files and its command line."""
+
+import json
+import logging
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+import aiohttp
+import pytest
+
+from python_telegram_logging.__main__ import main
+from python_telegram_logging.circuit_breaker import CircuitBreaker
+from python_telegram_logging.replay import ReplayHandler, parse_record, read_checkpoint, replay, write_checkpoint
+
+
+def make_session(error=None):
+    response = Mock(ok=True, status=200)
+    response.text = AsyncMock(return_value='{"ok": true, "result": {}}')
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=response, side_effect=error)
+    context.__aexit__ = AsyncMock(return_value=None)
+    session = Mock()
+    session.post = Mock(return_value=context)
+    session.close = AsyncMock()
+    return session
+
+
+async def acquire(chat_id, slot=None):
+    if slot is not None:
+        await slot.acquire()
+
+
+def make_handler(session, **kwargs):
+    handler = ReplayHandler("token", 42, **kwargs)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._session = session
+    handler._rate_limiter.acquire = acquire
+    handler._circuit_breaker = CircuitBreaker(failure_threshold=1)
+    return handler
+
+
+def sent(session):
+    return [json.loads(call.kwargs["data"]) for call in session.post.call_args_list]
+
+
+@pytest.fixture
+def backlog(tmp_path):
+    path = tmp_path / "backlog.jsonl"
+    lines = [json.dumps({"msg": f"record {i}", "levelname": "ERROR"}) for i in range(6)]
+    lines.insert(3, json.dumps({"msg": "other chat", "telegram_chat_id": 7}))
+    lines.insert(1, "not json")
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def test_parse_record():
+    record = parse_record(b'{"msg": "%s failed", "args": ["job"], "levelname": "warning", "created": 1.5}')
+
+    assert record.getMessage() == "job failed"
+    assert (record.levelno, record.levelname) == (logging.WARNING, "WARNING")
+    assert record.msecs == 500
+    assert parse_record('{"message": "at 50%", "args": [1]}').getMessage() == "at 50%"
+    assert parse_record("[1, 2]") is None
+    assert parse_record("{") is None
+
+
+def test_checkpoints(tmp_path, backlog):
+    checkpoint = str(tmp_path / "replay.ckpt")
+    assert read_checkpoint(checkpoint, str(backlog)) == 0
+
+    write_checkpoint(checkpoint, str(backlog), 10)
+    assert read_checkpoint(checkpoint, str(backlog)) == 10
+    with pytest.raises(ValueError):
+        read_checkpoint(checkpoint, str(tmp_path / "other.jsonl"))
+
+
+def test_replay_aggregates_records_per_chat(tmp_path, backlog):
+    session = make_session()
+    handler = make_handler(session, chunk_size=4, batch_size=10)
+    checkpoint = str(tmp_path / "replay.ckpt")
+    progress = []
+
+    try:
+        report = replay(str(backlog), handler, checkpoint=checkpoint, progress=progress.append)
+    finally:
+        handler.close()
+
+    payloads = sent(session)
+    texts = [payload["text"] for payload in payloads if payload["chat_id"] == 42]
+    assert "\n\n".join(texts) == "\n\n".join(f"record {i}" for i in range(6))
+    assert [payload["text"] for payload in payloads if payload["chat_id"] == 7] == ["other chat"]
+    assert len(payloads) < 7
+    assert (report.records, report.messages, report.chats, report.skipped) == (7, len(payloads), 2, 1)
+    assert report.completed and len(progress) == 2
+    assert read_checkpoint(checkpoint, str(backlog)) == backlog.stat().st_size
+
+
+def test_replay_resumes_from_the_checkpoint(tmp_path, backlog):
+    checkpoint = str(tmp_path / "replay.ckpt")
+    lines = backlog.read_bytes().splitlines(keepends=True)
+    write_checkpoint(checkpoint, str(backlog), sum(len(line) for line in lines[:-2]))
+    session = make_session()
+    handler = make_handler(session, batch_size=1)
+
+    try:
+        report = replay(str(backlog), handler, checkpoint=checkpoint)
+    finally:
+        handler.close()
+
+    assert [payload["text"] for payload in sent(session)] == ["record 4", "record 5"]
+    assert report.records == 2 and report.completed
+
+
+def test_replay_stops_while_the_api_is_unreachable(tmp_path, backlog):
+    checkpoint = str(tmp_path / "replay.ckpt")
+    handler = make_handler(make_session(error=aiohttp.ClientConnectionError()), chunk_size=4)
+
+    try:
+        report = replay(str(backlog), handler, checkpoint=checkpoint)
+    finally:
+        handler.close()
+
+    assert not report.completed
+    assert report.records == 0
+    assert read_checkpoint(checkpoint, str(backlog)) == 0
+
+
+def test_command_line(backlog, capsys):
+    report = Mock(completed=True)
+    report.summary.return_value = "summary"
+    with patch("python_telegram_logging.__main__.replay", return_value=report) as mock_replay:
+        status = main(["replay", str(backlog), "--token", "token", "--chat-id", "42", "--chunk-size", "10"])
+
+    assert status == 0
+    handler = mock_replay.call_args.args[1]
+    assert (handler.token, handler.chat_id, handler.queue_size) == ("token", "42", 10)
+    assert capsys.readouterr().out == "summary\n"
+
+
+def test_command_line_requires_a_token(backlog, monkeypatch):
+    monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
+    with pytest.raises(SystemExit):
+        main(["replay", str(backlog), "--chat-id", "42"])
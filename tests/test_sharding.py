@@ -0,0 +1,81 @@
+"""Test sharding across bot tokens."""
+
+import logging
+from unittest.mock import Mock, patch
+
+import pytest
+
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+from python_telegram_logging.schemes import ShardStrategy
+from python_telegram_logging.sharding import TokenPool
+
+
+class FakeClock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_round_robin():
+    pool = TokenPool(["a", "b", "c"])
+
+    assert [pool.choose(lambda token: 0.0) for _ in range(6)] == ["a", "b", "c", "a", "b", "c"]
+
+
+def test_least_loaded():
+    pool = TokenPool(["a", "b", "c"], strategy=ShardStrategy.LEAST_LOADED)
+    load = {"a": 0.5, "b": 0.0, "c": 0.2}
+
+    assert pool.choose(load.get) == "b"
+
+
+def test_penalized_token_leaves_rotation():
+    clock = FakeClock()
+    pool = TokenPool(["a", "b"], clock=clock)
+    pool.penalize("a", 30)
+
+    assert pool.available() == ["b"]
+    assert {pool.choose(lambda token: 0.0) for _ in range(4)} == {"b"}
+
+    pool.penalize("b", 10)
+    # Every token is throttled: the one available first is returned.
+    assert pool.choose(lambda token: 0.0) == "b"
+    assert pool.blocked_for("b") == 10
+
+    clock.now += 30
+    assert pool.available() == ["a", "b"]
+
+
+def test_empty_pool_rejected():
+    with pytest.raises(ValueError):
+        TokenPool([])
+
+
+def test_handler_retries_429_with_another_token():
+    handler = SyncTelegramHandler(token="token_a", chat_id="test_chat_id", shard_tokens=["token_b"])
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._rate_limiter.acquire = Mock()
+
+    throttled = Mock(ok=False, status_code=429, text="")
+    throttled.json.return_value = {"ok": False, "parameters": {"retry_after": 30}}
+    ok = Mock(ok=True, status_code=200, text="")
+
+    with patch(
+        "python_telegram_logging.handlers.sync.requests.Session.post", side_effect=[throttled, ok, ok]
+    ) as mock_post:
+        for text in ("first", "second"):
+            record = logging.LogRecord(
+                name="test_logger", level=logging.INFO, pathname="test.py", lineno=1, msg=text, args=(), exc_info=None
+            )
+            handler.emit(record)
+
+    urls = [call.args[0] for call in mock_post.call_args_list]
+    assert urls == [
+        "https://api.telegram.org/bottoken_a/sendMessage",
+        "https://api.telegram.org/bottoken_b/sendMessage",
+        "https://api.telegram.org/bottoken_b/sendMessage",
+    ]
+    # The rate limiter state is kept per (token, chat).
+    keys = [call.args[0] for call in handler._rate_limiter.acquire.call_args_list]
+    assert keys == [("token_a", "test_chat_id"), ("token_b", "test_chat_id"), ("token_b", "test_chat_id")]
@@ -0,0 +1,80 @@
+"""Test the virtual time simulation harness."""
+
+import asyncio
+import time
+
+import pytest
+
+from python_telegram_logging.rate_limiting import LimitProfile
+from python_telegram_logging.simulation import (
+    SimulatedBotAPI,
+    VirtualClock,
+    VirtualTimeEventLoop,
+    simulate_async_handler,
+    simulate_async_limiter,
+    simulate_sync_limiter,
+)
+
+
+def test_virtual_clock_sleep_advances_at_least_resolution():
+    clock = VirtualClock(start=1024.0)
+    clock.sleep(2.5)
+    assert clock.get_time() == 1026.5
+
+    clock.sleep(1e-15)
+    assert clock() > 1026.5
+    clock.sleep(0)
+    assert clock() == pytest.approx(1026.5 + clock.resolution)
+
+
+def test_event_loop_skips_waits():
+    clock = VirtualClock()
+    loop = VirtualTimeEventLoop(clock)
+    wall_start = time.monotonic()
+    try:
+        loop.run_until_complete(asyncio.sleep(3600))
+    finally:
+        loop.close()
+
+    assert clock.now == pytest.approx(3600)
+    assert time.monotonic() - wall_start < 1.0
+
+
+def test_simulated_api_rejects_sends_breaking_the_limits():
+    clock = VirtualClock()
+    api = SimulatedBotAPI(clock, LimitProfile(min_interval=1.0, max_per_window=2, window=10.0))
+
+    assert api.send("chat") == 0.0
+    assert api.send("chat") == 1.0
+    clock.sleep(1.0)
+    assert api.send("chat") == 0.0
+    clock.sleep(1.0)
+    assert api.send("chat") == 8.0
+    assert api.send("other") == 0.0
+
+    assert [violation.rule for violation in api.violations] == ["min_interval", "max_per_window"]
+    assert api.sent == 3
+
+
+@pytest.mark.parametrize("simulate", [simulate_sync_limiter, simulate_async_limiter])
+def test_limiters_never_break_the_limits(simulate):
+    report = simulate(20_000, chats=20)
+
+    assert report.messages == 20_000
+    assert report.violations == []
+    assert report.efficiency == pytest.approx(1.0, abs=0.05)
+
+
+def test_private_chat_profile():
+    report = simulate_sync_limiter(6_000, chats=2, profile=LimitProfile(max_per_window=60))
+
+    assert report.violations == []
+    assert report.throughput == pytest.approx(2.0, rel=0.01)
+
+
+def test_async_handler_queue_consumer():
+    report = simulate_async_handler(600, chats=6, queue_size=100, latency=0.1)
+
+    assert report.messages == 600
+    assert report.violations == []
+    assert report.efficiency > 0.9
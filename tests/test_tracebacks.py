@@ -0,0 +1,67 @@
+"""Test the traceback renderer."""
+
+import sys
+from unittest.mock import patch
+
+from python_telegram_logging.tracebacks import TracebackRenderer, is_library_file
+
+
+def recurse(depth):
+    if depth == 0:
+        raise ValueError("innermost")
+    recurse(depth - 1)
+
+
+def raise_chained():
+    try:
+        recurse(50)
+    except ValueError as e:
+        raise RuntimeError("outer") from e
+
+
+def capture(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        return sys.exc_info()
+
+
+def test_identical_frames_are_collapsed():
+    text = TracebackRenderer().render(capture(recurse, 50))
+
+    assert "… 49 identical frames" in text
+    assert text.count("in recurse") == 2
+    assert text.endswith("ValueError: innermost")
+
+
+def test_chain_is_kept():
+    text = TracebackRenderer().render(capture(raise_chained))
+
+    assert "ValueError: innermost" in text
+    assert "The above exception was the direct cause of the following exception" in text
+    assert text.endswith("RuntimeError: outer")
+
+
+def test_budget_trims_outer_frames():
+    full = TracebackRenderer(fold_library_frames=False).render(capture(raise_chained))
+    text = TracebackRenderer(max_length=len(full) - 1, fold_library_frames=False).render(capture(raise_chained))
+
+    assert len(text) < len(full)
+    assert "outer frames omitted" in text
+    assert "ValueError: innermost" in text
+    assert "RuntimeError: outer" in text
+
+
+def test_library_frames():
+    assert is_library_file(sys.modules["json"].__file__)
+    assert not is_library_file(__file__)
+
+
+def test_render_is_cached_per_fingerprint():
+    renderer = TracebackRenderer()
+    with patch.object(renderer, "_render", wraps=renderer._render) as mock_render:
+        for _ in range(3):
+            renderer.render(capture(recurse, 3))
+        renderer.render(capture(recurse, 4))
+
+    assert mock_render.call_count == 2
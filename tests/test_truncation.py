@@ -0,0 +1,272 @@
+"""Test the truncation of giant messages."""
+
+import json
+import logging
+import re
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+from python_telegram_logging.formatters import HTMLFormatter, MarkdownFormatter
+from python_telegram_logging.handlers.sync import SyncTelegramHandler
+from python_telegram_logging.schemes import TELEGRAM_MESSAGE_LIMIT, ParseMode
+from python_telegram_logging.truncation import (
+    bound_record,
+    elision_marker,
+    format_count,
+    truncate_markup,
+    truncate_middle,
+)
+
+
+def make_record(msg, args=None, level=logging.ERROR):
+    return logging.LogRecord("test_logger", level, "test.py", 1, msg, args, None)
+
+
+@pytest.mark.parametrize(
+    "count,expected", [(950, "950"), (9_999, "9999"), (12_345, "12K"), (9_999_999, "9999K"), (49_800_000, "49M")]
+)
+def test_format_count(count, expected):
+    assert format_count(count) == expected
+
+
+def test_truncate_middle_keeps_short_text():
+    text = "x" * 100
+    assert truncate_middle(text, 100) is text
+
+
+@pytest.mark.parametrize("length", [101, 1_000, 20_000, 50_000_000])
+def test_truncate_middle_keeps_head_and_tail(length):
+    text = "h" * (length // 2) + "t" * (length - length // 2)
+    truncated = truncate_middle(text, 100)
+
+    head, _, tail = truncated.partition("\n… ")
+    assert len(truncated) <= 100
+    assert "characters omitted" in truncated
+    assert set(head) == {"h"}
+    assert tail.endswith("t")
+    assert len(head) > len(tail.split("\n")[-1])
+
+
+def test_truncate_middle_reports_omitted_count():
+    truncated = truncate_middle("z" * 5_000, 1_000)
+    kept = truncated.count("z")
+
+    assert len(truncated) == 1_000
+    assert truncated == "z" * (kept - kept // 3) + elision_marker(5_000 - kept) + "z" * (kept // 3)
+
+
+def test_truncate_middle_bytes():
+    truncated = truncate_middle(b"x" * 1_000, 100)
+    assert isinstance(truncated, bytes)
+    assert len(truncated) <= 100
+    assert "omitted".encode() in truncated
+
+
+def test_bound_record_truncates_arguments_without_mutating():
+    body = "y" * 1_000_000
+    record = make_record("Response: %s (%d)", (body, 500))
+    bounded = bound_record(record, 1_000)
+
+    assert bounded is not record
+    assert record.args == (body, 500)
+    assert len(bounded.getMessage()) < 1_100
+    assert bounded.getMessage().endswith("y (500)")
+
+
+def test_bound_record_truncates_message_without_arguments():
+    record = make_record("z" * 100_000)
+    bounded = bound_record(record, 1_000)
+
+    assert len(bounded.getMessage()) <= 1_000
+    assert len(record.msg) == 100_000
+
+
+def test_bound_record_keeps_message_with_arguments_and_small_records():
+    record = make_record("%s" + "z" * 5_000, ("a",))
+    assert bound_record(record, 1_000) is record
+
+    record = make_record("Small %(key)s", ({"key": "value"},))
+    assert bound_record(record, 1_000) is record
+
+
+def test_bound_record_mapping_arguments():
+    record = make_record("Body %(body)s", ({"body": "b" * 10_000},))
+    bounded = bound_record(record, 1_000)
+    assert len(bounded.getMessage()) <= 1_005
+    assert "characters omitted" in bounded.getMessage()
+
+
+def test_bound_record_shares_budget_between_arguments():
+    record = make_record("%s %s %s %d", ("s" * 100, "m" * 5_000, "l" * 50_000, 7))
+    args = bound_record(record, 1_000).args
+
+    assert args[0] == "s" * 100
+    assert len(args[1]) == len(args[2]) == 450
+    assert args[3] == 7
+
+
+def test_truncate_markup_closes_html_tags_and_keeps_entities():
+    text = "<b>ERROR</b>\n<pre>" + "a &lt; b " * 1_000 + "</pre>"
+    for max_length in range(60, 200, 7):
+        truncated = truncate_markup(text, max_length, ParseMode.HTML)
+
+        assert len(truncated) <= max_length
+        assert truncated.endswith("…\n</pre>")
+        assert re.search(r"&(?!lt;)", truncated) is None
+
+
+def test_truncate_markup_does_not_cut_html_tag():
+    truncated = truncate_markup("<b>x</b> <code>" + "y" * 100 + "</code>", 45, ParseMode.HTML)
+    assert truncated.startswith("<b>x</b> \n")
+    assert truncated.count("<code>") == truncated.count("</code>")
+
+
+@pytest.mark.parametrize(
+    "text,closing",
+    [
+        ("*bold* ```\n" + "code \\` " * 100 + "\n```", "```"),
+        ("_italic \\_ " + "x" * 100 + "_", "_"),
+        ("`a*b` __under *bold " + "z" * 100 + "*__", "*__"),
+    ],
+)
+def test_truncate_markup_markdown_v2(text, closing):
+    truncated = truncate_markup(text, 60, ParseMode.MARKDOWN_V2)
+    assert len(truncated) <= 60
+    assert truncated.endswith("…\n" + closing)
+    assert not truncated[: -len(closing)].rstrip("\n… 0123456789Kcharactersomitted").endswith("\\")
+
+
+@pytest.mark.parametrize("max_length", [1, 10, 40, 60, 80, 100])
+def test_truncate_markup_deeply_nested_html_is_never_empty(max_length):
+    tags = ["b", "i", "u", "s", "tg-spoiler", "code"]
+    text = "".join(f"<{tag}>" for tag in tags) + "x &lt; y " * 100 + "".join(f"</{tag}>" for tag in reversed(tags))
+    truncated = truncate_markup(text, max_length, ParseMode.HTML)
+
+    assert 0 < len(truncated) <= max_length
+    for tag in tags:
+        assert truncated.count(f"<{tag}>") == truncated.count(f"</{tag}>")
+    assert re.search(r"&(?!lt;)", truncated) is None
+    if max_length >= 40:
+        assert "characters omitted" in truncated
+
+
+def test_truncate_markup_reports_omitted_count():
+    text = "<b>" + "x" * 1_000 + "</b>"
+    truncated = truncate_markup(text, 100, ParseMode.HTML)
+    head = truncated.split("\n")[0]
+    assert truncated == head + elision_marker(len(text) - len(head)) + "</b>"
+
+
+def test_truncate_markup_without_parse_mode_keeps_tail():
+    truncated = truncate_markup("h" * 500 + "t", 100, None)
+    assert truncated == truncate_middle("h" * 500 + "t", 100)
+
+
+@pytest.fixture
+def mock_post():
+    response = Mock(ok=True, status_code=200)
+    with patch("python_telegram_logging.handlers.sync.requests.Session.post", return_value=response) as post:
+        yield post
+
+
+def sent_texts(post):
+    return [json.loads(call.kwargs["data"])["text"] for call in post.call_args_list]
+
+
+def test_handler_caps_giant_argument(mock_post):
+    handler = SyncTelegramHandler(
+        token="test_token",
+        chat_id="test_chat_id",
+        parse_mode=ParseMode.HTML,
+        max_message_length=4 * TELEGRAM_MESSAGE_LIMIT,
+        max_message_parts=4,
+    )
+    handler.handle(make_record("Dump <%s> end", ("x" * 50_000_000,)))
+
+    texts = sent_texts(mock_post)
+    text = "".join(texts)
+    assert len(texts) <= 4
+    assert len(text) <= 4 * TELEGRAM_MESSAGE_LIMIT
+    assert "49M characters omitted" in text
+    assert text.startswith("Dump <x")
+    assert text.endswith("x> end")
+
+
+def test_handler_caps_non_string_argument_without_breaking_markup(mock_post):
+    handler = SyncTelegramHandler(
+        token="test_token", chat_id="test_chat_id", parse_mode=ParseMode.HTML, max_message_length=1_000
+    )
+    handler.setFormatter(HTMLFormatter())
+    handler.handle(make_record("Rows: %s", (list(range(100_000)),)))
+
+    (text,) = sent_texts(mock_post)
+    assert len(text) <= 1_000
+    assert "<b>ERROR</b>" in text
+    assert "<code>test_logger</code>\nRows: [0, 1, 2" in text
+    assert "characters omitted" in text
+    assert text.endswith("99999]")
+
+
+def test_handler_caps_number_of_parts(mock_post):
+    handler = SyncTelegramHandler(
+        token="test_token", chat_id="test_chat_id", max_message_length=None, max_message_parts=2
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.handle(make_record("p" * (10 * TELEGRAM_MESSAGE_LIMIT)))
+
+    texts = sent_texts(mock_post)
+    assert len(texts) == 2
+    assert "characters omitted" in texts[0] + texts[1]
+
+
+def test_limits_are_disabled_by_default():
+    handler = SyncTelegramHandler(token="test_token", chat_id="test_chat_id")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    parts = handler.format_message(make_record("q" * (6 * TELEGRAM_MESSAGE_LIMIT)))
+
+    assert parts == ["q" * TELEGRAM_MESSAGE_LIMIT] * 6
+
+
+def raise_giant():
+    raise ValueError("<tag> & " * 5_000)
+
+
+@pytest.mark.parametrize("max_length", [300, 500, 1_000])
+def test_handler_truncates_html_traceback_before_escaping(mock_post, max_length):
+    handler = SyncTelegramHandler(
+        token="test_token", chat_id="test_chat_id", parse_mode=ParseMode.HTML, max_message_length=max_length
+    )
+    handler.setFormatter(HTMLFormatter())
+    try:
+        raise_giant()
+    except ValueError:
+        record = logging.LogRecord("test_logger", logging.ERROR, "test.py", 1, "Failed <%s>", ("job",), sys.exc_info())
+    full = HTMLFormatter().format(record)
+    assert len(full) > 5 * max_length
+    handler.handle(record)
+
+    (text,) = sent_texts(mock_post)
+    assert len(text) <= max_length
+    assert "Failed &lt;job&gt;" in text
+    assert "characters omitted" in text
+    assert text.count("<pre>") == text.count("</pre>") == 1
+    assert text.index("<pre>") < text.index("characters omitted") < text.index("</pre>")
+    assert re.search(r"&(?!lt;|gt;|amp;|quot;)", text) is None
+    assert text.endswith("</pre>")
+    assert "&lt;tag&gt; &amp;" in text.split("characters omitted")[1]
+
+
+def test_handler_keeps_markdown_valid_for_escaped_message(mock_post):
+    handler = SyncTelegramHandler(
+        token="test_token", chat_id="test_chat_id", parse_mode=ParseMode.MARKDOWN_V2, max_message_length=300
+    )
+    handler.setFormatter(MarkdownFormatter())
+    record = make_record("`" + "x\\." * 1_000 + "`")
+    record.telegram_escaped = True
+    handler.handle(record)
+
+    (text,) = sent_texts(mock_post)
+    assert len(text) <= 300
+    assert text.endswith("…\n`")